@@ -1,18 +1,93 @@
 # app/__init__.py
+# Version 1.1 — 2026-10-15
+# - USE_X_SENDFILE follows PDF_X_SENDFILE
+# - jsonify() and current_app.json serialize with orjson when it is installed
+# - HTML/JSON/JS/CSS responses brotli/gzip-compressed by Flask-Compress when installed
+# - Root logging level from LOG_LEVEL (default INFO); request traces log at DEBUG
+# - JSON If-None-Match answered after Flask-Compress, against the final ETag
 # Version 1.0 — 2025-01-01
 #
 # Flask application factory for The Queue
 
+import logging
 import os
-from flask import Flask
+from flask import Flask, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # stdlib json via Flask's default provider
+    orjson = None
+
+try:
+    from flask_compress import Compress
+except ImportError:  # responses go out uncompressed
+    Compress = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson for the large queue/labor/report lists.
+    Dict keys are sorted like the default provider, and dates, Decimals and
+    UUIDs fall back to Flask's own conversions. Dataclass rows (MaterialRow,
+    ActiveLaborRow) are serialized natively in field order, not sorted.
+    """
+    _options = None
+    if orjson is not None:
+        _options = (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+                    | orjson.OPT_PASSTHROUGH_DATETIME)
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._options).decode()
+
+    def response(self, *args, **kwargs):
+        if self._app.debug or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default,
+                            option=self._options | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
 
 def create_app():
     """Create and configure the Flask application"""
     app = Flask(__name__)
     
+    logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO').upper())
+    
     # Configuration
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'thequeue-dev-key')
     app.config['TEMPLATES_AUTO_RELOAD'] = True
+
+    from app.config import PDF_X_SENDFILE
+    app.config['USE_X_SENDFILE'] = PDF_X_SENDFILE
+
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
+
+    # Registered before Compress(app): after_request hooks run in reverse
+    # order, so this sees the ETag Compress rewrote to W/"<hash>:br" and the
+    # 304 check matches what compressed clients send back.
+    @app.after_request
+    def _conditional_get(response):
+        """Answer If-None-Match with 304 for JSON GET responses that carry an ETag."""
+        if (request.method == 'GET' and response.status_code == 200
+                and response.mimetype == 'application/json' and 'ETag' in response.headers):
+            response.make_conditional(request)
+        return response
+
+    if Compress is not None:
+        # Queue HTML and polled JSON shrink several-fold; the streamed activity
+        # report is left alone so it keeps streaming
+        app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+        app.config['COMPRESS_MIN_SIZE'] = 500
+        app.config['COMPRESS_STREAMS'] = False
+        app.config['COMPRESS_MIMETYPES'] = [
+            'text/html', 'application/json', 'text/css', 'application/javascript'
+        ]
+        Compress(app)
     
     # Register blueprints
     from app.routes.views import views
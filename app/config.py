@@ -1,4 +1,10 @@
 # app/config.py
+# Version 1.4 — 2026-10-15
+# - Explicit QueuePool sizing, pre-ping and recycle (DB_POOL_* env vars)
+# - pyodbc output converters return float for NUMERIC/DECIMAL columns
+# - PDF_ACCEL_REDIRECT / PDF_X_SENDFILE hand PDF bytes to a front-end web server
+# - PDF_MAX_AGE: browser cache lifetime for /api/pdf responses
+# - EPICOR_CA_BUNDLE: verify the Epicor REST certificate against a CA bundle
 # Version 1.3 — 2026-01-20
 #
 # Database configuration for The Queue
@@ -6,7 +12,7 @@
 
 import os
 from urllib.parse import quote_plus
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 
 # Read from environment
 DB_SERVER = os.getenv('DB_SERVER', 'SQL1.CORP.JD2.COM')
@@ -41,19 +47,59 @@ else:
 PDF_UNC_PREFIX = os.getenv('PDF_UNC_PREFIX', r'\\JAIMEE-EF\EPICOR\Part Attachments')
 PDF_LOCAL_PREFIX = os.getenv('PDF_LOCAL_PREFIX', r'C:\EPICOR\Part Attachments')
 
+# PDF offload when a web server fronts Waitress (both off by default):
+#   PDF_ACCEL_REDIRECT - nginx internal location aliased to PDF_LOCAL_PREFIX,
+#                        e.g. /pdf-internal/ (answers with X-Accel-Redirect)
+#   PDF_X_SENDFILE=1   - send_file() answers with X-Sendfile (Apache mod_xsendfile)
+PDF_ACCEL_REDIRECT = os.getenv('PDF_ACCEL_REDIRECT', '')
+PDF_X_SENDFILE = os.getenv('PDF_X_SENDFILE', '0') == '1'
+
+# Seconds browsers may reuse a drawing without asking again (0 = always revalidate)
+PDF_MAX_AGE = int(os.getenv('PDF_MAX_AGE', '3600'))
+
 # Epicor REST API
 EPICOR_API_URL = os.getenv('EPICOR_API_URL', '')
 EPICOR_API_KEY = os.getenv('EPICOR_API_KEY', '')
 EPICOR_USERNAME = os.getenv('EPICOR_USERNAME', '')
 EPICOR_PASSWORD = os.getenv('EPICOR_PASSWORD', '')
+# CA bundle for Epicor's TLS certificate; blank keeps verification off (self-signed)
+EPICOR_CA_BUNDLE = os.getenv('EPICOR_CA_BUNDLE', '')
+
+# Connection pool - keeps ODBC sessions open between requests. Connections are
+# not shared: every query checks out its own, so size for WAITRESS_THREADS plus
+# the 8 queries EXECUTOR workers (16 + 8 fits the 10 + 20 default)
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '20'))
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))  # seconds
 
 _engine = None
 
+
+def _decimal_to_float(raw):
+    """pyodbc output converter: NUMERIC/DECIMAL arrive as text bytes."""
+    return float(raw) if raw is not None else None
+
+
+def _register_output_converters(dbapi_conn, connection_record):
+    """Have pyodbc return float for NUMERIC/DECIMAL instead of Decimal."""
+    import pyodbc
+    dbapi_conn.add_output_converter(pyodbc.SQL_DECIMAL, _decimal_to_float)
+    dbapi_conn.add_output_converter(pyodbc.SQL_NUMERIC, _decimal_to_float)
+
+
 def get_engine():
-    """Get or create the SQLAlchemy engine."""
+    """Get or create the SQLAlchemy engine (pooled)."""
     global _engine
     if _engine is None:
-        _engine = create_engine(CONN_STR, fast_executemany=True)
+        _engine = create_engine(
+            CONN_STR,
+            fast_executemany=True,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_pre_ping=True,
+            pool_recycle=DB_POOL_RECYCLE,
+        )
+        event.listen(_engine, 'connect', _register_output_converters)
     return _engine
 
 
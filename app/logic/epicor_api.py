@@ -1,15 +1,36 @@
 # app/logic/epicor_api.py
+# Version 4.1 — 2026-10-15
+# - api_get()/api_post() share one pooled requests.Session (keep-alive to Epicor)
+# - get_active_labor() results cached per employee for ACTIVE_LABOR_CACHE_TTL seconds
+# - Session retries connect failures/idempotent reads; EPICOR_CA_BUNDLE enables TLS verify
+# - Labor/kanban/job-qty traces go to logger.debug (failures warning/exception) instead of print
+# - InsecureRequestWarning silenced only when EPICOR_CA_BUNDLE is unset; logged once at startup
 # Version 4.0 — 2026-01-03
 #
 # Epicor REST API v1 helper for labor transactions
 
+import logging
+import os
+import threading
 import requests
+import urllib3
+from cachetools import TTLCache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from requests.auth import HTTPBasicAuth
-from app.config import EPICOR_API_URL, EPICOR_API_KEY, EPICOR_USERNAME, EPICOR_PASSWORD
+from app.config import (
+    EPICOR_API_URL, EPICOR_API_KEY, EPICOR_USERNAME, EPICOR_PASSWORD, EPICOR_CA_BUNDLE
+)
 
-# Disable SSL warnings for self-signed certs
-import urllib3
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+logger = logging.getLogger(__name__)
+
+# Without a CA bundle the session skips certificate checks (self-signed Epicor
+# cert). Say so once at startup instead of warning on every request; with a
+# bundle configured, InsecureRequestWarning stays on.
+if not EPICOR_CA_BUNDLE:
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    logger.warning("EPICOR_CA_BUNDLE not set: TLS certificate verification is OFF for %s",
+                   EPICOR_API_URL)
 
 
 def get_auth():
@@ -26,17 +47,37 @@ def get_headers():
     }
 
 
-def api_get(endpoint):
+def _make_session():
+    """Session with auth, headers and a connection pool for all Epicor calls."""
+    session = requests.Session()
+    session.auth = get_auth()
+    session.headers.update(get_headers())
+    session.verify = EPICOR_CA_BUNDLE or False
+    # Retries cover connection failures and idempotent reads; urllib3 does not
+    # re-send a POST after a read error, so labor writes are never doubled
+    retry = Retry(total=3, backoff_factor=0.2)
+    adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=retry)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+# Shared so labor calls reuse open TCP/TLS connections to Epicor instead of
+# handshaking on every request
+_EPICOR = _make_session()
+
+
+def api_get(endpoint, timeout=30):
     """GET request to Epicor API."""
     url = f"{EPICOR_API_URL}/{endpoint}"
-    response = requests.get(url, headers=get_headers(), auth=get_auth(), verify=False, timeout=30)
+    response = _EPICOR.get(url, timeout=timeout)
     return response
 
 
 def api_post(endpoint, data=None):
     """POST request to Epicor API."""
     url = f"{EPICOR_API_URL}/{endpoint}"
-    response = requests.post(url, headers=get_headers(), auth=get_auth(), json=data or {}, verify=False, timeout=30)
+    response = _EPICOR.post(url, json=data or {}, timeout=30)
     return response
 
 
@@ -154,9 +195,8 @@ def start_activity(emp_id, job_num, asm_seq, opr_seq, resource_grp_id='', resour
             default_res_id = labor_dtl.get('ResourceID', '')
             default_jc_dept = labor_dtl.get('JCDept', '')
 
-            import sys
-            print(f"[start_activity] After DefaultOprSeq: ResGrp={default_res_grp}, ResID={default_res_id}, JcDept={default_jc_dept}", file=sys.stderr, flush=True)
-            print(f"[start_activity] Provided values: ResGrp={resource_grp_id}, ResID={resource_id}, JcDept={jc_dept}, OpCode={op_code}", file=sys.stderr, flush=True)
+            logger.debug("[start_activity] After DefaultOprSeq: ResGrp=%s, ResID=%s, JcDept=%s", default_res_grp, default_res_id, default_jc_dept)
+            logger.debug("[start_activity] Provided values: ResGrp=%s, ResID=%s, JcDept=%s, OpCode=%s", resource_grp_id, resource_id, jc_dept, op_code)
 
             # If we have values from the caller, use those (they come from the job operation)
             # Otherwise keep what Epicor defaulted
@@ -164,25 +204,25 @@ def start_activity(emp_id, job_num, asm_seq, opr_seq, resource_grp_id='', resour
                 labor_dtl['ResourceGrpID'] = resource_grp_id
             elif not default_res_grp:
                 # Neither provided nor defaulted - look up from JobOpDtl first (most reliable)
-                print(f"[start_activity] No ResourceGrpID - looking up from JobOpDtl for {job_num}/{asm_seq}/{opr_seq}", file=sys.stderr, flush=True)
+                logger.debug("[start_activity] No ResourceGrpID - looking up from JobOpDtl for %s/%s/%s", job_num, asm_seq, opr_seq)
                 jod_resp = api_get(f"Erp.BO.JobEntrySvc/JobOpDtls?$filter=JobNum eq '{job_num}' and AssemblySeq eq {asm_seq} and OprSeq eq {opr_seq}&$top=1")
                 if jod_resp.ok:
                     jods = jod_resp.json().get('value', [])
                     if jods and jods[0].get('ResourceGrpID'):
                         labor_dtl['ResourceGrpID'] = jods[0]['ResourceGrpID']
-                        print(f"[start_activity] Found ResourceGrpID from JobOpDtl: {jods[0]['ResourceGrpID']}", file=sys.stderr, flush=True)
+                        logger.debug("[start_activity] Found ResourceGrpID from JobOpDtl: %s", jods[0]['ResourceGrpID'])
 
                 # If still no ResourceGrpID, try OpMaster lookup
                 if not labor_dtl.get('ResourceGrpID'):
                     op_code_val = op_code or labor_dtl.get('OpCode', '')
-                    print(f"[start_activity] Still no ResourceGrpID - trying OpMaster lookup for OpCode={op_code_val}", file=sys.stderr, flush=True)
+                    logger.debug("[start_activity] Still no ResourceGrpID - trying OpMaster lookup for OpCode=%s", op_code_val)
                     if op_code_val:
                         lookup_resp = api_get(f"Erp.BO.OpMasterSvc/OpMasters?$filter=OpCode eq '{op_code_val}'&$top=1")
                         if lookup_resp.ok:
                             op_masters = lookup_resp.json().get('value', [])
                             if op_masters and op_masters[0].get('ResourceGrpID'):
                                 labor_dtl['ResourceGrpID'] = op_masters[0]['ResourceGrpID']
-                                print(f"[start_activity] Found ResourceGrpID from OpMaster: {op_masters[0]['ResourceGrpID']}", file=sys.stderr, flush=True)
+                                logger.debug("[start_activity] Found ResourceGrpID from OpMaster: %s", op_masters[0]['ResourceGrpID'])
 
                 # Get JcDept from ResourceGroup if we found a ResourceGrpID
                 if labor_dtl.get('ResourceGrpID') and not default_jc_dept and not jc_dept:
@@ -192,7 +232,7 @@ def start_activity(emp_id, job_num, asm_seq, opr_seq, resource_grp_id='', resour
                         rgs = rg_resp.json().get('value', [])
                         if rgs and rgs[0].get('JCDept'):
                             labor_dtl['JCDept'] = rgs[0]['JCDept']
-                            print(f"[start_activity] Found JcDept from ResourceGroup: {rgs[0]['JCDept']}", file=sys.stderr, flush=True)
+                            logger.debug("[start_activity] Found JcDept from ResourceGroup: %s", rgs[0]['JCDept'])
 
             if resource_id:
                 labor_dtl['ResourceID'] = resource_id
@@ -202,13 +242,13 @@ def start_activity(emp_id, job_num, asm_seq, opr_seq, resource_grp_id='', resour
                 labor_dtl['CapabilityID'] = capability_id
             labor_dtl['Rework'] = False
 
-            print(f"[start_activity] Final values: ResGrp={labor_dtl.get('ResourceGrpID')}, ResID={labor_dtl.get('ResourceID')}, JcDept={labor_dtl.get('JCDept')}", file=sys.stderr, flush=True)
+            logger.debug("[start_activity] Final values: ResGrp=%s, ResID=%s, JcDept=%s", labor_dtl.get('ResourceGrpID'), labor_dtl.get('ResourceID'), labor_dtl.get('JCDept'))
         
         # Step 8: Update to save
-        print(f"[start_activity] About to call Update with LaborDtl:", file=sys.stderr, flush=True)
+        logger.debug("[start_activity] About to call Update with LaborDtl:")
         if ds.get('LaborDtl'):
             for key, val in ds['LaborDtl'][0].items():
-                print(f"[start_activity]   {key}: {val}", file=sys.stderr, flush=True)
+                logger.debug("[start_activity]   %s: %s", key, val)
 
         update_resp = api_post('Erp.BO.LaborSvc/Update', {
             'ds': ds
@@ -219,7 +259,7 @@ def start_activity(emp_id, job_num, asm_seq, opr_seq, resource_grp_id='', resour
             if ds.get('LaborDtl'):
                 for dtl in ds['LaborDtl']:
                     dtl_info.append(f"Job={dtl.get('JobNum')}, Op={dtl.get('OprSeq')}, RowMod={dtl.get('RowMod')}, ResGrp={dtl.get('ResourceGrpID')}, ResID={dtl.get('ResourceID')}, JCDept={dtl.get('JCDept')}, Rework={dtl.get('Rework')}")
-            print(f"[start_activity] Update FAILED - Full response: {update_resp.text}", file=sys.stderr, flush=True)
+            logger.warning("[start_activity] Update FAILED - Full response: %s", update_resp.text)
             return {
                 'success': False,
                 'error': f"Update failed: {update_resp.status_code} - {update_resp.text[:500]}. LaborDtl: {dtl_info}"
@@ -238,6 +278,7 @@ def start_activity(emp_id, job_num, asm_seq, opr_seq, resource_grp_id='', resour
         
     except Exception as e:
         import traceback
+        logger.exception("[start_activity] Exception: %s", e)
         return {
             'success': False,
             'error': f"{str(e)}\n{traceback.format_exc()}"
@@ -257,7 +298,6 @@ def calculate_labor_hours(job_num, asm_seq, opr_seq, total_qty):
 
     Returns calculated hours, or None if cannot calculate.
     """
-    import sys
     from app.logic.queries import sql_query
 
     try:
@@ -271,16 +311,16 @@ def calculate_labor_hours(job_num, asm_seq, opr_seq, total_qty):
         """, {'job_num': job_num, 'asm_seq': asm_seq, 'opr_seq': opr_seq})
 
         if not rows:
-            print(f"[calculate_labor_hours] No JobOper found for {job_num}/{asm_seq}/{opr_seq}", file=sys.stderr, flush=True)
+            logger.warning("[calculate_labor_hours] No JobOper found for %s/%s/%s", job_num, asm_seq, opr_seq)
             return None
 
         prod_std = float(rows[0].get('ProdStandard', 0) or 0)
         std_format = (rows[0].get('StdFormat') or '').strip().upper()
 
-        print(f"[calculate_labor_hours] ProdStandard={prod_std}, StdFormat={std_format}, Qty={total_qty}", file=sys.stderr, flush=True)
+        logger.debug("[calculate_labor_hours] ProdStandard=%s, StdFormat=%s, Qty=%s", prod_std, std_format, total_qty)
 
         if prod_std == 0:
-            print(f"[calculate_labor_hours] ProdStandard is 0, returning 0 hours", file=sys.stderr, flush=True)
+            logger.debug("[calculate_labor_hours] ProdStandard is 0, returning 0 hours")
             return 0.0
 
         hours = 0.0
@@ -295,14 +335,14 @@ def calculate_labor_hours(job_num, asm_seq, opr_seq, total_qty):
         elif std_format == 'HR':  # Fixed Hours
             hours = prod_std
         else:
-            print(f"[calculate_labor_hours] Unknown StdFormat: {std_format}", file=sys.stderr, flush=True)
+            logger.warning("[calculate_labor_hours] Unknown StdFormat: %s", std_format)
             return None
 
-        print(f"[calculate_labor_hours] Calculated hours: {hours:.4f}", file=sys.stderr, flush=True)
+        logger.debug("[calculate_labor_hours] Calculated hours: %.4f", hours)
         return hours
 
     except Exception as e:
-        print(f"[calculate_labor_hours] Error: {e}", file=sys.stderr, flush=True)
+        logger.exception("[calculate_labor_hours] Error: %s", e)
         return None
 
 
@@ -324,10 +364,9 @@ def end_activity(emp_id, labor_hed_seq, labor_dtl_seq, labor_qty, scrap_qty=0, s
 
     Returns dict with success status or error message.
     """
-    import sys
     try:
-        print(f"[end_activity] Starting for LaborHedSeq={labor_hed_seq}, LaborDtlSeq={labor_dtl_seq}", file=sys.stderr, flush=True)
-        print(f"[end_activity] Qty={labor_qty}, Scrap={scrap_qty}, Complete={complete}", file=sys.stderr, flush=True)
+        logger.debug("[end_activity] Starting for LaborHedSeq=%s, LaborDtlSeq=%s", labor_hed_seq, labor_dtl_seq)
+        logger.debug("[end_activity] Qty=%s, Scrap=%s, Complete=%s", labor_qty, scrap_qty, complete)
 
         # Step 1: Get the labor dataset
         getbyid_resp = api_post('Erp.BO.LaborSvc/GetByID', {
@@ -368,9 +407,9 @@ def end_activity(emp_id, labor_hed_seq, labor_dtl_seq, labor_qty, scrap_qty=0, s
                     dtl['OpComplete'] = True
 
                 dtl['RowMod'] = 'U'
-                print(f"[end_activity] Set LaborQty={labor_qty}, ScrapQty={scrap_qty}", file=sys.stderr, flush=True)
+                logger.debug("[end_activity] Set LaborQty=%s, ScrapQty=%s", labor_qty, scrap_qty)
                 if calculated_hours is not None:
-                    print(f"[end_activity] Calculated hours from production standard: {calculated_hours:.4f}", file=sys.stderr, flush=True)
+                    logger.debug("[end_activity] Calculated hours from production standard: %.4f", calculated_hours)
                 break
 
         # Step 3: End Activity - this ends the activity but needs Update to commit
@@ -385,7 +424,7 @@ def end_activity(emp_id, labor_hed_seq, labor_dtl_seq, labor_qty, scrap_qty=0, s
             }
 
         ds = end_resp.json().get('parameters', {}).get('ds', ds)
-        print(f"[end_activity] EndActivity succeeded", file=sys.stderr, flush=True)
+        logger.debug("[end_activity] EndActivity succeeded")
 
         # Step 4: Set calculated hours BEFORE Update (EndActivity recalculates from clock time)
         if calculated_hours is not None:
@@ -394,7 +433,7 @@ def end_activity(emp_id, labor_hed_seq, labor_dtl_seq, labor_qty, scrap_qty=0, s
                     dtl['LaborHrs'] = calculated_hours
                     dtl['BurdenHrs'] = calculated_hours
                     dtl['RowMod'] = 'U'
-                    print(f"[end_activity] Before Update - setting LaborHrs={calculated_hours:.4f}", file=sys.stderr, flush=True)
+                    logger.debug("[end_activity] Before Update - setting LaborHrs=%.4f", calculated_hours)
                     break
 
         # Step 5: Update to commit
@@ -408,7 +447,7 @@ def end_activity(emp_id, labor_hed_seq, labor_dtl_seq, labor_qty, scrap_qty=0, s
                 'error': f"Update after EndActivity failed: {update_resp.status_code} - {update_resp.text[:500]}"
             }
 
-        print(f"[end_activity] Update succeeded", file=sys.stderr, flush=True)
+        logger.debug("[end_activity] Update succeeded")
 
         # Step 6: Check if hours were saved - if not, try to fix
         if calculated_hours is not None:
@@ -424,28 +463,28 @@ def end_activity(emp_id, labor_hed_seq, labor_dtl_seq, labor_qty, scrap_qty=0, s
                     if dtl.get('LaborDtlSeq') == labor_dtl_seq:
                         current_hrs = dtl.get('LaborHrs', 0)
                         time_status = dtl.get('TimeStatus', '')
-                        print(f"[end_activity] After Update - LaborHrs={current_hrs}, TimeStatus={time_status}", file=sys.stderr, flush=True)
+                        logger.debug("[end_activity] After Update - LaborHrs=%s, TimeStatus=%s", current_hrs, time_status)
 
                         # If hours are wrong, try to fix
                         if abs(float(current_hrs) - calculated_hours) > 0.001:
                             if time_status == 'E':
                                 # TimeStatus E = can update directly
-                                print(f"[end_activity] TimeStatus=E, updating directly", file=sys.stderr, flush=True)
+                                logger.debug("[end_activity] TimeStatus=E, updating directly")
                                 dtl['LaborHrs'] = calculated_hours
                                 dtl['BurdenHrs'] = calculated_hours
                                 dtl['RowMod'] = 'U'
 
                                 update2_resp = api_post('Erp.BO.LaborSvc/Update', {'ds': ds2})
                                 if update2_resp.ok:
-                                    print(f"[end_activity] Direct update succeeded", file=sys.stderr, flush=True)
+                                    logger.debug("[end_activity] Direct update succeeded")
                                 else:
-                                    print(f"[end_activity] Direct update failed: {update2_resp.text[:200]}", file=sys.stderr, flush=True)
+                                    logger.warning("[end_activity] Direct update failed: %s", update2_resp.text[:200])
 
                             elif time_status in ('S', 'A'):
                                 # Submitted or Approved - need to recall
                                 # Set RowMod on the specific record we want to recall
                                 dtl['RowMod'] = 'U'
-                                print(f"[end_activity] TimeStatus={time_status}, calling RecallFromApproval...", file=sys.stderr, flush=True)
+                                logger.debug("[end_activity] TimeStatus=%s, calling RecallFromApproval...", time_status)
 
                                 recall_resp = api_post('Erp.BO.LaborSvc/RecallFromApproval', {
                                     'ds': ds2,
@@ -453,7 +492,7 @@ def end_activity(emp_id, labor_hed_seq, labor_dtl_seq, labor_qty, scrap_qty=0, s
                                 })
 
                                 recall_result = recall_resp.json() if recall_resp.ok else {}
-                                print(f"[end_activity] Recall response: ok={recall_resp.ok}", file=sys.stderr, flush=True)
+                                logger.debug("[end_activity] Recall response: ok=%s", recall_resp.ok)
 
                                 if recall_resp.ok:
                                     ds3 = recall_result.get('parameters', {}).get('ds', ds2)
@@ -462,7 +501,7 @@ def end_activity(emp_id, labor_hed_seq, labor_dtl_seq, labor_qty, scrap_qty=0, s
                                     for dtl3 in ds3.get('LaborDtl', []):
                                         if dtl3.get('LaborDtlSeq') == labor_dtl_seq:
                                             new_status = dtl3.get('TimeStatus', '')
-                                            print(f"[end_activity] After Recall - TimeStatus={new_status}", file=sys.stderr, flush=True)
+                                            logger.debug("[end_activity] After Recall - TimeStatus=%s", new_status)
 
                                             if new_status == 'E':
                                                 # Good - we can update now
@@ -472,7 +511,7 @@ def end_activity(emp_id, labor_hed_seq, labor_dtl_seq, labor_qty, scrap_qty=0, s
 
                                                 update3_resp = api_post('Erp.BO.LaborSvc/Update', {'ds': ds3})
                                                 if update3_resp.ok:
-                                                    print(f"[end_activity] Update after Recall succeeded", file=sys.stderr, flush=True)
+                                                    logger.debug("[end_activity] Update after Recall succeeded")
                                                     # Resubmit and then Approve
                                                     ds4 = update3_resp.json().get('parameters', {}).get('ds', ds3)
 
@@ -485,16 +524,16 @@ def end_activity(emp_id, labor_hed_seq, labor_dtl_seq, labor_qty, scrap_qty=0, s
                                                     # Submit for approval (auto-approve workflow will approve it)
                                                     submit_resp = api_post('Erp.BO.LaborSvc/SubmitForApproval', {'ds': ds4, 'lWeeklyView': False})
                                                     if submit_resp.ok:
-                                                        print(f"[end_activity] SubmitForApproval succeeded", file=sys.stderr, flush=True)
+                                                        logger.debug("[end_activity] SubmitForApproval succeeded")
                                                     else:
-                                                        print(f"[end_activity] SubmitForApproval failed: {submit_resp.text[:200]}", file=sys.stderr, flush=True)
+                                                        logger.warning("[end_activity] SubmitForApproval failed: %s", submit_resp.text[:200])
                                                 else:
-                                                    print(f"[end_activity] Update after Recall failed: {update3_resp.text[:200]}", file=sys.stderr, flush=True)
+                                                    logger.warning("[end_activity] Update after Recall failed: %s", update3_resp.text[:200])
                                             else:
-                                                print(f"[end_activity] Recall didn't change TimeStatus to E", file=sys.stderr, flush=True)
+                                                logger.warning("[end_activity] Recall didn't change TimeStatus to E")
                                             break
                                 else:
-                                    print(f"[end_activity] RecallFromApproval failed: {recall_resp.text[:200]}", file=sys.stderr, flush=True)
+                                    logger.warning("[end_activity] RecallFromApproval failed: %s", recall_resp.text[:200])
                         break
 
         # Log final result
@@ -503,7 +542,7 @@ def end_activity(emp_id, labor_hed_seq, labor_dtl_seq, labor_qty, scrap_qty=0, s
             final_ds = final_resp.json().get('returnObj', {})
             for dtl in final_ds.get('LaborDtl', []):
                 if dtl.get('LaborDtlSeq') == labor_dtl_seq:
-                    print(f"[end_activity] Final - LaborQty={dtl.get('LaborQty')}, LaborHrs={dtl.get('LaborHrs')}, TimeStatus={dtl.get('TimeStatus')}", file=sys.stderr, flush=True)
+                    logger.debug("[end_activity] Final - LaborQty=%s, LaborHrs=%s, TimeStatus=%s", dtl.get('LaborQty'), dtl.get('LaborHrs'), dtl.get('TimeStatus'))
                     break
 
         return {
@@ -513,54 +552,72 @@ def end_activity(emp_id, labor_hed_seq, labor_dtl_seq, labor_qty, scrap_qty=0, s
 
     except Exception as e:
         import traceback
-        print(f"[end_activity] Exception: {e}", file=sys.stderr, flush=True)
+        logger.exception("[end_activity] Exception: %s", e)
         return {
             'success': False,
             'error': f"{str(e)}\n{traceback.format_exc()}"
         }
 
 
+# The labor screen polls /api/labor/active; successful lookups are shared per
+# employee for a few seconds. Labor start/end drop the employee's entry.
+ACTIVE_LABOR_CACHE_TTL = int(os.getenv('ACTIVE_LABOR_CACHE_TTL', '5'))
+_active_labor_cache = TTLCache(maxsize=256, ttl=ACTIVE_LABOR_CACHE_TTL)
+_active_labor_lock = threading.Lock()
+
+
+def invalidate_active_labor(emp_id):
+    """Drop an employee's cached active labor (call after labor start/end)."""
+    with _active_labor_lock:
+        _active_labor_cache.pop(emp_id, None)
+
+
 def get_active_labor(emp_id):
     """
     Get active labor records for an employee.
     
     Returns list of active labor detail records.
+    Errors return [] and are not cached.
     """
-    import sys
+    with _active_labor_lock:
+        cached_records = _active_labor_cache.get(emp_id)
+    if cached_records is not None:
+        return cached_records
+
     try:
         # Query LaborHed for active transactions (LaborDtl doesn't have EmployeeNum)
         url = f"Erp.BO.LaborSvc/Labors?$filter=EmployeeNum eq '{emp_id}' and ActiveTrans eq true&$expand=LaborDtls"
-        print(f"[get_active_labor] Querying: {url}", file=sys.stderr, flush=True)
+        logger.debug("[get_active_labor] Querying: %s", url)
         resp = api_get(url)
         
-        print(f"[get_active_labor] Response status: {resp.status_code}", file=sys.stderr, flush=True)
+        logger.debug("[get_active_labor] Response status: %s", resp.status_code)
         if not resp.ok:
-            print(f"[get_active_labor] Error response: {resp.text[:500]}", file=sys.stderr, flush=True)
+            logger.warning("[get_active_labor] Error response: %s", resp.text[:500])
             return []
         
         data = resp.json()
         labor_heds = data.get('value', [])
-        print(f"[get_active_labor] Found {len(labor_heds)} active LaborHed records", file=sys.stderr, flush=True)
+        logger.debug("[get_active_labor] Found %s active LaborHed records", len(labor_heds))
         
         # Collect all LaborDtl records from active LaborHeds
         records = []
         for hed in labor_heds:
             labor_hed_seq = hed.get('LaborHedSeq')
             dtls = hed.get('LaborDtls', [])
-            print(f"[get_active_labor]   LaborHedSeq={labor_hed_seq}, has {len(dtls)} details", file=sys.stderr, flush=True)
+            logger.debug("[get_active_labor]   LaborHedSeq=%s, has %s details", labor_hed_seq, len(dtls))
             for dtl in dtls:
                 # Only include active (not ended) details
                 if dtl.get('ActiveTrans', True):  # Include if ActiveTrans is True or not present
                     dtl['LaborHedSeq'] = labor_hed_seq  # Ensure HedSeq is on the record
                     records.append(dtl)
-                    print(f"[get_active_labor]     - Job={dtl.get('JobNum')}, Op={dtl.get('OprSeq')}, DtlSeq={dtl.get('LaborDtlSeq')}", file=sys.stderr, flush=True)
+                    logger.debug("[get_active_labor]     - Job=%s, Op=%s, DtlSeq=%s", dtl.get('JobNum'), dtl.get('OprSeq'), dtl.get('LaborDtlSeq'))
         
+        with _active_labor_lock:
+            _active_labor_cache[emp_id] = records
         return records
         
     except Exception as e:
-        print(f"[get_active_labor] Exception: {e}", file=sys.stderr, flush=True)
-        import traceback
-        traceback.print_exc()
+        logger.exception("[get_active_labor] Exception: %s", e)
         return []
 
 
@@ -581,28 +638,21 @@ def kanban_receipt(emp_id, part_num, quantity, warehouse='PROD', bin_num='PR-01'
 
     Returns dict with success status or error message.
     """
-    import traceback
-    import os
-    
-    # Use a log function that just prints (logs go to service log)
-    def log(msg):
-        print(msg, flush=True)
-    
     try:
-        log(f"[kanban_receipt] Starting: Part={part_num}, Qty={quantity}, Scrap={scrap}, ScrapReason={scrap_reason}, Emp={emp_id}")
+        logger.debug("[kanban_receipt] Starting: Part=%s, Qty=%s, Scrap=%s, ScrapReason=%s, Emp=%s", part_num, quantity, scrap, scrap_reason, emp_id)
         
         # Step 1: KanbanReceiptsGetNew - create a new KanbanReceipts row
         getnew_resp = api_post('Erp.BO.KanbanReceiptsSvc/KanbanReceiptsGetNew', {})
         
         if not getnew_resp.ok:
-            log(f"[kanban_receipt] KanbanReceiptsGetNew failed: {getnew_resp.status_code} - {getnew_resp.text[:500]}")
+            logger.warning("[kanban_receipt] KanbanReceiptsGetNew failed: %s - %s", getnew_resp.status_code, getnew_resp.text[:500])
             return {
                 'success': False,
                 'error': f"KanbanReceiptsGetNew failed: {getnew_resp.status_code} - {getnew_resp.text[:500]}"
             }
         
         result = getnew_resp.json()
-        log(f"[kanban_receipt] KanbanReceiptsGetNew response keys: {result.keys()}")
+        logger.debug("[kanban_receipt] KanbanReceiptsGetNew response keys: %s", result.keys())
         
         # Extract the dataset - could be in 'parameters' or 'returnObj'
         ds = result.get('parameters', {}).get('ds', {})
@@ -611,15 +661,15 @@ def kanban_receipt(emp_id, part_num, quantity, warehouse='PROD', bin_num='PR-01'
         if not ds:
             ds = result  # Maybe the whole response is the dataset
         
-        log(f"[kanban_receipt] Dataset keys: {ds.keys() if isinstance(ds, dict) else 'not a dict'}")
-        log(f"[kanban_receipt] KanbanReceipts records: {len(ds.get('KanbanReceipts', []))}")
+        logger.debug("[kanban_receipt] Dataset keys: %s", ds.keys() if isinstance(ds, dict) else 'not a dict')
+        logger.debug("[kanban_receipt] KanbanReceipts records: %s", len(ds.get('KanbanReceipts', [])))
         
         # Step 2: Set the part number and call ChangePart to validate/populate
         if ds.get('KanbanReceipts') and len(ds['KanbanReceipts']) > 0:
             ds['KanbanReceipts'][0]['PartNum'] = part_num
-            log(f"[kanban_receipt] Set PartNum to {part_num}")
+            logger.debug("[kanban_receipt] Set PartNum to %s", part_num)
         else:
-            log(f"[kanban_receipt] No KanbanReceipts record in dataset")
+            logger.warning("[kanban_receipt] No KanbanReceipts record in dataset")
             return {
                 'success': False,
                 'error': 'No KanbanReceipts record created by GetNew'
@@ -632,14 +682,14 @@ def kanban_receipt(emp_id, part_num, quantity, warehouse='PROD', bin_num='PR-01'
         })
         
         if not change_part_resp.ok:
-            log(f"[kanban_receipt] ChangePart failed: {change_part_resp.status_code} - {change_part_resp.text[:500]}")
+            logger.warning("[kanban_receipt] ChangePart failed: %s - %s", change_part_resp.status_code, change_part_resp.text[:500])
             return {
                 'success': False,
                 'error': f"ChangePart failed: {change_part_resp.status_code} - {change_part_resp.text[:500]}"
             }
         
         ds = change_part_resp.json().get('parameters', {}).get('ds', ds)
-        log(f"[kanban_receipt] ChangePart successful")
+        logger.debug("[kanban_receipt] ChangePart successful")
         
         # Step 3: Set quantity, warehouse, bin, employee
         if ds.get('KanbanReceipts') and len(ds['KanbanReceipts']) > 0:
@@ -651,7 +701,7 @@ def kanban_receipt(emp_id, part_num, quantity, warehouse='PROD', bin_num='PR-01'
             if scrap > 0 and scrap_reason:
                 ds['KanbanReceipts'][0]['ScrapQuantity'] = float(scrap)
                 ds['KanbanReceipts'][0]['ScrapReason'] = scrap_reason
-            log(f"[kanban_receipt] Set Qty={quantity}, Scrap={scrap}, ScrapReason={scrap_reason}, Warehouse={warehouse}, Bin={bin_num}, EmployeeID={emp_id}")
+            logger.debug("[kanban_receipt] Set Qty=%s, Scrap=%s, ScrapReason=%s, Warehouse=%s, Bin=%s, EmployeeID=%s", quantity, scrap, scrap_reason, warehouse, bin_num, emp_id)
         
         # Skip ChangeEmployee - we set EmployeeID directly
         # change_emp_resp = api_post(...)
@@ -664,9 +714,9 @@ def kanban_receipt(emp_id, part_num, quantity, warehouse='PROD', bin_num='PR-01'
         
         if change_wh_resp.ok:
             ds = change_wh_resp.json().get('parameters', {}).get('ds', ds)
-            log(f"[kanban_receipt] ChangeWarehouse successful")
+            logger.debug("[kanban_receipt] ChangeWarehouse successful")
         else:
-            log(f"[kanban_receipt] ChangeWarehouse warning: {change_wh_resp.status_code}")
+            logger.warning("[kanban_receipt] ChangeWarehouse warning: %s", change_wh_resp.status_code)
         
         # Step 6: Call ChangeBin
         change_bin_resp = api_post('Erp.BO.KanbanReceiptsSvc/ChangeBin', {
@@ -676,9 +726,9 @@ def kanban_receipt(emp_id, part_num, quantity, warehouse='PROD', bin_num='PR-01'
         
         if change_bin_resp.ok:
             ds = change_bin_resp.json().get('parameters', {}).get('ds', ds)
-            log(f"[kanban_receipt] ChangeBin successful")
+            logger.debug("[kanban_receipt] ChangeBin successful")
         else:
-            log(f"[kanban_receipt] ChangeBin warning: {change_bin_resp.status_code}")
+            logger.warning("[kanban_receipt] ChangeBin warning: %s", change_bin_resp.status_code)
         
         # Step 7: PreProcessKanbanReceipts - validates everything
         preprocess_resp = api_post('Erp.BO.KanbanReceiptsSvc/PreProcessKanbanReceipts', {
@@ -686,29 +736,29 @@ def kanban_receipt(emp_id, part_num, quantity, warehouse='PROD', bin_num='PR-01'
         })
         
         if not preprocess_resp.ok:
-            log(f"[kanban_receipt] PreProcess failed: {preprocess_resp.status_code} - {preprocess_resp.text[:500]}")
+            logger.warning("[kanban_receipt] PreProcess failed: %s - %s", preprocess_resp.status_code, preprocess_resp.text[:500])
             return {
                 'success': False,
                 'error': f"PreProcessKanbanReceipts failed: {preprocess_resp.status_code} - {preprocess_resp.text[:500]}"
             }
         
         preprocess_result = preprocess_resp.json()
-        log(f"[kanban_receipt] PreProcess response keys: {preprocess_result.keys()}")
+        logger.debug("[kanban_receipt] PreProcess response keys: %s", preprocess_result.keys())
         ds = preprocess_result.get('parameters', {}).get('ds', ds)
         if not ds:
             ds = preprocess_result.get('returnObj', ds)
-        log(f"[kanban_receipt] PreProcess successful")
+        logger.debug("[kanban_receipt] PreProcess successful")
         
         # Log the dataset state before Process
         if ds.get('KanbanReceipts') and len(ds['KanbanReceipts']) > 0:
             kr = ds['KanbanReceipts'][0]
-            log(f"[kanban_receipt] ALL fields before Process:")
+            logger.debug("[kanban_receipt] ALL fields before Process:")
             for key, val in sorted(kr.items()):
-                log(f"  {key}: {repr(val)}")
+                logger.debug("  %s: %r", key, val)
             
             # Try setting ValidateOK to True
             kr['ValidateOK'] = True
-            log(f"[kanban_receipt] Set ValidateOK = True")
+            logger.debug("[kanban_receipt] Set ValidateOK = True")
         
         # Step 8: ProcessKanbanReceipts - does everything (create job, report, close, receive)
         process_resp = api_post('Erp.BO.KanbanReceiptsSvc/ProcessKanbanReceipts', {
@@ -717,15 +767,15 @@ def kanban_receipt(emp_id, part_num, quantity, warehouse='PROD', bin_num='PR-01'
         })
         
         if not process_resp.ok:
-            log(f"[kanban_receipt] Process failed: {process_resp.status_code}")
-            log(f"[kanban_receipt] Process error response: {process_resp.text}")
+            logger.warning("[kanban_receipt] Process failed: %s", process_resp.status_code)
+            logger.warning("[kanban_receipt] Process error response: %s", process_resp.text)
             return {
                 'success': False,
                 'error': f"ProcessKanbanReceipts failed: {process_resp.status_code} - {process_resp.text[:500]}"
             }
         
         result = process_resp.json()
-        log(f"[kanban_receipt] ProcessKanbanReceipts successful: {str(result)[:500]}")
+        logger.debug("[kanban_receipt] ProcessKanbanReceipts successful: %s", str(result)[:500])
 
         # Build success message
         scrap_msg = f" (scrap: {scrap})" if scrap > 0 else ""
@@ -735,8 +785,7 @@ def kanban_receipt(emp_id, part_num, quantity, warehouse='PROD', bin_num='PR-01'
         }
         
     except Exception as e:
-        log(f"[kanban_receipt] Exception: {e}")
-        log(traceback.format_exc())
+        logger.exception("[kanban_receipt] Exception: %s", e)
         return {
             'success': False,
             'error': str(e)
@@ -756,9 +805,8 @@ def update_job_quantity(job_num, new_qty):
     
     Returns dict with success status or error message.
     """
-    import sys
     try:
-        print(f"[update_job_quantity] Updating job {job_num} to qty {new_qty}", file=sys.stderr, flush=True)
+        logger.debug("[update_job_quantity] Updating job %s to qty %s", job_num, new_qty)
         
         # Step 1: Get the job dataset via JobEntry BO
         getbyid_resp = api_post('Erp.BO.JobEntrySvc/GetByID', {
@@ -775,14 +823,14 @@ def update_job_quantity(job_num, new_qty):
         
         # Step 2: Find and update the JobProd record (Make To Stock demand link)
         job_prods = ds.get('JobProd', [])
-        print(f"[update_job_quantity] Found {len(job_prods)} JobProd records", file=sys.stderr, flush=True)
+        logger.debug("[update_job_quantity] Found %s JobProd records", len(job_prods))
         
         if not job_prods:
             # No JobProd record - this job might not have a demand link
             # Try updating JobHead.ProdQty directly as fallback
             job_heads = ds.get('JobHead', [])
             if job_heads:
-                print(f"[update_job_quantity] No JobProd, updating JobHead directly", file=sys.stderr, flush=True)
+                logger.debug("[update_job_quantity] No JobProd, updating JobHead directly")
                 job_heads[0]['ProdQty'] = float(new_qty)
                 job_heads[0]['RowMod'] = 'U'
             else:
@@ -794,7 +842,7 @@ def update_job_quantity(job_num, new_qty):
             # Update the first JobProd record (Make To Stock qty)
             job_prods[0]['MakeToStockQty'] = float(new_qty)
             job_prods[0]['RowMod'] = 'U'
-            print(f"[update_job_quantity] Set JobProd.MakeToStockQty = {new_qty}", file=sys.stderr, flush=True)
+            logger.debug("[update_job_quantity] Set JobProd.MakeToStockQty = %s", new_qty)
         
         # Step 3: Call Update to save
         update_resp = api_post('Erp.BO.JobEntrySvc/Update', {
@@ -807,7 +855,7 @@ def update_job_quantity(job_num, new_qty):
                 'error': f"Update failed: {update_resp.status_code} - {update_resp.text[:500]}"
             }
         
-        print(f"[update_job_quantity] Successfully updated job {job_num} to qty {new_qty}", file=sys.stderr, flush=True)
+        logger.debug("[update_job_quantity] Successfully updated job %s to qty %s", job_num, new_qty)
         
         return {
             'success': True,
@@ -816,8 +864,7 @@ def update_job_quantity(job_num, new_qty):
         
     except Exception as e:
         import traceback
-        print(f"[update_job_quantity] Exception: {e}", file=sys.stderr, flush=True)
-        traceback.print_exc()
+        logger.exception("[update_job_quantity] Exception: %s", e)
         return {
             'success': False,
             'error': f"{str(e)}\n{traceback.format_exc()}"
@@ -1,4 +1,77 @@
 # app/logic/queries.py
+# Version 5.4 — 2026-10-15
+# - Chunked PartQty inventory lookups (get_part_inventory) to stay under the
+#   SQL Server parameter limit on large jobs
+# - get_job_materials() returns slots-based MaterialRow dataclasses
+# - Work cell list and ops tuples precomputed at import
+# - get_conn(): multi-query helpers share one pooled connection
+# - IN-lists use expanding bind params (IN :ops / :jobs / :parts)
+# - get_bulk_materials() fetches ops/materials/inventory in one batch (sql_query_multi)
+# - Decimal->float conversion limited to NUMERIC columns from cursor.description
+# - sql_query_iter(): streamed rows for get_bulk_operations() grouping
+# - TTL cache for the workcell filter dropdown queries
+# - Backflush ownership via window function instead of correlated MAX subquery
+# - get_bulk_operations() joins pre-aggregated resource CTEs instead of OUTER APPLY
+# - get_jobs_using_*() filter a cached get_job_filter_facts() map instead of one scan each
+# - JobKey strings composed in Python rather than SQL CAST concatenation
+# - get_bulk_materials() reuses get_bulk_operations(include_backflush=True) output
+# - Sorted part/job number lists for stable parameter order
+# - get_bulk_materials() filters, attaches inventory and groups in one pass
+# - Backflush mapping built with itertools.groupby over the ordered ops
+# - Decimal conversion moved to pyodbc output converters (app.config)
+# - EXECUTOR thread pool; get_jobs_with_details() warms dropdown caches in parallel
+# - TIMING_ENABLED read from the environment (off by default); timed sections guarded
+# - text()/expanding clauses built once per SQL string (_text, _expanding caches)
+# - get_bulk_operations() groups the ordered rows with groupby()
+# - get_jobs_for_workcell(): PriorOpQty computed with LAG/ROW_NUMBER
+# - get_jobs_for_workcell(): OpOwnership owner found with a windowed MIN
+# - PartQty totals read from indexed view dbo.vw_PartQtyAgg (sql/migrations/003)
+# - get_jobs_for_workcell(): RelevantJobs CTE prunes the per-op CTEs to open jobs
+# - get_jobs_for_workcell(): SubAsmComplete aggregated from LastNonBF (no NOT EXISTS)
+# - get_jobs_for_workcell(): part on-hand joined from vw_PartQtyAgg, not OUTER APPLY
+# - JOBOPER_INDEX_HINT=1 forces IX_JobOper_Active (sql/migrations/004) on the queue scan
+# - Billet/casting/insert summaries and workcell counts cached (SUMMARY_CACHE_TTL)
+# - get_active_labor_details(): material status aggregated in the same query
+# - get_jobs_for_workcell(): rtu/jod OUTER APPLYs replaced by RtuFirst/JodFirst joins
+# - search_parts(): optional full-text search (PART_SEARCH_FTS, sql/migrations/005)
+# - get_job_materials(): materials and inventory in one query
+# - get_job_materials(): Status and QtyShort computed in SQL
+# - ROLLUP_TABLES=1 reads tq_SubAsmComplete/tq_MaterialAgg (sql/migrations/006)
+# - get_jobs_for_workcell(): PAINT/ownerless rows filtered inside OpOwnership
+# - get_last_kanban_receipts(): batched last-receipt lookup (single lookup delegates)
+# - get_jobs_for_workcell(): effective part computed once (eff.EffPart) for PartNum and poh
+# - get_jobs_for_workcell(detail=False) skips detail joins; get_queue_enrichment() fills them
+# - get_operation_last_entries(): one grouped LaborDtl aggregate instead of per-op MAX
+# - get_active_labor_details(): requested ops joined from a VALUES table, not an OR chain
+# - get_all_workcell_counts(): op list and op -> workcell map built once at import
+# - get_activity_report(): half-open ClockInDate range (sql/migrations/008 index)
+# - get_activity_report(): keyset-paged (ACTIVITY_REPORT_PAGE_SIZE), returns (rows, next_cursor)
+# - get_job_detail(): header, operations and materials fetched concurrently on EXECUTOR
+# - get_active_worker_count()/get_active_job_count(): served by sql/migrations/009 filtered index
+# - Active worker/job counts cached for LIVE_COUNT_CACHE_TTL (5s), cleared with the summaries
+# - get_activity_report() traces go to logger.debug instead of flushed stderr prints
+# - iter_activity_report(): streamed report rows; get_activity_report() collects them
+# - get_operation_last_entries(): aggregate served by sql/migrations/010 filtered index
+# - ROLLUP_TABLES=1 also reads workcell counts from tq_OpQueueCounts (sql/migrations/011)
+# - Workcell counts and RelevantJobs served by sql/migrations/012 filtered indexes
+# - get_workcell_config(): single dict lookup
+# - get_billet_summary()/get_insert_summary(): shortage and sets columns computed in SQL
+# - get_active_labor_details(): keyed by (JobNum, AssemblySeq, OprSeq) tuples
+# - get_job_detail() cached per job/asm/opr for JOB_DETAIL_CACHE_TTL (30s)
+# - search_parts() results cached per term for PART_SEARCH_CACHE_TTL (60s)
+# - get_jobs_for_workcell(stream=True) yields rows from a server-side cursor
+# - Filter facts matched case/trailing-space insensitively; cached for QUEUE_CACHE_TTL
+# - get_total_queue_count(): summed from the per-OpCode counts (get_op_queue_counts())
+# - log_timing() and cache warm-up failures go through the module logger
+# - Removed the list-returning get_activity_report(); iter_activity_report() is the one
+#   implementation (/api/reports/activity streams it)
+# - Removed get_bulk_operations()/get_bulk_materials()/sql_query_multi(): no callers
+#   since get_active_labor_details() computes material status in SQL
+# - vw_PartQtyAgg reads opt-in via PARTQTY_VIEW; inline Erp.PartQty aggregate otherwise
+# - Removed get_part_inventory()/INVENTORY_QUERY: no callers; per-part totals come
+#   from _partqty() joins
+# - Dropped get_conn() and the unused conn= params: each sql_query()/sql_query_iter()
+#   call checks out its own pooled connection
 # Version 5.3 — 2026-01-16
 # - Added detailed timing logging to identify performance bottlenecks
 # - Removed LastEntryDate from get_bulk_operations() for performance
@@ -11,19 +84,37 @@
 # CapabilityID from JobOpDtl (scheduling option)
 
 import json
+import logging
 import os
+import threading
 import time
-from sqlalchemy import text
-from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache, partial
+from cachetools import TTLCache, cached
+from cachetools.keys import hashkey
+from sqlalchemy import bindparam, text
+from sqlalchemy.sql.elements import TextClause
 from app.config import get_engine
 
-# Timing flag - set to True to enable detailed query timing
-TIMING_ENABLED = True
+logger = logging.getLogger(__name__)
 
-def log_timing(label, elapsed):
-    """Log timing if enabled."""
-    if TIMING_ENABLED:
-        print(f"[TIMING] {label}: {elapsed:.3f}s")
+# Timing flag - set TIMING_ENABLED=1 in the environment for detailed query timing.
+# Call sites check the flag first so labels and clocks cost nothing when off.
+TIMING_ENABLED = os.getenv('TIMING_ENABLED', '0') == '1'
+
+if TIMING_ENABLED:
+    def log_timing(label, elapsed):
+        """Log timing of a query section."""
+        logger.info("[TIMING] %s: %.3fs", label, elapsed)
+else:
+    def log_timing(label, elapsed):
+        """Timing disabled - no-op."""
+
+# Shared pool for running independent queries concurrently. pyodbc releases
+# the GIL while waiting on SQL Server and each task checks out its own
+# pooled connection.
+EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix='queries')
 
 # Load work cell configuration
 def load_workcells():
@@ -37,44 +128,184 @@ def load_workcells():
 
 WORKCELLS = load_workcells()
 
+# Precomputed once at import - workcells.json is not reloaded at runtime
+_WORKCELL_LIST = tuple({'id': key, 'name': val['name']} for key, val in WORKCELLS.items())
+_WORKCELL_OPS = {key: tuple(val['ops']) for key, val in WORKCELLS.items()}
+
+
+
+def _map_ops_to_workcells(workcells):
+    """Map each op code to the standard-queue workcell(s) that use it."""
+    op_to_workcell = {}
+    for wc_id, wc_config in workcells.items():
+        # Skip dashboard-type workcells (they don't have standard job queues)
+        if wc_config.get('dashboard_type'):
+            continue
+        for op in wc_config.get('ops', []):
+            op_to_workcell.setdefault(op, []).append(wc_id)
+    return op_to_workcell
+
+
+# For get_all_workcell_counts(): op -> workcell(s) and every op code to count
+_OP_TO_WORKCELL = _map_ops_to_workcells(WORKCELLS)
+_ALL_OPS = tuple(sorted(_OP_TO_WORKCELL))
+
+
+# text() scans the SQL string for :params every time it is built. Query
+# strings are module literals, so parse each distinct string once.
+@lru_cache(maxsize=256)
+def _text(query):
+    """Return the text() clause for a SQL string, built once per string."""
+    return text(query)
+
+
+@lru_cache(maxsize=256)
+def _expanding(query, *names):
+    """
+    Build a text() clause whose named params expand from a list at execute
+    time (e.g. "WHERE jo.OpCode IN :ops"), so the SQL string stays fixed.
+    Cached per (query, names) like _text().
+    """
+    return text(query).bindparams(*[bindparam(name, expanding=True) for name in names])
+
+
+def _iter_dicts(description, raw_rows):
+    """
+    Yield row dicts keyed by column name.
+    NUMERIC/DECIMAL values are already floats (pyodbc output converters
+    registered in app.config.get_engine).
+    """
+    cols = [col[0] for col in description]
+    for raw in raw_rows:
+        yield dict(zip(cols, raw))
+
+
+def _rows_to_dicts(description, raw_rows):
+    """Build a list of row dicts (see _iter_dicts)."""
+    return list(_iter_dicts(description, raw_rows))
+
+
+def sql_query(query, params=None, row_factory=None):
+    """
+    Execute SQL query and return list of dicts.
+    If row_factory is given, each row is built as row_factory(**columns) instead.
+    """
+    if not isinstance(query, TextClause):
+        query = _text(query)
+    with get_engine().connect() as conn:
+        result = conn.execute(query, params or {})
+        rows = _rows_to_dicts(result.cursor.description, result.fetchall())
+    if row_factory is not None:
+        return [row_factory(**row) for row in rows]
+    return rows
+
+
+def sql_query_iter(query, params=None):
+    """
+    Execute SQL query and yield row dicts as they arrive from the server
+    instead of materializing the whole result set with fetchall().
+    The connection stays checked out until the generator is exhausted.
+    """
+    if not isinstance(query, TextClause):
+        query = _text(query)
+    with get_engine().connect() as conn:
+        result = conn.execute(
+            query, params or {},
+            execution_options={'stream_results': True, 'max_row_buffer': 1000}
+        )
+        yield from _iter_dicts(result.cursor.description, result)
+
 
-def sql_query(query, params=None):
-    """Execute SQL query and return list of dicts with Decimal conversion."""
-    engine = get_engine()
-    with engine.connect() as conn:
-        result = conn.execute(text(query), params or {})
-        cols = result.keys()
-        rows = [dict(zip(cols, row)) for row in result.fetchall()]
-        # Convert Decimal to float
-        for row in rows:
-            for k, v in row.items():
-                if isinstance(v, Decimal):
-                    row[k] = float(v)
-        return rows
+# SQL Server caps a statement at 2100 parameters, and very long IN-lists
+# compile a fresh plan per arity. Batch the kanban receipt lookups at a fixed size.
+PART_CHUNK_SIZE = 500
+
+
+def _chunked(items, size):
+    """Yield successive slices of items with at most size entries."""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
 
 
 def get_workcells():
-    """Return list of work cells for the home page."""
-    return [
-        {'id': key, 'name': val['name']}
-        for key, val in WORKCELLS.items()
-    ]
+    """Return work cells for the home page (shared, do not mutate)."""
+    return _WORKCELL_LIST
 
 
 def get_workcell_ops(workcell_id):
-    """Get the operation codes for a work cell."""
-    if workcell_id not in WORKCELLS:
-        return []
-    return WORKCELLS[workcell_id]['ops']
+    """Get the operation codes for a work cell as a tuple."""
+    return _WORKCELL_OPS.get(workcell_id, ())
 
 
 def get_workcell_config(workcell_id):
-    """Get the full configuration for a work cell."""
-    if workcell_id not in WORKCELLS:
-        return None
-    return WORKCELLS[workcell_id]
+    """Get the full configuration for a work cell (None if unknown)."""
+    return WORKCELLS.get(workcell_id)
+
+
+# Filter dropdown lists change slowly - share them across users for
+# DROPDOWN_CACHE_TTL seconds instead of re-querying on every page load.
+DROPDOWN_CACHE_TTL = int(os.getenv('DROPDOWN_CACHE_TTL', '60'))
+_dropdown_cache = TTLCache(maxsize=128, ttl=DROPDOWN_CACHE_TTL)
+_dropdown_lock = threading.Lock()
+
+
+def invalidate_dropdown_cache():
+    """Drop cached dropdown lists (call after writes that change job data)."""
+    with _dropdown_lock:
+        _dropdown_cache.clear()
+
+
+# Filter facts pick rows out of the cached queue pages, so they expire with
+# them (same QUEUE_CACHE_TTL env var as app/routes/views.py).
+FILTER_FACTS_CACHE_TTL = int(os.getenv('QUEUE_CACHE_TTL', '15'))
+_filter_facts_cache = TTLCache(maxsize=64, ttl=FILTER_FACTS_CACHE_TTL)
+_filter_facts_lock = threading.Lock()
+
 
+def invalidate_filter_facts_cache():
+    """Drop cached queue filter facts (call after writes that change job data)."""
+    with _filter_facts_lock:
+        _filter_facts_cache.clear()
 
+
+# Dashboard summaries and home page counts are the same for every viewer;
+# hold them for SUMMARY_CACHE_TTL seconds. Cached rows are shared, so callers
+# copy them before adding fields.
+SUMMARY_CACHE_TTL = int(os.getenv('SUMMARY_CACHE_TTL', '60'))
+_summary_cache = TTLCache(maxsize=32, ttl=SUMMARY_CACHE_TTL)
+_summary_lock = threading.Lock()
+
+
+# Live active worker/job counts are polled by dashboards; a few seconds of
+# staleness lets concurrent pollers share one query.
+LIVE_COUNT_CACHE_TTL = int(os.getenv('LIVE_COUNT_CACHE_TTL', '5'))
+_live_count_cache = TTLCache(maxsize=2, ttl=LIVE_COUNT_CACHE_TTL)
+_live_count_lock = threading.Lock()
+
+
+def invalidate_summary_cache():
+    """Drop cached dashboard summaries/counts (call after labor or qty writes)."""
+    with _summary_lock:
+        _summary_cache.clear()
+    with _live_count_lock:
+        _live_count_cache.clear()
+
+
+# Job detail panels (header, operations, materials) for rows operators expand
+# again and again. JobHead.SysRevID does not move when operation quantities or
+# inventory change, so entries expire on a short TTL and writes clear them.
+JOB_DETAIL_CACHE_TTL = int(os.getenv('JOB_DETAIL_CACHE_TTL', '30'))
+_job_detail_cache = TTLCache(maxsize=512, ttl=JOB_DETAIL_CACHE_TTL)
+_job_detail_lock = threading.Lock()
+
+
+def invalidate_job_detail_cache():
+    """Drop cached job detail panels (call after labor, qty or kanban writes)."""
+    with _job_detail_lock:
+        _job_detail_cache.clear()
+
+
+@cached(_dropdown_cache, key=partial(hashkey, 'materials'), lock=_dropdown_lock)
 def get_materials_for_workcell(workcell_id):
     """
     Get all unique material part numbers for jobs in a workcell.
@@ -86,28 +317,45 @@ def get_materials_for_workcell(workcell_id):
     if not ops:
         return []
     
-    placeholders = ', '.join([f':op{i}' for i in range(len(ops))])
-    params = {f'op{i}': op for i, op in enumerate(ops)}
+    params = {'ops': ops}
     
     # This query finds materials linked to:
     # 1. The visible (quantity) operations in this workcell
     # 2. Any backflush operations that precede those quantity operations
-    query = f"""
-        WITH VisibleOps AS (
-            -- Get the visible (quantity) operations for this workcell
-            SELECT jo.Company, jo.JobNum, jo.AssemblySeq, jo.OprSeq
+    query = """
+        WITH JobOps AS (
+            -- All ops on open jobs that touch this workcell, with the previous
+            -- non-backflush OprSeq per assembly from one ordered window pass
+            SELECT jo.Company, jo.JobNum, jo.AssemblySeq, jo.OprSeq, jo.OpCode,
+                   jo.OpComplete, jo.LaborEntryMethod,
+                   MAX(CASE WHEN jo.LaborEntryMethod != 'B' THEN jo.OprSeq END) OVER (
+                       PARTITION BY jo.Company, jo.JobNum, jo.AssemblySeq
+                       ORDER BY jo.OprSeq
+                       ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+                   ) AS PrevNonBFOprSeq
             FROM Erp.JobOper jo
             INNER JOIN Erp.JobHead jh ON jo.Company = jh.Company AND jo.JobNum = jh.JobNum
             WHERE jh.JobComplete = 0
               AND jh.JobReleased = 1
-              AND jo.OpCode IN ({placeholders})
-              AND jo.OpComplete = 0
-              AND jo.LaborEntryMethod != 'B'
+              AND jo.JobNum IN (
+                  SELECT jw.JobNum FROM Erp.JobOper jw
+                  WHERE jw.OpCode IN :ops
+                    AND jw.OpComplete = 0
+                    AND jw.LaborEntryMethod != 'B'
+              )
+        ),
+        VisibleOps AS (
+            -- Get the visible (quantity) operations for this workcell
+            SELECT Company, JobNum, AssemblySeq, OprSeq, PrevNonBFOprSeq
+            FROM JobOps
+            WHERE OpCode IN :ops
+              AND OpComplete = 0
+              AND LaborEntryMethod != 'B'
         ),
         BackflushOps AS (
             -- For each visible op, find preceding backflush ops (excluding PAINT)
             SELECT jo.Company, jo.JobNum, jo.AssemblySeq, jo.OprSeq
-            FROM Erp.JobOper jo
+            FROM JobOps jo
             INNER JOIN VisibleOps vo 
                 ON jo.Company = vo.Company 
                 AND jo.JobNum = vo.JobNum 
@@ -115,14 +363,7 @@ def get_materials_for_workcell(workcell_id):
             WHERE jo.LaborEntryMethod = 'B'
               AND jo.OpCode != 'PAINT'
               AND jo.OprSeq < vo.OprSeq
-              AND jo.OprSeq > ISNULL(
-                  (SELECT MAX(jo2.OprSeq) 
-                   FROM Erp.JobOper jo2 
-                   WHERE jo2.Company = vo.Company 
-                     AND jo2.JobNum = vo.JobNum 
-                     AND jo2.AssemblySeq = vo.AssemblySeq
-                     AND jo2.OprSeq < vo.OprSeq 
-                     AND jo2.LaborEntryMethod != 'B'), 0)
+              AND jo.OprSeq > ISNULL(vo.PrevNonBFOprSeq, 0)
         ),
         AllRelevantOps AS (
             SELECT Company, JobNum, AssemblySeq, OprSeq FROM VisibleOps
@@ -143,254 +384,33 @@ def get_materials_for_workcell(workcell_id):
         ORDER BY PartDescription, jm.PartNum
     """
     
-    return sql_query(query, params)
+    return sql_query(_expanding(query, 'ops'), params)
 
 
-def get_bulk_operations(job_nums):
-    """
-    Get all operations for a list of jobs in one query.
-    Returns dict keyed by JobNum.
-    Uses ResourceTimeUsed for actual scheduled ResourceID.
-    Uses JobOpDtl for CapabilityID (scheduling option).
-    
-    For labor entry, we need ResourceGrpID and JCDept with fallback chain:
-    1. JobOpDtl.ResourceGrpID
-    2. Resource table lookup from JobOpDtl.ResourceID
-    3. Resource table lookup from ResourceTimeUsed.ResourceID
-    
-    NOTE: LastEntryDate removed for performance - LaborDtl lookup was causing
-    234K reads. Now loaded on-demand via get_operation_last_entries().
-    """
-    if not job_nums:
-        return {}
-    
-    placeholders = ', '.join([f':j{i}' for i in range(len(job_nums))])
-    params = {f'j{i}': jn for i, jn in enumerate(job_nums)}
-    
-    query = f"""
-        SELECT jo.JobNum, jo.OprSeq, jo.OpCode, jo.OpDesc, jo.QtyCompleted, 
-               CAST(jo.OpComplete AS INT) AS OpComplete, jo.ProdStandard, jo.AssemblySeq,
-               -- For LABOR ENTRY: ResourceGrpID with fallback chain
-               COALESCE(
-                   NULLIF(jod.ResourceGrpID, ''), 
-                   res_from_jod.ResourceGrpID,
-                   res_from_rtu.ResourceGrpID
-               ) AS ResourceGrpID, 
-               -- For LABOR ENTRY: ResourceID with fallback chain
-               COALESCE(
-                   NULLIF(jod.ResourceID, ''), 
-                   r.ResourceID,
-                   rtu.ResourceID
-               ) AS ResourceID,
-               -- For LABOR ENTRY: JCDept from ResourceGroup with fallback chain
-               COALESCE(
-                   rg_from_jod_grp.JCDept, 
-                   rg_from_jod_res.JCDept,
-                   rg_from_rtu.JCDept
-               ) AS JCDept,
-               -- For DISPLAY/FILTER: Scheduled resource from ResourceTimeUsed
-               rtu.ResourceID AS ScheduledResourceID,
-               jod.CapabilityID
-        FROM Erp.JobOper jo
-        LEFT JOIN Erp.JobOpDtl jod ON jo.Company = jod.Company 
-            AND jo.JobNum = jod.JobNum 
-            AND jo.AssemblySeq = jod.AssemblySeq 
-            AND jo.OprSeq = jod.OprSeq
-        -- Get ResourceGroup directly from JobOpDtl.ResourceGrpID
-        LEFT JOIN Erp.ResourceGroup rg_from_jod_grp ON jod.Company = rg_from_jod_grp.Company
-            AND jod.ResourceGrpID = rg_from_jod_grp.ResourceGrpID
-            AND jod.ResourceGrpID IS NOT NULL AND jod.ResourceGrpID != ''
-        -- Get default Resource from ResourceGroup (first location resource)
-        OUTER APPLY (
-            SELECT TOP 1 ResourceID 
-            FROM Erp.Resource 
-            WHERE ResourceGrpID = jod.ResourceGrpID 
-              AND Location = 1
-        ) r
-        -- If JobOpDtl has ResourceID but no ResourceGrpID, look up the group from Resource table
-        LEFT JOIN Erp.Resource res_from_jod ON jod.Company = res_from_jod.Company
-            AND jod.ResourceID = res_from_jod.ResourceID
-            AND (jod.ResourceGrpID IS NULL OR jod.ResourceGrpID = '')
-        LEFT JOIN Erp.ResourceGroup rg_from_jod_res ON res_from_jod.Company = rg_from_jod_res.Company
-            AND res_from_jod.ResourceGrpID = rg_from_jod_res.ResourceGrpID
-        -- Get scheduled resource from ResourceTimeUsed (for display/filtering AND as final fallback)
-        OUTER APPLY (
-            SELECT TOP 1 ResourceID
-            FROM Erp.ResourceTimeUsed 
-            WHERE Company = jo.Company 
-              AND JobNum = jo.JobNum 
-              AND AssemblySeq = jo.AssemblySeq 
-              AND OprSeq = jo.OprSeq
-        ) rtu
-        -- Fallback: Get ResourceGrpID from Resource table using ResourceTimeUsed.ResourceID
-        LEFT JOIN Erp.Resource res_from_rtu ON jo.Company = res_from_rtu.Company
-            AND rtu.ResourceID = res_from_rtu.ResourceID
-        LEFT JOIN Erp.ResourceGroup rg_from_rtu ON res_from_rtu.Company = rg_from_rtu.Company
-            AND res_from_rtu.ResourceGrpID = rg_from_rtu.ResourceGrpID
-        WHERE jo.JobNum IN ({placeholders})
-          AND jo.LaborEntryMethod != 'B'
-        ORDER BY jo.JobNum, jo.AssemblySeq DESC, jo.OprSeq ASC
-    """
-    
-    rows = sql_query(query, params)
-    
-    # Group by JobNum
-    result = {}
-    for row in rows:
-        jn = row['JobNum']
-        if jn not in result:
-            result[jn] = []
-        result[jn].append(row)
-    
-    return result
-
+def _warm_cache(fn, workcell_id):
+    """Run a cached lookup for its side effect; failures only get logged."""
+    try:
+        fn(workcell_id)
+    except Exception as e:
+        logger.warning("[WARM] %s(%s) failed: %s", fn.__name__, workcell_id, e)
 
-def get_bulk_materials(job_nums, all_operations=None):
-    """
-    Get all materials with inventory for a list of jobs.
 
-    Includes materials from preceding backflush operations up to the previous
-    non-backflush (quantity) operation. Excludes materials from PAINT operations.
-
-    Args:
-        job_nums: List of job numbers to fetch materials for
-        all_operations: Optional dict from get_bulk_operations() to avoid duplicate query
-
-    Returns dict keyed by 'JobNum-AssemblySeq-OprSeq'.
-    """
-    if not job_nums:
-        return {}
-
-    placeholders = ', '.join([f':j{i}' for i in range(len(job_nums))])
-    params = {f'j{i}': jn for i, jn in enumerate(job_nums)}
-
-    # Step 1: Get operation info for backflush mapping
-    # If we already have operations from get_bulk_operations, use that data
-    t1 = time.time()
-    if all_operations:
-        # Flatten the operations dict and add LaborEntryMethod info
-        # We need a separate lightweight query just for LaborEntryMethod since bulk_operations excludes backflush
-        ops_query = f"""
-            SELECT JobNum, AssemblySeq, OprSeq, OpCode, LaborEntryMethod
-            FROM Erp.JobOper
-            WHERE JobNum IN ({placeholders})
-            ORDER BY JobNum, AssemblySeq, OprSeq
-        """
-        all_ops = sql_query(ops_query, params)
-        log_timing(f"    4a. bulk_materials: ops query ({len(all_ops)} ops)", time.time() - t1)
-    else:
-        ops_query = f"""
-            SELECT JobNum, AssemblySeq, OprSeq, OpCode, LaborEntryMethod
-            FROM Erp.JobOper
-            WHERE JobNum IN ({placeholders})
-            ORDER BY JobNum, AssemblySeq, OprSeq
-        """
-        all_ops = sql_query(ops_query, params)
-        log_timing(f"    4a. bulk_materials: ops query ({len(all_ops)} ops)", time.time() - t1)
-
-    # Build a lookup for OpCode by (job, asm, opr) - used to filter PAINT in Python
-    op_code_lookup = {(op['JobNum'], op['AssemblySeq'], op['OprSeq']): op['OpCode'] for op in all_ops}
-
-    # Step 2: Build mapping of which operations' materials belong to which visible operation
-    op_mapping = {}  # (job, asm, opr) -> list of (job, asm, opr) whose materials to include
-
-    # Group operations by job and assembly
-    ops_by_job_asm = {}
-    for op in all_ops:
-        key = (op['JobNum'], op['AssemblySeq'])
-        if key not in ops_by_job_asm:
-            ops_by_job_asm[key] = []
-        ops_by_job_asm[key].append(op)
-
-    # For each assembly, determine material ownership
-    for (job_num, asm_seq), ops in ops_by_job_asm.items():
-        pending_backflush = []
-
-        for op in ops:
-            opr_seq = op['OprSeq']
-            is_backflush = op['LaborEntryMethod'] == 'B'
-            is_paint = op['OpCode'] == 'PAINT'
-
-            if is_backflush:
-                if not is_paint:
-                    pending_backflush.append((job_num, asm_seq, opr_seq))
-            else:
-                visible_key = (job_num, asm_seq, opr_seq)
-                op_mapping[visible_key] = pending_backflush + [visible_key]
-                pending_backflush = []
-
-    # Step 3: Get materials - REMOVED JobOper join for performance
-    # We filter PAINT operations in Python using op_code_lookup
-    t2 = time.time()
-    mtl_query = f"""
-        SELECT jm.JobNum, jm.AssemblySeq, jm.RelatedOperation AS OprSeq,
-               jm.MtlSeq, jm.PartNum, p.PartDescription, jm.RequiredQty,
-               ISNULL(jm.IUM, p.IUM) AS ReqUOM, p.IUM AS OnHandUOM
-        FROM Erp.JobMtl jm
-        LEFT JOIN Erp.Part p ON jm.Company = p.Company AND jm.PartNum = p.PartNum
-        WHERE jm.JobNum IN ({placeholders})
-          AND jm.RequiredQty > 0
-        ORDER BY jm.JobNum, jm.AssemblySeq, jm.RelatedOperation, jm.MtlSeq
-    """
-
-    materials_raw = sql_query(mtl_query, params)
-
-    # Filter out PAINT operations in Python (much faster than SQL join)
-    materials = []
-    for m in materials_raw:
-        op_key = (m['JobNum'], m['AssemblySeq'], m['OprSeq'])
-        op_code = op_code_lookup.get(op_key, '')
-        if op_code != 'PAINT':
-            m['SourceOpCode'] = op_code
-            materials.append(m)
-
-    log_timing(f"    4b. bulk_materials: materials query ({len(materials_raw)} raw, {len(materials)} filtered)", time.time() - t2)
-
-    if not materials:
-        return {}
-    
-    # Step 4: Get unique part numbers and batch lookup inventory
-    t3 = time.time()
-    part_nums = list(set(m['PartNum'] for m in materials))
-
-    inv_placeholders = ', '.join([f':p{i}' for i in range(len(part_nums))])
-    inv_params = {f'p{i}': pn for i, pn in enumerate(part_nums)}
-
-    inv_query = f"""
-        SELECT PartNum, SUM(OnHandQty) AS OnHandQty, SUM(DemandQty) AS DemandQty
-        FROM Erp.PartQty
-        WHERE PartNum IN ({inv_placeholders})
-        GROUP BY PartNum
-    """
-
-    inv_data = sql_query(inv_query, inv_params)
-    inv_map = {row['PartNum']: row for row in inv_data}
-    log_timing(f"    4c. bulk_materials: inventory query ({len(part_nums)} parts)", time.time() - t3)
-    
-    # Step 5: Group materials by their source operation
-    mtl_by_source = {}
-    for m in materials:
-        inv = inv_map.get(m['PartNum'], {})
-        m['OnHandQty'] = inv.get('OnHandQty', 0) or 0
-        m['DemandQty'] = inv.get('DemandQty', 0) or 0
-        
-        source_key = (m['JobNum'], m['AssemblySeq'], m['OprSeq'])
-        if source_key not in mtl_by_source:
-            mtl_by_source[source_key] = []
-        mtl_by_source[source_key].append(m)
-    
-    # Step 6: Build final result - assign materials to visible operations
-    result = {}
-    for visible_key, source_ops in op_mapping.items():
-        job_num, asm_seq, opr_seq = visible_key
-        result_key = f"{job_num}-{asm_seq}-{opr_seq}"
-        result[result_key] = []
-        
-        for source_op in source_ops:
-            if source_op in mtl_by_source:
-                result[result_key].extend(mtl_by_source[source_op])
-    
-    return result
+def _warm_dropdowns(workcell_id):
+    """Submit the dropdown/filter lookups enabled for this workcell to EXECUTOR."""
+    config = get_workcell_config(workcell_id) or {}
+    fns = []
+    if config.get('group_by_material'):
+        fns.append(get_materials_for_workcell)
+    if config.get('group_by_color'):
+        fns.append(get_colors_for_workcell)
+    if config.get('filter_by_resource'):
+        fns.append(get_resources_for_workcell)
+    if config.get('filter_by_capability'):
+        fns.append(get_capabilities_for_workcell)
+    if fns:
+        fns.append(get_job_filter_facts)
+    for fn in fns:
+        EXECUTOR.submit(_warm_cache, fn, workcell_id)
 
 
 def get_jobs_with_details(workcell_id):
@@ -398,64 +418,92 @@ def get_jobs_with_details(workcell_id):
     Get jobs for workcell. Operations and materials loaded on-demand via API.
     MtlStatus is calculated in the main query via CTEs.
     """
-    t_total = time.time()
+    if TIMING_ENABLED:
+        t_total = time.time()
+
+    # 0. Warm the filter dropdown caches this page will request, in parallel
+    #    with the main query, so the follow-up API calls hit memory
+    _warm_dropdowns(workcell_id)
 
     # 1. Get main job list (includes MtlStatus from CTEs)
-    t1 = time.time()
     jobs = get_jobs_for_workcell(workcell_id)
-    log_timing(f"  1. get_jobs_for_workcell ({len(jobs)} jobs)", time.time() - t1)
+    if TIMING_ENABLED:
+        log_timing(f"  1. get_jobs_for_workcell ({len(jobs)} jobs)", time.time() - t_total)
 
     if not jobs:
         return []
 
-    # 2. SKIP bulk operations - load on-demand via /api/job/<job>/<asm>/<opr>
-    log_timing(f"  2. bulk_operations: SKIPPED (on-demand)", 0)
-
-    # 3. SKIP bulk materials - load on-demand via /api/job/<job>/<asm>/<opr>
-    # MtlStatus is already calculated in get_jobs_for_workcell() via CTEs
-    log_timing(f"  3. bulk_materials: SKIPPED (on-demand)", 0)
-
-    # 4. Set empty JSON for on-demand loading
-    t4 = time.time()
+    # 2. Operations and materials load on-demand via /api/job/<job>/<asm>/<opr>;
+    #    MtlStatus is already calculated in get_jobs_for_workcell() via CTEs
     for job in jobs:
         job['OperationsJSON'] = '[]'  # Empty - loaded on-demand
         job['MaterialsJSON'] = '[]'   # Empty - loaded on-demand
-    log_timing(f"  4. set empty JSON", time.time() - t4)
 
-    log_timing(f"  TOTAL get_jobs_with_details", time.time() - t_total)
+    if TIMING_ENABLED:
+        log_timing(f"  TOTAL get_jobs_with_details", time.time() - t_total)
     return jobs
 
 
-def get_jobs_using_material(workcell_id, material_partnum):
+def _fact_value(value):
     """
-    Get job keys (JobNum-AssemblySeq-OprSeq) that use a specific material.
-    Used for filtering by material selection.
-    Includes materials from backflush operations (same logic as detail panel).
+    Normalize a filter value the way SQL Server's case-insensitive collation
+    compares it: case-folded, trailing spaces ignored.
+    """
+    return str(value).casefold().rstrip()
+
+
+@cached(_filter_facts_cache, key=partial(hashkey, 'facts'), lock=_filter_facts_lock)
+def get_job_filter_facts(workcell_id):
+    """
+    Get everything the queue filters match on, for all visible operations
+    in a workcell, in one query. Backs the get_jobs_using_* lookups so
+    toggling filters does not re-scan the workcell each time.
+    Material ownership follows the detail panel (preceding backflush ops).
+
+    Returns dict mapping 'JobNum-AssemblySeq-OprSeq' to a dict of sets:
+    materials, colors, resources, capabilities. Values are normalized with
+    _fact_value() so lookups match like the old SQL "=" predicates.
     """
     ops = get_workcell_ops(workcell_id)
     if not ops:
-        return []
+        return {}
     
-    placeholders = ', '.join([f':op{i}' for i in range(len(ops))])
-    params = {f'op{i}': op for i, op in enumerate(ops)}
-    params['material'] = material_partnum
+    params = {'ops': ops}
     
-    query = f"""
-        WITH VisibleOps AS (
-            -- Get the visible (quantity) operations for this workcell
-            SELECT jo.Company, jo.JobNum, jo.AssemblySeq, jo.OprSeq
+    query = """
+        WITH JobOps AS (
+            -- All ops on open jobs that touch this workcell, with the previous
+            -- non-backflush OprSeq per assembly from one ordered window pass
+            SELECT jo.Company, jo.JobNum, jo.AssemblySeq, jo.OprSeq, jo.OpCode,
+                   jo.OpComplete, jo.LaborEntryMethod, jo.SysRowID,
+                   MAX(CASE WHEN jo.LaborEntryMethod != 'B' THEN jo.OprSeq END) OVER (
+                       PARTITION BY jo.Company, jo.JobNum, jo.AssemblySeq
+                       ORDER BY jo.OprSeq
+                       ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+                   ) AS PrevNonBFOprSeq
             FROM Erp.JobOper jo
             INNER JOIN Erp.JobHead jh ON jo.Company = jh.Company AND jo.JobNum = jh.JobNum
             WHERE jh.JobComplete = 0
               AND jh.JobReleased = 1
-              AND jo.OpCode IN ({placeholders})
-              AND jo.OpComplete = 0
-              AND jo.LaborEntryMethod != 'B'
+              AND jo.JobNum IN (
+                  SELECT jw.JobNum FROM Erp.JobOper jw
+                  WHERE jw.OpCode IN :ops
+                    AND jw.OpComplete = 0
+                    AND jw.LaborEntryMethod != 'B'
+              )
+        ),
+        VisibleOps AS (
+            -- Get the visible (quantity) operations for this workcell
+            SELECT Company, JobNum, AssemblySeq, OprSeq, PrevNonBFOprSeq, SysRowID
+            FROM JobOps
+            WHERE OpCode IN :ops
+              AND OpComplete = 0
+              AND LaborEntryMethod != 'B'
         ),
         BackflushOps AS (
             -- For each visible op, find preceding backflush ops (excluding PAINT)
             SELECT jo.Company, jo.JobNum, jo.AssemblySeq, jo.OprSeq, vo.OprSeq AS OwnerOprSeq
-            FROM Erp.JobOper jo
+            FROM JobOps jo
             INNER JOIN VisibleOps vo 
                 ON jo.Company = vo.Company 
                 AND jo.JobNum = vo.JobNum 
@@ -463,14 +511,7 @@ def get_jobs_using_material(workcell_id, material_partnum):
             WHERE jo.LaborEntryMethod = 'B'
               AND jo.OpCode != 'PAINT'
               AND jo.OprSeq < vo.OprSeq
-              AND jo.OprSeq > ISNULL(
-                  (SELECT MAX(jo2.OprSeq) 
-                   FROM Erp.JobOper jo2 
-                   WHERE jo2.Company = vo.Company 
-                     AND jo2.JobNum = vo.JobNum 
-                     AND jo2.AssemblySeq = vo.AssemblySeq
-                     AND jo2.OprSeq < vo.OprSeq 
-                     AND jo2.LaborEntryMethod != 'B'), 0)
+              AND jo.OprSeq > ISNULL(vo.PrevNonBFOprSeq, 0)
         ),
         AllRelevantOps AS (
             -- Visible ops own themselves
@@ -479,22 +520,77 @@ def get_jobs_using_material(workcell_id, material_partnum):
             -- Backflush ops map to their owner
             SELECT Company, JobNum, AssemblySeq, OprSeq, OwnerOprSeq FROM BackflushOps
         )
-        SELECT DISTINCT 
-            aro.JobNum + '-' + CAST(aro.AssemblySeq AS VARCHAR) + '-' + CAST(aro.OwnerOprSeq AS VARCHAR) AS JobKey
+        SELECT 'materials' AS Fact,
+            aro.JobNum, aro.AssemblySeq, aro.OwnerOprSeq AS OprSeq,
+            jm.PartNum AS Value
         FROM Erp.JobMtl jm
         INNER JOIN AllRelevantOps aro 
             ON jm.Company = aro.Company 
             AND jm.JobNum = aro.JobNum 
             AND jm.AssemblySeq = aro.AssemblySeq
             AND jm.RelatedOperation = aro.OprSeq
-        WHERE jm.PartNum = :material
-          AND jm.RequiredQty > 0
+        WHERE jm.RequiredQty > 0
+        UNION ALL
+        SELECT 'colors',
+            vo.JobNum, vo.AssemblySeq, vo.OprSeq,
+            joud.FinishColor_c
+        FROM VisibleOps vo
+        INNER JOIN Erp.JobOper_UD joud ON vo.SysRowID = joud.ForeignSysRowID
+        WHERE joud.FinishColor_c IS NOT NULL
+          AND joud.FinishColor_c != ''
+        UNION ALL
+        SELECT 'resources',
+            vo.JobNum, vo.AssemblySeq, vo.OprSeq,
+            rtu.ResourceID
+        FROM VisibleOps vo
+        INNER JOIN Erp.ResourceTimeUsed rtu ON vo.Company = rtu.Company 
+            AND vo.JobNum = rtu.JobNum 
+            AND vo.AssemblySeq = rtu.AssemblySeq 
+            AND vo.OprSeq = rtu.OprSeq
+        WHERE rtu.ResourceID IS NOT NULL
+          AND rtu.ResourceID != ''
+        UNION ALL
+        SELECT 'capabilities',
+            vo.JobNum, vo.AssemblySeq, vo.OprSeq,
+            jod.CapabilityID
+        FROM VisibleOps vo
+        INNER JOIN Erp.JobOpDtl jod ON vo.Company = jod.Company 
+            AND vo.JobNum = jod.JobNum 
+            AND vo.AssemblySeq = jod.AssemblySeq 
+            AND vo.OprSeq = jod.OprSeq
+        WHERE jod.CapabilityID IS NOT NULL
+          AND jod.CapabilityID != ''
     """
     
-    result = sql_query(query, params)
-    return [row['JobKey'] for row in result]
+    facts = {}
+    for row in sql_query(_expanding(query, 'ops'), params):
+        job_key = f"{row['JobNum']}-{row['AssemblySeq']}-{row['OprSeq']}"
+        job_facts = facts.get(job_key)
+        if job_facts is None:
+            job_facts = facts[job_key] = {
+                'materials': set(), 'colors': set(), 'resources': set(), 'capabilities': set()
+            }
+        job_facts[row['Fact']].add(_fact_value(row['Value']))
+    return facts
+
+
+def _jobs_with_fact(workcell_id, fact, value):
+    """Job keys in a workcell whose filter facts include value."""
+    facts = get_job_filter_facts(workcell_id)
+    value = _fact_value(value)
+    return [key for key, job_facts in facts.items() if value in job_facts[fact]]
+
 
+def get_jobs_using_material(workcell_id, material_partnum):
+    """
+    Get job keys (JobNum-AssemblySeq-OprSeq) that use a specific material.
+    Used for filtering by material selection.
+    Includes materials from backflush operations (same logic as detail panel).
+    """
+    return _jobs_with_fact(workcell_id, 'materials', material_partnum)
 
+
+@cached(_dropdown_cache, key=partial(hashkey, 'colors'), lock=_dropdown_lock)
 def get_colors_for_workcell(workcell_id):
     """
     Get all unique finish colors for jobs in a workcell.
@@ -505,17 +601,16 @@ def get_colors_for_workcell(workcell_id):
     if not ops:
         return []
     
-    placeholders = ', '.join([f':op{i}' for i in range(len(ops))])
-    params = {f'op{i}': op for i, op in enumerate(ops)}
+    params = {'ops': ops}
     
-    query = f"""
+    query = """
         SELECT DISTINCT joud.FinishColor_c AS FinishColor
         FROM Erp.JobOper jo
         INNER JOIN Erp.JobHead jh ON jo.Company = jh.Company AND jo.JobNum = jh.JobNum
         LEFT JOIN Erp.JobOper_UD joud ON jo.SysRowID = joud.ForeignSysRowID
         WHERE jh.JobComplete = 0
           AND jh.JobReleased = 1
-          AND jo.OpCode IN ({placeholders})
+          AND jo.OpCode IN :ops
           AND jo.OpComplete = 0
           AND jo.LaborEntryMethod != 'B'
           AND joud.FinishColor_c IS NOT NULL
@@ -523,7 +618,7 @@ def get_colors_for_workcell(workcell_id):
         ORDER BY joud.FinishColor_c
     """
     
-    return sql_query(query, params)
+    return sql_query(_expanding(query, 'ops'), params)
 
 
 def get_jobs_using_color(workcell_id, color):
@@ -531,32 +626,10 @@ def get_jobs_using_color(workcell_id, color):
     Get job keys (JobNum-AssemblySeq-OprSeq) that have a specific finish color.
     Used for filtering by color selection.
     """
-    ops = get_workcell_ops(workcell_id)
-    if not ops:
-        return []
-    
-    placeholders = ', '.join([f':op{i}' for i in range(len(ops))])
-    params = {f'op{i}': op for i, op in enumerate(ops)}
-    params['color'] = color
-    
-    query = f"""
-        SELECT DISTINCT 
-            jo.JobNum + '-' + CAST(jo.AssemblySeq AS VARCHAR) + '-' + CAST(jo.OprSeq AS VARCHAR) AS JobKey
-        FROM Erp.JobOper jo
-        INNER JOIN Erp.JobHead jh ON jo.Company = jh.Company AND jo.JobNum = jh.JobNum
-        LEFT JOIN Erp.JobOper_UD joud ON jo.SysRowID = joud.ForeignSysRowID
-        WHERE jh.JobComplete = 0
-          AND jh.JobReleased = 1
-          AND jo.OpCode IN ({placeholders})
-          AND jo.OpComplete = 0
-          AND jo.LaborEntryMethod != 'B'
-          AND joud.FinishColor_c = :color
-    """
-    
-    result = sql_query(query, params)
-    return [row['JobKey'] for row in result]
+    return _jobs_with_fact(workcell_id, 'colors', color)
 
 
+@cached(_dropdown_cache, key=partial(hashkey, 'resources'), lock=_dropdown_lock)
 def get_resources_for_workcell(workcell_id):
     """
     Get all unique ResourceIDs for jobs in a workcell.
@@ -568,10 +641,9 @@ def get_resources_for_workcell(workcell_id):
     if not ops:
         return []
     
-    placeholders = ', '.join([f':op{i}' for i in range(len(ops))])
-    params = {f'op{i}': op for i, op in enumerate(ops)}
+    params = {'ops': ops}
     
-    query = f"""
+    query = """
         SELECT DISTINCT rtu.ResourceID
         FROM Erp.JobOper jo
         INNER JOIN Erp.JobHead jh ON jo.Company = jh.Company AND jo.JobNum = jh.JobNum
@@ -581,7 +653,7 @@ def get_resources_for_workcell(workcell_id):
             AND jo.OprSeq = rtu.OprSeq
         WHERE jh.JobComplete = 0
           AND jh.JobReleased = 1
-          AND jo.OpCode IN ({placeholders})
+          AND jo.OpCode IN :ops
           AND jo.OpComplete = 0
           AND jo.LaborEntryMethod != 'B'
           AND rtu.ResourceID IS NOT NULL
@@ -589,9 +661,10 @@ def get_resources_for_workcell(workcell_id):
         ORDER BY rtu.ResourceID
     """
     
-    return sql_query(query, params)
+    return sql_query(_expanding(query, 'ops'), params)
 
 
+@cached(_dropdown_cache, key=partial(hashkey, 'capabilities'), lock=_dropdown_lock)
 def get_capabilities_for_workcell(workcell_id):
     """
     Get all unique CapabilityIDs for jobs in a workcell.
@@ -602,10 +675,9 @@ def get_capabilities_for_workcell(workcell_id):
     if not ops:
         return []
     
-    placeholders = ', '.join([f':op{i}' for i in range(len(ops))])
-    params = {f'op{i}': op for i, op in enumerate(ops)}
+    params = {'ops': ops}
     
-    query = f"""
+    query = """
         SELECT DISTINCT jod.CapabilityID
         FROM Erp.JobOper jo
         INNER JOIN Erp.JobHead jh ON jo.Company = jh.Company AND jo.JobNum = jh.JobNum
@@ -615,7 +687,7 @@ def get_capabilities_for_workcell(workcell_id):
             AND jo.OprSeq = jod.OprSeq
         WHERE jh.JobComplete = 0
           AND jh.JobReleased = 1
-          AND jo.OpCode IN ({placeholders})
+          AND jo.OpCode IN :ops
           AND jo.OpComplete = 0
           AND jo.LaborEntryMethod != 'B'
           AND jod.CapabilityID IS NOT NULL
@@ -623,7 +695,7 @@ def get_capabilities_for_workcell(workcell_id):
         ORDER BY jod.CapabilityID
     """
     
-    return sql_query(query, params)
+    return sql_query(_expanding(query, 'ops'), params)
 
 
 def get_jobs_using_resource(workcell_id, resource_id):
@@ -632,33 +704,7 @@ def get_jobs_using_resource(workcell_id, resource_id):
     Uses ResourceTimeUsed for actual scheduled resources.
     Used for filtering by resource selection.
     """
-    ops = get_workcell_ops(workcell_id)
-    if not ops:
-        return []
-    
-    placeholders = ', '.join([f':op{i}' for i in range(len(ops))])
-    params = {f'op{i}': op for i, op in enumerate(ops)}
-    params['resource'] = resource_id
-    
-    query = f"""
-        SELECT DISTINCT 
-            jo.JobNum + '-' + CAST(jo.AssemblySeq AS VARCHAR) + '-' + CAST(jo.OprSeq AS VARCHAR) AS JobKey
-        FROM Erp.JobOper jo
-        INNER JOIN Erp.JobHead jh ON jo.Company = jh.Company AND jo.JobNum = jh.JobNum
-        INNER JOIN Erp.ResourceTimeUsed rtu ON jo.Company = rtu.Company 
-            AND jo.JobNum = rtu.JobNum 
-            AND jo.AssemblySeq = rtu.AssemblySeq 
-            AND jo.OprSeq = rtu.OprSeq
-        WHERE jh.JobComplete = 0
-          AND jh.JobReleased = 1
-          AND jo.OpCode IN ({placeholders})
-          AND jo.OpComplete = 0
-          AND jo.LaborEntryMethod != 'B'
-          AND rtu.ResourceID = :resource
-    """
-    
-    result = sql_query(query, params)
-    return [row['JobKey'] for row in result]
+    return _jobs_with_fact(workcell_id, 'resources', resource_id)
 
 
 def get_jobs_using_capability(workcell_id, capability_id):
@@ -666,33 +712,7 @@ def get_jobs_using_capability(workcell_id, capability_id):
     Get job keys (JobNum-AssemblySeq-OprSeq) that use a specific CapabilityID.
     Used for filtering by capability selection.
     """
-    ops = get_workcell_ops(workcell_id)
-    if not ops:
-        return []
-    
-    placeholders = ', '.join([f':op{i}' for i in range(len(ops))])
-    params = {f'op{i}': op for i, op in enumerate(ops)}
-    params['capability'] = capability_id
-    
-    query = f"""
-        SELECT DISTINCT 
-            jo.JobNum + '-' + CAST(jo.AssemblySeq AS VARCHAR) + '-' + CAST(jo.OprSeq AS VARCHAR) AS JobKey
-        FROM Erp.JobOper jo
-        INNER JOIN Erp.JobHead jh ON jo.Company = jh.Company AND jo.JobNum = jh.JobNum
-        LEFT JOIN Erp.JobOpDtl jod ON jo.Company = jod.Company 
-            AND jo.JobNum = jod.JobNum 
-            AND jo.AssemblySeq = jod.AssemblySeq 
-            AND jo.OprSeq = jod.OprSeq
-        WHERE jh.JobComplete = 0
-          AND jh.JobReleased = 1
-          AND jo.OpCode IN ({placeholders})
-          AND jo.OpComplete = 0
-          AND jo.LaborEntryMethod != 'B'
-          AND jod.CapabilityID = :capability
-    """
-    
-    result = sql_query(query, params)
-    return [row['JobKey'] for row in result]
+    return _jobs_with_fact(workcell_id, 'capabilities', capability_id)
 
 
 def get_last_checkin(part_num, op_code=None):
@@ -745,10 +765,119 @@ def get_last_checkin(part_num, op_code=None):
     return result[0] if result else None
 
 
-def get_jobs_for_workcell(workcell_id):
+# Force the outer JobOper scan in get_jobs_for_workcell() onto the filtered
+# IX_JobOper_Active (sql/migrations/004). Off by default: the hint is a hard
+# error on a database where the index hasn't been created.
+JOBOPER_INDEX_HINT = os.getenv('JOBOPER_INDEX_HINT', '0') == '1'
+_JOBOPER_ACTIVE_HINT = 'WITH (INDEX(IX_JobOper_Active))' if JOBOPER_INDEX_HINT else ''
+
+# Read sub-assembly readiness and material status from the roll-up tables kept
+# by dbo.sp_refresh_tq_rollups (sql/migrations/006) instead of computing the
+# SubAsmComplete/MaterialAgg CTEs per request. Off by default: the tables are
+# only as fresh as the last scheduled refresh.
+ROLLUP_TABLES = os.getenv('ROLLUP_TABLES', '0') == '1'
+_SUBASM_SOURCE = 'dbo.tq_SubAsmComplete' if ROLLUP_TABLES else 'SubAsmComplete'
+_MATERIAL_AGG_SOURCE = 'dbo.tq_MaterialAgg' if ROLLUP_TABLES else 'MaterialAgg'
+
+# Read PartQty totals per Company/PartNum from the indexed view
+# dbo.vw_PartQtyAgg (sql/migrations/003) instead of aggregating Erp.PartQty in
+# each query. Off by default: the view has to exist first, and its
+# SCHEMABINDING blocks Epicor upgrade scripts from altering Erp.PartQty.
+PARTQTY_VIEW = os.getenv('PARTQTY_VIEW', '0') == '1'
+if PARTQTY_VIEW:
+    _PARTQTY_SOURCE = 'dbo.vw_PartQtyAgg {alias} WITH (NOEXPAND)'
+else:
+    _PARTQTY_SOURCE = """(
+            SELECT Company, PartNum,
+                   SUM(ISNULL(OnHandQty, 0)) AS OnHandQty,
+                   SUM(ISNULL(DemandQty, 0)) AS DemandQty
+            FROM Erp.PartQty
+            GROUP BY Company, PartNum
+        ) {alias}"""
+
+
+def _partqty(alias):
+    """FROM/JOIN source of per-Company/PartNum OnHandQty and DemandQty totals."""
+    return _PARTQTY_SOURCE.format(alias=alias)
+
+
+# Detail-only parts of the queue query, shared by get_jobs_for_workcell() and
+# get_queue_enrichment(). The joins expect jo, jh, ja and eff in scope and the
+# RtuFirst/JodFirst CTEs below.
+_QUEUE_RESOURCE_CTES = """        -- Scheduled resource and capability per op, aggregated once for the
+        -- relevant jobs and joined (was a TOP 1 OUTER APPLY seek per row).
+        -- MIN() keeps the pick deterministic.
+        RtuFirst AS (
+            SELECT rtu.Company, rtu.JobNum, rtu.AssemblySeq, rtu.OprSeq,
+                   MIN(rtu.ResourceID) AS ResourceID
+            FROM Erp.ResourceTimeUsed rtu
+            INNER JOIN RelevantJobs rj ON rtu.Company = rj.Company AND rtu.JobNum = rj.JobNum
+            GROUP BY rtu.Company, rtu.JobNum, rtu.AssemblySeq, rtu.OprSeq
+        ),
+        JodFirst AS (
+            SELECT jod.Company, jod.JobNum, jod.AssemblySeq, jod.OprSeq,
+                   MIN(jod.CapabilityID) AS CapabilityID
+            FROM Erp.JobOpDtl jod
+            INNER JOIN RelevantJobs rj ON jod.Company = rj.Company AND jod.JobNum = rj.JobNum
+            GROUP BY jod.Company, jod.JobNum, jod.AssemblySeq, jod.OprSeq
+        )"""
+
+_QUEUE_DETAIL_COLUMNS = """
+            joud.FinalLocation_c AS NextLocation,
+            joud.Finish_c AS Material,
+            joud.FinishColor_c AS FinishColor,
+            joud.PrepTime_c AS PrepTime,
+            joud.MachineLoadTime_c AS MachLoad,
+            joud.MachineRunTime_c AS MachRun,
+            joud.MachineUnloadTime_c AS MachUnload,
+            joud.MachProgramNum_c AS MachProgram,
+            xfr.XFileName AS PdfPath,
+            -- Resource from ResourceTimeUsed (actual scheduled resource)
+            rtu.ResourceID,
+            -- Capability from JobOpDtl (scheduling option)
+            jod.CapabilityID,
+            -- Part on-hand quantity
+            ISNULL(poh.OnHandQty, 0) AS PartOnHand"""
+
+_QUEUE_DETAIL_JOINS = f"""
+        LEFT JOIN Erp.JobOper_UD joud
+            ON jo.SysRowID = joud.ForeignSysRowID
+        -- Get actual scheduled resource from ResourceTimeUsed
+        LEFT JOIN RtuFirst rtu
+            ON jo.Company = rtu.Company
+            AND jo.JobNum = rtu.JobNum
+            AND jo.AssemblySeq = rtu.AssemblySeq
+            AND jo.OprSeq = rtu.OprSeq
+        -- Get CapabilityID from JobOpDtl (scheduling option)
+        LEFT JOIN JodFirst jod
+            ON jo.Company = jod.Company
+            AND jo.JobNum = jod.JobNum
+            AND jo.AssemblySeq = jod.AssemblySeq
+            AND jo.OprSeq = jod.OprSeq
+        LEFT JOIN Ice.XFileAttch xfa
+            ON ja.Company = xfa.Company
+            AND ja.PartNum = xfa.Key1
+            AND ja.RevisionNum = xfa.Key2
+            AND xfa.RelatedToFile = 'PartRev'
+        LEFT JOIN Ice.XFileRef xfr
+            ON xfa.Company = xfr.Company
+            AND xfa.XFileRefNum = xfr.XFileRefNum
+        -- On-hand qty for the effective part
+        LEFT JOIN {_partqty('poh')}
+            ON poh.Company = jh.Company AND poh.PartNum = eff.EffPart"""
+
+
+def get_jobs_for_workcell(workcell_id, detail=True, stream=False):
     """
     Get jobs ready for a specific work cell.
     
+    With detail=False the JobOper_UD fields, PdfPath, ResourceID,
+    CapabilityID and PartOnHand are left out (and their joins skipped);
+    fetch them later with get_queue_enrichment() if needed.
+    
+    With stream=True the rows are yielded as SQL Server returns them
+    (sql_query_iter) instead of returned as a list.
+    
     Filtering rules:
     1. Job not complete, released
     2. Operation uses work cell's op codes, not complete, not backflush
@@ -763,96 +892,104 @@ def get_jobs_for_workcell(workcell_id):
     """
     ops = get_workcell_ops(workcell_id)
     if not ops:
-        return []
+        return iter(()) if stream else []
     
     # Build the IN clause for op codes
-    placeholders = ', '.join([f':op{i}' for i in range(len(ops))])
-    params = {f'op{i}': op for i, op in enumerate(ops)}
+    params = {'ops': ops}
+    detail_columns = ',' + _QUEUE_DETAIL_COLUMNS if detail else ''
+    detail_joins = _QUEUE_DETAIL_JOINS if detail else ''
     
     query = f"""
-        WITH PriorOpQty AS (
+        WITH RelevantJobs AS (
+            -- Open, released jobs with an open op in this workcell; every CTE
+            -- below only looks at these jobs instead of all of Erp.JobOper
+            SELECT DISTINCT jh.Company, jh.JobNum
+            FROM Erp.JobHead jh
+            INNER JOIN Erp.JobOper jo
+                ON jh.Company = jo.Company AND jh.JobNum = jo.JobNum
+            WHERE jh.JobComplete = 0
+              AND jh.JobReleased = 1
+              AND jo.OpCode IN :ops
+              AND jo.OpComplete = 0
+              AND jo.LaborEntryMethod != 'B'
+        ),
+        PriorOpQty AS (
+            -- One ordered pass per assembly over non-backflush ops: LAG gives the
+            -- prior op's qty, ROW_NUMBER = 1 marks the first op
             SELECT 
                 jo.Company,
                 jo.JobNum,
                 jo.AssemblySeq,
                 jo.OprSeq,
-                -- Get qty completed from prior non-backflush operation (within same assembly)
                 ISNULL(
-                    (SELECT TOP 1 jo_prior.QtyCompleted
-                     FROM Erp.JobOper jo_prior
-                     WHERE jo_prior.Company = jo.Company
-                       AND jo_prior.JobNum = jo.JobNum
-                       AND jo_prior.AssemblySeq = jo.AssemblySeq
-                       AND jo_prior.OprSeq < jo.OprSeq
-                       AND jo_prior.LaborEntryMethod != 'B'
-                     ORDER BY jo_prior.OprSeq DESC),
+                    LAG(jo.QtyCompleted) OVER (
+                        PARTITION BY jo.Company, jo.JobNum, jo.AssemblySeq
+                        ORDER BY jo.OprSeq
+                    ),
                     0
                 ) AS QtyFromPrior,
-                -- Is this the first non-backflush operation on this assembly?
-                CASE WHEN NOT EXISTS (
-                    SELECT 1 FROM Erp.JobOper jo_prior
-                    WHERE jo_prior.Company = jo.Company
-                      AND jo_prior.JobNum = jo.JobNum
-                      AND jo_prior.AssemblySeq = jo.AssemblySeq
-                      AND jo_prior.OprSeq < jo.OprSeq
-                      AND jo_prior.LaborEntryMethod != 'B'
-                ) THEN 1 ELSE 0 END AS IsFirstOp
+                CASE WHEN ROW_NUMBER() OVER (
+                    PARTITION BY jo.Company, jo.JobNum, jo.AssemblySeq
+                    ORDER BY jo.OprSeq
+                ) = 1 THEN 1 ELSE 0 END AS IsFirstOp
             FROM Erp.JobOper jo
+            INNER JOIN RelevantJobs rj ON jo.Company = rj.Company AND jo.JobNum = rj.JobNum
             WHERE jo.LaborEntryMethod != 'B'
         ),
-        SubAsmComplete AS (
-            -- Check if all sub-assemblies have qty completed on their last non-backflush operation
+        LastNonBF AS (
+            -- Last non-backflush operation of each assembly (rn = 1)
             SELECT 
                 jo.Company,
                 jo.JobNum,
-                -- 1 if all sub-assembly last non-BF ops have QtyCompleted > 0, 0 otherwise
-                CASE WHEN NOT EXISTS (
-                    SELECT 1 
-                    FROM (
-                        -- Get the last non-backflush operation for each sub-assembly
-                        SELECT Company, JobNum, AssemblySeq, MAX(OprSeq) AS LastOprSeq
-                        FROM Erp.JobOper
-                        WHERE AssemblySeq > 0
-                          AND LaborEntryMethod != 'B'
-                        GROUP BY Company, JobNum, AssemblySeq
-                    ) last_ops
-                    INNER JOIN Erp.JobOper jo_last 
-                        ON last_ops.Company = jo_last.Company
-                        AND last_ops.JobNum = jo_last.JobNum
-                        AND last_ops.AssemblySeq = jo_last.AssemblySeq
-                        AND last_ops.LastOprSeq = jo_last.OprSeq
-                    WHERE last_ops.Company = jo.Company
-                      AND last_ops.JobNum = jo.JobNum
-                      AND jo_last.QtyCompleted = 0
-                ) THEN 1 ELSE 0 END AS AllSubAsmsReady
+                jo.AssemblySeq,
+                jo.QtyCompleted,
+                ROW_NUMBER() OVER (
+                    PARTITION BY jo.Company, jo.JobNum, jo.AssemblySeq
+                    ORDER BY jo.OprSeq DESC
+                ) AS rn
             FROM Erp.JobOper jo
-            GROUP BY jo.Company, jo.JobNum
+            INNER JOIN RelevantJobs rj ON jo.Company = rj.Company AND jo.JobNum = rj.JobNum
+            WHERE jo.LaborEntryMethod != 'B'
+        ),
+        SubAsmComplete AS (
+            -- 1 if every sub-assembly's last non-BF op has QtyCompleted > 0, 0 otherwise
+            SELECT 
+                Company,
+                JobNum,
+                MIN(CASE WHEN AssemblySeq > 0 AND QtyCompleted = 0 THEN 0 ELSE 1 END) AS AllSubAsmsReady
+            FROM LastNonBF
+            WHERE rn = 1
+            GROUP BY Company, JobNum
         ),
         -- Map each operation to its "owner" (the next non-backflush operation)
-        -- Backflush ops get assigned to the next quantity op; quantity ops own themselves
+        -- Backflush ops get assigned to the next quantity op; quantity ops own themselves.
+        -- The window sees every op (a PAINT qty op still owns the backflush ops
+        -- before it); PAINT rows and ops without an owner are dropped after it.
         OpOwnership AS (
-            SELECT 
-                jo.Company,
-                jo.JobNum,
-                jo.AssemblySeq,
-                jo.OprSeq,
-                jo.OpCode,
-                jo.LaborEntryMethod,
-                -- Find the next non-backflush operation (the owner)
-                CASE 
-                    WHEN jo.LaborEntryMethod != 'B' THEN jo.OprSeq  -- Qty ops own themselves
-                    ELSE (
-                        SELECT TOP 1 jo_next.OprSeq
-                        FROM Erp.JobOper jo_next
-                        WHERE jo_next.Company = jo.Company
-                          AND jo_next.JobNum = jo.JobNum
-                          AND jo_next.AssemblySeq = jo.AssemblySeq
-                          AND jo_next.OprSeq > jo.OprSeq
-                          AND jo_next.LaborEntryMethod != 'B'
-                        ORDER BY jo_next.OprSeq ASC
-                    )
-                END AS OwnerOprSeq
-            FROM Erp.JobOper jo
+            SELECT Company, JobNum, AssemblySeq, OprSeq, OpCode, LaborEntryMethod, OwnerOprSeq
+            FROM (
+                SELECT 
+                    jo.Company,
+                    jo.JobNum,
+                    jo.AssemblySeq,
+                    jo.OprSeq,
+                    jo.OpCode,
+                    jo.LaborEntryMethod,
+                    -- Find the next non-backflush operation (the owner) in one
+                    -- ordered window pass per assembly
+                    CASE 
+                        WHEN jo.LaborEntryMethod != 'B' THEN jo.OprSeq  -- Qty ops own themselves
+                        ELSE MIN(CASE WHEN jo.LaborEntryMethod != 'B' THEN jo.OprSeq END) OVER (
+                            PARTITION BY jo.Company, jo.JobNum, jo.AssemblySeq
+                            ORDER BY jo.OprSeq
+                            ROWS BETWEEN 1 FOLLOWING AND UNBOUNDED FOLLOWING
+                        )
+                    END AS OwnerOprSeq
+                FROM Erp.JobOper jo
+                INNER JOIN RelevantJobs rj ON jo.Company = rj.Company AND jo.JobNum = rj.JobNum
+            ) owned
+            WHERE OpCode != 'PAINT'  -- Exclude PAINT operation materials
+              AND OwnerOprSeq IS NOT NULL  -- Only include if there's an owner
         ),
         -- Aggregate materials by owner operation, excluding PAINT
         MaterialAgg AS (
@@ -886,21 +1023,15 @@ def get_jobs_for_workcell(workcell_id):
                 AND jm.JobNum = oo.JobNum 
                 AND jm.AssemblySeq = oo.AssemblySeq
                 AND jm.RelatedOperation = oo.OprSeq
-            LEFT JOIN (
-                SELECT Company, PartNum, 
-                       SUM(OnHandQty) AS OnHandQty,
-                       SUM(DemandQty) AS DemandQty
-                FROM Erp.PartQty
-                GROUP BY Company, PartNum
-            ) pq ON jm.Company = pq.Company AND jm.PartNum = pq.PartNum
+            LEFT JOIN {_partqty('pq')}
+                ON jm.Company = pq.Company AND jm.PartNum = pq.PartNum
             WHERE jm.RequiredQty > 0
-              AND oo.OpCode != 'PAINT'  -- Exclude PAINT operation materials
-              AND oo.OwnerOprSeq IS NOT NULL  -- Only include if there's an owner
             GROUP BY jm.Company, jm.JobNum, jm.AssemblySeq, oo.OwnerOprSeq
-        )
+        ),
+{_QUEUE_RESOURCE_CTES}
         SELECT 
             jh.JobNum,
-            CASE WHEN jo.AssemblySeq > 0 THEN ja.PartNum ELSE jh.PartNum END AS PartNum,
+            eff.EffPart AS PartNum,
             CASE WHEN jo.AssemblySeq > 0 THEN pa.PartDescription ELSE p.PartDescription END AS PartDescription,
             CASE WHEN jo.AssemblySeq > 0 THEN ja.RequiredQty ELSE jh.ProdQty END AS ProdQty,
             jh.SchedCode AS Priority,
@@ -913,14 +1044,6 @@ def get_jobs_for_workcell(workcell_id):
             jo.EstProdHours AS OpHours,
             jo.ProdStandard AS CycleTime,
             jo.CommentText AS Notes,
-            joud.FinalLocation_c AS NextLocation,
-            joud.Finish_c AS Material,
-            joud.FinishColor_c AS FinishColor,
-            joud.PrepTime_c AS PrepTime,
-            joud.MachineLoadTime_c AS MachLoad,
-            joud.MachineRunTime_c AS MachRun,
-            joud.MachineUnloadTime_c AS MachUnload,
-            joud.MachProgramNum_c AS MachProgram,
             poq.QtyFromPrior,
             poq.IsFirstOp,
             jh.ReqDueDate,
@@ -935,43 +1058,16 @@ def get_jobs_for_workcell(workcell_id):
                 WHEN ma.StarMtls = ma.TotalMtls THEN 'star'
                 ELSE 'none'
             END AS MtlStatus,
-            ISNULL(ma.TotalMtls, 0) AS TotalMtls,
-            xfr.XFileName AS PdfPath,
-            -- Resource from ResourceTimeUsed (actual scheduled resource)
-            rtu.ResourceID,
-            -- Capability from JobOpDtl (scheduling option)
-            jod.CapabilityID,
-            -- Part on-hand quantity
-            ISNULL(poh.OnHandQty, 0) AS PartOnHand
+            ISNULL(ma.TotalMtls, 0) AS TotalMtls{detail_columns}
         FROM Erp.JobHead jh
-        INNER JOIN Erp.JobOper jo 
+        INNER JOIN Erp.JobOper jo {_JOBOPER_ACTIVE_HINT}
             ON jh.Company = jo.Company AND jh.JobNum = jo.JobNum
-        LEFT JOIN Erp.JobOper_UD joud
-            ON jo.SysRowID = joud.ForeignSysRowID
-        -- Get actual scheduled resource from ResourceTimeUsed
-        OUTER APPLY (
-            SELECT TOP 1 ResourceID 
-            FROM Erp.ResourceTimeUsed 
-            WHERE Company = jo.Company 
-              AND JobNum = jo.JobNum 
-              AND AssemblySeq = jo.AssemblySeq 
-              AND OprSeq = jo.OprSeq
-        ) rtu
-        -- Get CapabilityID from JobOpDtl (scheduling option)
-        OUTER APPLY (
-            SELECT TOP 1 CapabilityID 
-            FROM Erp.JobOpDtl 
-            WHERE Company = jo.Company 
-              AND JobNum = jo.JobNum 
-              AND AssemblySeq = jo.AssemblySeq 
-              AND OprSeq = jo.OprSeq
-        ) jod
         INNER JOIN PriorOpQty poq
             ON jo.Company = poq.Company 
             AND jo.JobNum = poq.JobNum 
             AND jo.AssemblySeq = poq.AssemblySeq
             AND jo.OprSeq = poq.OprSeq
-        INNER JOIN SubAsmComplete sac
+        INNER JOIN {_SUBASM_SOURCE} sac
             ON jo.Company = sac.Company
             AND jo.JobNum = sac.JobNum
         LEFT JOIN Erp.Part p 
@@ -980,28 +1076,18 @@ def get_jobs_for_workcell(workcell_id):
             ON jo.Company = ja.Company AND jo.JobNum = ja.JobNum AND jo.AssemblySeq = ja.AssemblySeq
         LEFT JOIN Erp.Part pa
             ON ja.Company = pa.Company AND ja.PartNum = pa.PartNum
-        LEFT JOIN MaterialAgg ma
+        LEFT JOIN {_MATERIAL_AGG_SOURCE} ma
             ON jo.Company = ma.Company
             AND jo.JobNum = ma.JobNum
             AND jo.AssemblySeq = ma.AssemblySeq
             AND jo.OprSeq = ma.RelatedOperation
-        LEFT JOIN Ice.XFileAttch xfa
-            ON ja.Company = xfa.Company
-            AND ja.PartNum = xfa.Key1
-            AND ja.RevisionNum = xfa.Key2
-            AND xfa.RelatedToFile = 'PartRev'
-        LEFT JOIN Ice.XFileRef xfr
-            ON xfa.Company = xfr.Company
-            AND xfa.XFileRefNum = xfr.XFileRefNum
-        -- Get on-hand qty for the part (use JobAsmbl part for sub-assemblies, JobHead part for asm 0)
-        OUTER APPLY (
-            SELECT SUM(OnHandQty) AS OnHandQty
-            FROM Erp.PartQty
-            WHERE PartNum = CASE WHEN jo.AssemblySeq > 0 THEN ja.PartNum ELSE jh.PartNum END
-        ) poh
+        -- Effective part: JobAsmbl part for sub-assemblies, JobHead part for asm 0
+        CROSS APPLY (
+            VALUES (CASE WHEN jo.AssemblySeq > 0 THEN ja.PartNum ELSE jh.PartNum END)
+        ) eff (EffPart){detail_joins}
         WHERE jh.JobComplete = 0
           AND jh.JobReleased = 1
-          AND jo.OpCode IN ({placeholders})
+          AND jo.OpCode IN :ops
           AND jo.OpComplete = 0
           AND jo.LaborEntryMethod != 'B'
           -- Rule 3: First op on assembly OR prior op has qty completed OR SS/FF scheduling
@@ -1015,9 +1101,67 @@ def get_jobs_for_workcell(workcell_id):
             jo.OprSeq ASC
     """
     
-    return sql_query(query, params)
+    if stream:
+        return sql_query_iter(_expanding(query, 'ops'), params)
+    return sql_query(_expanding(query, 'ops'), params)
 
 
+# Keys per get_queue_enrichment() batch (3 parameters each, under the
+# 2100-parameter limit)
+ENRICHMENT_CHUNK_SIZE = 500
+
+
+def get_queue_enrichment(keys):
+    """
+    Fetch the detail columns that get_jobs_for_workcell(detail=False) leaves
+    out, for a list of (JobNum, AssemblySeq, OprSeq) keys.
+
+    Returns dict mapping 'JobNum-AssemblySeq-OprSeq' to the detail fields.
+    """
+    keys = sorted(set(keys))
+    result = {}
+    for batch in _chunked(keys, ENRICHMENT_CHUNK_SIZE):
+        params = {}
+        values = []
+        for i, (job_num, asm_seq, opr_seq) in enumerate(batch):
+            values.append(f"(:job{i}, :asm{i}, :opr{i})")
+            params[f'job{i}'] = job_num
+            params[f'asm{i}'] = asm_seq
+            params[f'opr{i}'] = opr_seq
+        
+        query = f"""
+            WITH OpKeys AS (
+                SELECT JobNum, AssemblySeq, OprSeq
+                FROM (VALUES {', '.join(values)}) v (JobNum, AssemblySeq, OprSeq)
+            ),
+            RelevantJobs AS (
+                SELECT DISTINCT jh.Company, jh.JobNum
+                FROM Erp.JobHead jh
+                WHERE jh.JobNum IN (SELECT JobNum FROM OpKeys)
+            ),
+{_QUEUE_RESOURCE_CTES}
+            SELECT jo.JobNum, jo.AssemblySeq, jo.OprSeq,{_QUEUE_DETAIL_COLUMNS}
+            FROM OpKeys k
+            INNER JOIN Erp.JobOper jo
+                ON jo.JobNum = k.JobNum
+                AND jo.AssemblySeq = k.AssemblySeq
+                AND jo.OprSeq = k.OprSeq
+            INNER JOIN Erp.JobHead jh
+                ON jh.Company = jo.Company AND jh.JobNum = jo.JobNum
+            LEFT JOIN Erp.JobAsmbl ja
+                ON jo.Company = ja.Company AND jo.JobNum = ja.JobNum AND jo.AssemblySeq = ja.AssemblySeq
+            CROSS APPLY (
+                VALUES (CASE WHEN jo.AssemblySeq > 0 THEN ja.PartNum ELSE jh.PartNum END)
+            ) eff (EffPart){_QUEUE_DETAIL_JOINS}
+        """
+        
+        for row in sql_query(query, params):
+            key = f"{row.pop('JobNum')}-{row.pop('AssemblySeq')}-{row.pop('OprSeq')}"
+            result[key] = row
+    return result
+
+
+@cached(_summary_cache, key=partial(hashkey, 'billets'), lock=_summary_lock)
 def get_billet_summary():
     """
     Get billet demand summary for the Burn dashboard.
@@ -1028,8 +1172,11 @@ def get_billet_summary():
     - LateNeed: Sum of RequiredQty where job StartDate <= today
     - FutureNeed: Sum of RequiredQty where job StartDate > today  
     - TotalDemand: Total demand from PartQty
+    - DieDemand: LateNeed + FutureNeed
+    - ShortLate/ShortFuture/Shortage: unmet die demand, on-hand applied to
+      late need first
     """
-    query = """
+    query = f"""
         WITH DieMaterials AS (
             -- Get materials from Die workcell operations
             SELECT 
@@ -1061,23 +1208,38 @@ def get_billet_summary():
         SELECT 
             ms.PartNum,
             REPLACE(p.PartDescription, ' - die billet ungrooved', '') AS PartDescription,
-            ISNULL(pq.OnHandQty, 0) AS OnHand,
+            oh.OnHand,
             ms.LateNeed,
             ms.FutureNeed,
-            ISNULL(pq.TotalDemand, 0) AS TotalDemand
+            ISNULL(pq.TotalDemand, 0) AS TotalDemand,
+            ms.LateNeed + ms.FutureNeed AS DieDemand,
+            sh.ShortLate,
+            sh.ShortFuture,
+            sh.ShortLate + sh.ShortFuture AS Shortage
         FROM MaterialSummary ms
         LEFT JOIN Erp.Part p ON ms.PartNum = p.PartNum
         LEFT JOIN (
             SELECT PartNum, SUM(OnHandQty) AS OnHandQty, SUM(DemandQty) AS TotalDemand
-            FROM Erp.PartQty
+            FROM {_partqty('pqa')}
             GROUP BY PartNum
         ) pq ON ms.PartNum = pq.PartNum
+        CROSS APPLY (SELECT ISNULL(pq.OnHandQty, 0) AS OnHand) oh
+        -- On-hand first covers late need, the remainder covers future need
+        CROSS APPLY (
+            SELECT CASE WHEN oh.OnHand > ms.LateNeed THEN oh.OnHand - ms.LateNeed ELSE 0 END AS LeftAfterLate
+        ) rem
+        CROSS APPLY (
+            SELECT CASE WHEN ms.LateNeed > oh.OnHand THEN ms.LateNeed - oh.OnHand ELSE 0 END AS ShortLate,
+                   CASE WHEN ms.FutureNeed > rem.LeftAfterLate
+                        THEN ms.FutureNeed - rem.LeftAfterLate ELSE 0 END AS ShortFuture
+        ) sh
         ORDER BY p.PartDescription, ms.PartNum
     """
     
     return sql_query(query)
 
 
+@cached(_summary_cache, key=partial(hashkey, 'castings'), lock=_summary_lock)
 def get_casting_summary(op_code):
     """
     Get casting demand summary - kanban parts with 'casting' in description.
@@ -1094,7 +1256,7 @@ def get_casting_summary(op_code):
     Returns:
         List of dicts with part demand info
     """
-    query = """
+    query = f"""
         SELECT
             p.PartNum,
             p.PartDescription,
@@ -1108,7 +1270,7 @@ def get_casting_summary(op_code):
         FROM Erp.Part p
         LEFT JOIN (
             SELECT PartNum, SUM(OnHandQty) AS OnHandQty, SUM(DemandQty) AS DemandQty
-            FROM Erp.PartQty
+            FROM {_partqty('pqa')}
             GROUP BY PartNum
         ) pq ON p.PartNum = pq.PartNum
         WHERE p.PartDescription LIKE '%casting%'
@@ -1118,13 +1280,48 @@ def get_casting_summary(op_code):
     return sql_query(query, {})
 
 
+# Kanban part search through the Erp.Part full-text index (sql/migrations/005)
+# instead of a "%term%" scan. Full-text matches word prefixes only, so this
+# is opt-in.
+PART_SEARCH_FTS = os.getenv('PART_SEARCH_FTS', '0') == '1'
+
+
+def _fts_prefix_terms(search_term):
+    """
+    Build a CONTAINS() condition that ANDs a prefix term per word,
+    e.g. 'gen 3 ins' -> '"gen*" AND "3*" AND "ins*"'. Returns None if
+    nothing searchable is left after stripping quotes.
+    """
+    words = search_term.replace('"', ' ').split()
+    if not words:
+        return None
+    return ' AND '.join(f'"{word}*"' for word in words)
+
+
+# Kanban part search runs on every (debounced) keystroke and operators re-type
+# the same prefixes; results carry OnHand, so they only live briefly.
+PART_SEARCH_CACHE_TTL = int(os.getenv('PART_SEARCH_CACHE_TTL', '60'))
+_part_search_cache = TTLCache(maxsize=256, ttl=PART_SEARCH_CACHE_TTL)
+_part_search_lock = threading.Lock()
+
+
+@cached(_part_search_cache, key=partial(hashkey, 'parts'), lock=_part_search_lock)
 def search_parts(search_term):
     """
     Search for parts by part number or description.
     Returns top 20 matches for Kanban search.
     Only returns non-obsolete, stocked parts.
+    Cached per search term for PART_SEARCH_CACHE_TTL seconds (shared, do not mutate).
     """
-    query = """
+    fts_term = _fts_prefix_terms(search_term) if PART_SEARCH_FTS else None
+    if fts_term:
+        match = """(p.PartNum LIKE :exact_pattern
+               OR CONTAINS((p.PartNum, p.PartDescription), :fts_term))"""
+    else:
+        match = """(p.PartNum LIKE :search_pattern
+               OR p.PartDescription LIKE :search_pattern)"""
+    
+    query = f"""
         SELECT TOP 20
             p.PartNum,
             p.PartDescription,
@@ -1132,11 +1329,10 @@ def search_parts(search_term):
         FROM Erp.Part p
         LEFT JOIN (
             SELECT PartNum, SUM(OnHandQty) AS OnHandQty
-            FROM Erp.PartQty
+            FROM {_partqty('pqa')}
             GROUP BY PartNum
         ) pq ON p.PartNum = pq.PartNum
-        WHERE (p.PartNum LIKE :search_pattern
-               OR p.PartDescription LIKE :search_pattern)
+        WHERE {match}
           AND p.InActive = 0
           AND p.TypeCode = 'M'
         ORDER BY 
@@ -1144,10 +1340,12 @@ def search_parts(search_term):
             p.PartNum
     """
     
-    return sql_query(query, {
-        'search_pattern': f'%{search_term}%',
-        'exact_pattern': f'{search_term}%'
-    })
+    params = {'exact_pattern': f'{search_term}%'}
+    if fts_term:
+        params['fts_term'] = fts_term
+    else:
+        params['search_pattern'] = f'%{search_term}%'
+    return sql_query(query, params)
 
 
 def get_job_operations(job_num):
@@ -1257,22 +1455,55 @@ def get_job_header(job_num):
     return result[0] if result else None
 
 
+@dataclass(slots=True)
+class MaterialRow:
+    """Material line for the job detail panel (serialized by jsonify)."""
+    MtlSeq: int
+    PartNum: str
+    PartDescription: str
+    RequiredQty: float
+    ReqUOM: str
+    OnHandUOM: str
+    OnHandQty: float = 0.0
+    DemandQty: float = 0.0
+    DemandUOM: str = ''
+    Status: str = ''
+    QtyShort: float = 0.0
+
+
 def get_job_materials(job_num, assembly_seq, opr_seq):
     """
     Get material details for a specific job operation.
-    Uses two queries for better performance - materials first, then batch inventory lookup.
+    Materials, inventory and stock status come back from one query
+    (PartQty totals joined from _partqty()).
     """
-    # First get the materials (fast)
-    mtl_query = """
+    query = f"""
         SELECT 
             jm.MtlSeq,
             jm.PartNum,
             p.PartDescription,
             jm.RequiredQty,
             ISNULL(jm.IUM, p.IUM) AS ReqUOM,
-            p.IUM AS OnHandUOM
+            p.IUM AS OnHandUOM,
+            inv.OnHandQty,
+            inv.DemandQty,
+            p.IUM AS DemandUOM,
+            CASE
+                WHEN inv.OnHandQty >= inv.DemandQty THEN 'star'
+                WHEN inv.OnHandQty >= jm.RequiredQty THEN 'check'
+                WHEN inv.OnHandQty > 0 THEN 'partial'
+                ELSE 'missing'
+            END AS Status,
+            CASE WHEN jm.RequiredQty > inv.OnHandQty
+                 THEN jm.RequiredQty - inv.OnHandQty ELSE 0 END AS QtyShort
         FROM Erp.JobMtl jm
         LEFT JOIN Erp.Part p ON jm.Company = p.Company AND jm.PartNum = p.PartNum
+        LEFT JOIN {_partqty('pq')}
+            ON jm.Company = pq.Company AND jm.PartNum = pq.PartNum
+        CROSS APPLY (
+            SELECT ISNULL(pq.OnHandQty, 0) AS OnHandQty,
+                   ISNULL(NULLIF(pq.DemandQty, 0), jm.RequiredQty) AS DemandQty
+        ) inv
         WHERE jm.JobNum = :job_num
           AND jm.AssemblySeq = :assembly_seq
           AND jm.RelatedOperation = :opr_seq
@@ -1280,57 +1511,29 @@ def get_job_materials(job_num, assembly_seq, opr_seq):
         ORDER BY jm.MtlSeq
     """
     
-    materials = sql_query(mtl_query, {
+    return sql_query(query, {
         'job_num': job_num,
         'assembly_seq': assembly_seq,
         'opr_seq': opr_seq
-    })
-    
-    if not materials:
-        return []
-    
-    # Get all unique part numbers
-    part_nums = list(set(m['PartNum'] for m in materials))
-    
-    # Batch lookup inventory for all parts at once
-    placeholders = ', '.join([f':p{i}' for i in range(len(part_nums))])
-    params = {f'p{i}': pn for i, pn in enumerate(part_nums)}
-    
-    inv_query = f"""
-        SELECT PartNum, 
-               SUM(OnHandQty) AS OnHandQty,
-               SUM(DemandQty) AS DemandQty
-        FROM Erp.PartQty
-        WHERE PartNum IN ({placeholders})
-        GROUP BY PartNum
+    }, row_factory=MaterialRow)
+
+
+@cached(_job_detail_cache, key=partial(hashkey, 'detail'), lock=_job_detail_lock)
+def get_job_detail(job_num, assembly_seq, opr_seq):
     """
-    
-    inv_data = sql_query(inv_query, params)
-    inv_map = {row['PartNum']: row for row in inv_data}
-    
-    # Merge inventory into materials and calculate status
-    for m in materials:
-        inv = inv_map.get(m['PartNum'], {})
-        on_hand = inv.get('OnHandQty', 0) or 0
-        demand = inv.get('DemandQty', 0) or m['RequiredQty']
-        required = m['RequiredQty'] or 0
-        
-        m['OnHandQty'] = on_hand
-        m['DemandQty'] = demand
-        m['DemandUOM'] = m['OnHandUOM']
-        
-        if on_hand >= demand:
-            m['Status'] = 'star'
-        elif on_hand >= required:
-            m['Status'] = 'check'
-        elif on_hand > 0:
-            m['Status'] = 'partial'
-        else:
-            m['Status'] = 'missing'
-        
-        m['QtyShort'] = max(0, required - on_hand)
-    
-    return materials
+    Job header, operations and materials for the detail panel.
+    Header and operations run on EXECUTOR while materials run here, so the
+    three independent round-trips overlap instead of queuing.
+    Cached for JOB_DETAIL_CACHE_TTL seconds (shared, do not mutate).
+    """
+    header_future = EXECUTOR.submit(get_job_header, job_num)
+    operations_future = EXECUTOR.submit(get_job_operations, job_num)
+    materials = get_job_materials(job_num, assembly_seq, opr_seq)
+    return {
+        'header': header_future.result(),
+        'operations': operations_future.result(),
+        'materials': materials
+    }
 
 
 def get_active_labor_details(job_nums_with_ops):
@@ -1341,23 +1544,42 @@ def get_active_labor_details(job_nums_with_ops):
         job_nums_with_ops: list of dicts with JobNum, AssemblySeq, OprSeq
     
     Returns:
-        dict mapping 'JobNum-AsmSeq-OprSeq' to job details including material status
+        dict mapping (JobNum, AssemblySeq, OprSeq) to job details including material status
     """
     if not job_nums_with_ops:
         return {}
     
-    # Build query to get job/part details
-    conditions = []
+    # Requested ops as a VALUES table joined to JobOper (one seek per key,
+    # instead of an OR chain the optimizer tends to scan for)
+    values = []
     params = {}
     for i, rec in enumerate(job_nums_with_ops):
-        conditions.append(f"(jh.JobNum = :job{i} AND jo.AssemblySeq = :asm{i} AND jo.OprSeq = :opr{i})")
+        values.append(f"(:job{i}, :asm{i}, :opr{i})")
         params[f'job{i}'] = rec['JobNum']
         params[f'asm{i}'] = rec['AssemblySeq']
         params[f'opr{i}'] = rec['OprSeq']
     
-    where_clause = ' OR '.join(conditions)
+    params['jobs'] = sorted({rec['JobNum'] for rec in job_nums_with_ops})
     
+    # Material status comes back with the op rows: OpOwner maps each op to the
+    # non-backflush op that owns its materials (backflush ops roll forward to
+    # the next quantity op, same as the queue's OpOwnership CTE), and the mtl APPLY
+    # counts the visible op's materials by stock status. PAINT materials are
+    # excluded.
     query = f"""
+        WITH OpOwner AS (
+            SELECT jo.Company, jo.JobNum, jo.AssemblySeq, jo.OprSeq, jo.OpCode,
+                   CASE
+                       WHEN jo.LaborEntryMethod != 'B' THEN jo.OprSeq
+                       ELSE MIN(CASE WHEN jo.LaborEntryMethod != 'B' THEN jo.OprSeq END) OVER (
+                           PARTITION BY jo.Company, jo.JobNum, jo.AssemblySeq
+                           ORDER BY jo.OprSeq
+                           ROWS BETWEEN 1 FOLLOWING AND UNBOUNDED FOLLOWING
+                       )
+                   END AS OwnerOprSeq
+            FROM Erp.JobOper jo
+            WHERE jo.JobNum IN :jobs
+        )
         SELECT jh.JobNum,
                -- Use JobAsmbl part for sub-assemblies, JobHead part for asm 0
                CASE WHEN jo.AssemblySeq > 0 THEN ja.PartNum ELSE jh.PartNum END AS PartNum,
@@ -1379,25 +1601,53 @@ def get_active_labor_details(job_nums_with_ops):
                      AND jo_prior.AssemblySeq = jo.AssemblySeq
                      AND jo_prior.OprSeq < jo.OprSeq
                      AND jo_prior.LaborEntryMethod != 'B'
-               ) THEN 1 ELSE 0 END AS IsFirstOp
-        FROM Erp.JobHead jh
+               ) THEN 1 ELSE 0 END AS IsFirstOp,
+               mtl.TotalMtls, mtl.NoneMtls, mtl.PartialMtls, mtl.CheckMtls,
+               mtl.MaxMtlQty
+        FROM (VALUES {', '.join(values)}) k (JobNum, AssemblySeq, OprSeq)
+        JOIN Erp.JobHead jh ON jh.JobNum = k.JobNum
         JOIN Erp.JobOper jo ON jh.Company = jo.Company AND jh.JobNum = jo.JobNum
+            AND jo.AssemblySeq = k.AssemblySeq AND jo.OprSeq = k.OprSeq
         LEFT JOIN Erp.Part p ON jh.Company = p.Company AND jh.PartNum = p.PartNum
         LEFT JOIN Erp.JobAsmbl ja ON jo.Company = ja.Company AND jo.JobNum = ja.JobNum AND jo.AssemblySeq = ja.AssemblySeq
         LEFT JOIN Erp.Part pa ON ja.Company = pa.Company AND ja.PartNum = pa.PartNum
-        WHERE ({where_clause})
+        CROSS APPLY (
+            SELECT CASE WHEN jo.AssemblySeq > 0 THEN ja.RequiredQty ELSE jh.ProdQty END AS ProdQty
+        ) eff
+        OUTER APPLY (
+            SELECT COUNT(*) AS TotalMtls,
+                   SUM(CASE WHEN ISNULL(pq.OnHandQty, 0) = 0 THEN 1 ELSE 0 END) AS NoneMtls,
+                   SUM(CASE WHEN ISNULL(pq.OnHandQty, 0) != 0
+                             AND ISNULL(pq.OnHandQty, 0) < jm.RequiredQty THEN 1 ELSE 0 END) AS PartialMtls,
+                   SUM(CASE WHEN ISNULL(pq.OnHandQty, 0) >= jm.RequiredQty
+                             AND ISNULL(pq.OnHandQty, 0) < ISNULL(NULLIF(pq.DemandQty, 0), jm.RequiredQty)
+                            THEN 1 ELSE 0 END) AS CheckMtls,
+                   -- Units of this op the on-hand stock covers, per material
+                   MIN(CASE WHEN eff.ProdQty > 0
+                            THEN ISNULL(pq.OnHandQty, 0) * eff.ProdQty / NULLIF(jm.RequiredQty, 0) END) AS MaxMtlQty
+            FROM OpOwner oo
+            INNER JOIN Erp.JobMtl jm
+                ON jm.Company = oo.Company
+                AND jm.JobNum = oo.JobNum
+                AND jm.AssemblySeq = oo.AssemblySeq
+                AND jm.RelatedOperation = oo.OprSeq
+            LEFT JOIN {_partqty('pq')}
+                ON pq.Company = jm.Company AND pq.PartNum = jm.PartNum
+            WHERE oo.Company = jo.Company
+              AND oo.JobNum = jo.JobNum
+              AND oo.AssemblySeq = jo.AssemblySeq
+              AND oo.OwnerOprSeq = jo.OprSeq
+              AND oo.OpCode != 'PAINT'
+              AND jm.RequiredQty > 0
+        ) mtl
     """
     
-    results = sql_query(query, params)
-    
-    # Get material info for these operations using bulk materials lookup
-    job_nums = list(set(rec['JobNum'] for rec in job_nums_with_ops))
-    all_materials = get_bulk_materials(job_nums)
+    results = sql_query(_expanding(query, 'jobs'), params)
     
     # Build map of jobkey -> details
     details_map = {}
     for row in results:
-        key = f"{row['JobNum']}-{row['AssemblySeq']}-{row['OprSeq']}"
+        key = (row['JobNum'], row['AssemblySeq'], row['OprSeq'])
         prod_qty = row['ProdQty'] or 0
         qty_completed = row['QtyCompleted'] or 0
         qty_left = prod_qty - qty_completed
@@ -1410,55 +1660,20 @@ def get_active_labor_details(job_nums_with_ops):
             qty_from_prior = row['QtyFromPrior'] or 0
             qty_available = max(0, qty_from_prior - qty_completed)
         
-        # Calculate material status and max producible qty
-        materials = all_materials.get(key, [])
-        mtl_status = 'none'
-        max_mtl_qty = None  # None means no material constraint
+        # Material status (priority: missing > partial > check > star)
+        if not row['TotalMtls']:
+            mtl_status = 'none'
+        elif row['NoneMtls']:
+            mtl_status = 'missing'
+        elif row['PartialMtls']:
+            mtl_status = 'partial'
+        elif row['CheckMtls']:
+            mtl_status = 'check'
+        else:
+            mtl_status = 'star'
         
-        if materials:
-            has_missing = False
-            has_partial = False
-            has_check = False
-            all_star = True
-            min_producible = float('inf')
-            
-            for m in materials:
-                on_hand = m.get('OnHandQty', 0) or 0
-                required = m.get('RequiredQty', 0) or 0
-                demand = m.get('DemandQty', 0) or required
-                
-                # Calculate status for this material
-                if on_hand == 0:
-                    has_missing = True
-                    all_star = False
-                elif on_hand < required:
-                    has_partial = True
-                    all_star = False
-                elif on_hand < demand:
-                    has_check = True
-                    all_star = False
-                
-                # Calculate max producible from this material
-                # max_units = on_hand / (required / prod_qty) = on_hand * prod_qty / required
-                if required > 0 and prod_qty > 0:
-                    per_unit_need = required / prod_qty
-                    if per_unit_need > 0:
-                        can_make = on_hand / per_unit_need
-                        min_producible = min(min_producible, can_make)
-            
-            # Set material status (priority: missing > partial > check > star)
-            if has_missing:
-                mtl_status = 'missing'
-            elif has_partial:
-                mtl_status = 'partial'
-            elif has_check:
-                mtl_status = 'check'
-            elif all_star:
-                mtl_status = 'star'
-            
-            # Set max producible (floor to int)
-            if min_producible != float('inf'):
-                max_mtl_qty = int(min_producible)
+        # Max producible (floor to int); None means no material constraint
+        max_mtl_qty = int(row['MaxMtlQty']) if row['MaxMtlQty'] is not None else None
         
         details_map[key] = {
             'PartNum': row['PartNum'],
@@ -1476,35 +1691,67 @@ def get_active_labor_details(job_nums_with_ops):
     return details_map
 
 
-def get_last_kanban_receipt(part_num):
-    """
-    Get the last inventory receipt for a part number.
-    Used to prevent double-entry on Kanban receipts.
-    Looks for MFG-STK transactions (manufactured to stock).
-    Gets employee from the associated LaborDtl record.
-    """
-    query = """
-        SELECT TOP 1
+# Latest MFG-STK receipt per part, ranked over the PartTran/LaborDtl join so a
+# part's row matches what a TOP 1 ... ORDER BY TranDate DESC, TranNum DESC
+# would return.
+KANBAN_RECEIPTS_QUERY = _expanding("""
+    WITH Ranked AS (
+        SELECT
+            pt.PartNum,
             pt.TranQty,
             CONVERT(VARCHAR(10), pt.TranDate, 23) AS TranDate,
             ld.EmployeeNum,
             e.Name AS EmployeeName,
             pt.TranNum,
-            pt.TranType
+            pt.TranType,
+            ROW_NUMBER() OVER (
+                PARTITION BY pt.PartNum
+                ORDER BY pt.TranDate DESC, pt.TranNum DESC
+            ) AS rn
         FROM Erp.PartTran pt
         LEFT JOIN Erp.LaborDtl ld ON pt.Company = ld.Company 
             AND pt.JobNum = ld.JobNum
             AND ld.LaborQty > 0
         LEFT JOIN Erp.EmpBasic e ON ld.Company = e.Company AND ld.EmployeeNum = e.EmpID
-        WHERE pt.PartNum = :part_num
+        WHERE pt.PartNum IN :parts
           AND pt.TranType = 'MFG-STK'
           AND pt.TranQty > 0
-        ORDER BY pt.TranDate DESC, pt.TranNum DESC
+    )
+    SELECT PartNum, TranQty, TranDate, EmployeeNum, EmployeeName, TranNum, TranType
+    FROM Ranked
+    WHERE rn = 1
+""", 'parts')
+
+
+def get_last_kanban_receipts(part_nums):
     """
-    result = sql_query(query, {'part_num': part_num})
-    return result[0] if result else None
+    Get the last inventory receipt for each of several part numbers.
+    Parts are queried in chunks of PART_CHUNK_SIZE.
+
+    Returns dict keyed by PartNum; parts with no receipt are left out.
+    """
+    part_nums = sorted(set(part_nums))
+    receipts = {}
+    for batch in _chunked(part_nums, PART_CHUNK_SIZE):
+        for row in sql_query(KANBAN_RECEIPTS_QUERY, {'parts': batch}):
+            receipts[row.pop('PartNum')] = row
+    return receipts
 
 
+def get_last_kanban_receipt(part_num):
+    """
+    Get the last inventory receipt for a part number.
+    Used to prevent double-entry on Kanban receipts.
+    Looks for MFG-STK transactions (manufactured to stock).
+    Gets employee from the associated LaborDtl record.
+    """
+    # Take the only row rather than .get(part_num): the server's collation is
+    # case-insensitive, so the returned PartNum may differ in case
+    receipts = get_last_kanban_receipts([part_num])
+    return next(iter(receipts.values()), None)
+
+
+@cached(_summary_cache, key=partial(hashkey, 'inserts'), lock=_summary_lock)
 def get_insert_summary():
     """
     Get Gen 3 insert demand summary for the Inserts dashboard.
@@ -1513,11 +1760,12 @@ def get_insert_summary():
     - OnHand: Current inventory
     - InProd: Inserts needed for die set jobs in process (Asm 1 Op 10 complete)
     - TotalNeed: Overall demand from PartQty.DemandQty
-    - Shortage calculations for both in-prod and total
+    - ShortProd/SetsProd and ShortTotal/SetsTotal: shortage and sets of 4 to
+      make, for in-prod and total need
     
     Die sets need 2 inserts each, matched by CommercialSize1.
     """
-    query = """
+    query = f"""
         WITH InProdNeed AS (
             -- Die set jobs in process (Assembly 1 Op 10 complete)
             -- Each die set needs 2 inserts, matched by CommercialSize1
@@ -1547,7 +1795,7 @@ def get_insert_summary():
             FROM Erp.Part p
             LEFT JOIN (
                 SELECT PartNum, SUM(OnHandQty) AS OnHandQty, SUM(DemandQty) AS DemandQty
-                FROM Erp.PartQty
+                FROM {_partqty('pqa')}
                 GROUP BY PartNum
             ) pq ON p.PartNum = pq.PartNum
             WHERE p.PartDescription LIKE '%Gen 3%'
@@ -1557,10 +1805,20 @@ def get_insert_summary():
             ip.PartNum,
             ip.PartDescription,
             ip.OnHand,
-            ISNULL(ipn.InProdQty, 0) AS InProd,
-            ip.TotalNeed
+            inp.InProd,
+            ip.TotalNeed,
+            sh.ShortProd,
+            CAST(FLOOR((sh.ShortProd + 3) / 4) AS int) AS SetsProd,
+            sh.ShortTotal,
+            CAST(FLOOR((sh.ShortTotal + 3) / 4) AS int) AS SetsTotal
         FROM InsertParts ip
         LEFT JOIN InProdNeed ipn ON ip.CommercialSize1 = ipn.CommercialSize1
+        CROSS APPLY (SELECT ISNULL(ipn.InProdQty, 0) AS InProd) inp
+        -- Shortages and sets of 4 to make, for in-production and total need
+        CROSS APPLY (
+            SELECT CASE WHEN inp.InProd > ip.OnHand THEN inp.InProd - ip.OnHand ELSE 0 END AS ShortProd,
+                   CASE WHEN ip.TotalNeed > ip.OnHand THEN ip.TotalNeed - ip.OnHand ELSE 0 END AS ShortTotal
+        ) sh
         WHERE ip.TotalNeed > 0 OR ISNULL(ipn.InProdQty, 0) > 0
         ORDER BY ip.PartDescription
     """
@@ -1568,63 +1826,80 @@ def get_insert_summary():
     return sql_query(query)
 
 
-def get_all_workcell_counts():
+@cached(_summary_cache, key=partial(hashkey, 'op_counts'), lock=_summary_lock)
+def get_op_queue_counts():
     """
-    Get job counts for all workcells in one efficient query.
-    Returns dict mapping workcell_id to job count.
+    Get open, non-backflush operation counts for every workcell op code.
+    Returns dict mapping OpCode to count.
+    The live query is an index-only join on IX_JobHead_Open/IX_JobOper_Op_Open
+    (sql/migrations/012) while its filters stay literal.
     """
-    # Collect all op codes from all workcells
-    all_ops = set()
-    op_to_workcell = {}  # Map each op code to its workcell(s)
-    
-    for wc_id, wc_config in WORKCELLS.items():
-        # Skip dashboard-type workcells (they don't have standard job queues)
-        if wc_config.get('dashboard_type'):
-            continue
-        for op in wc_config.get('ops', []):
-            all_ops.add(op)
-            if op not in op_to_workcell:
-                op_to_workcell[op] = []
-            op_to_workcell[op].append(wc_id)
-    
-    if not all_ops:
+    if not _ALL_OPS:
         return {}
     
     # Build query to count jobs by OpCode
-    placeholders = ', '.join([f':op{i}' for i in range(len(all_ops))])
-    params = {f'op{i}': op for i, op in enumerate(all_ops)}
+    params = {'ops': _ALL_OPS}
     
-    query = f"""
-        SELECT jo.OpCode, COUNT(*) AS JobCount
-        FROM Erp.JobHead jh
-        INNER JOIN Erp.JobOper jo ON jh.Company = jo.Company AND jh.JobNum = jo.JobNum
-        WHERE jh.JobComplete = 0
-          AND jh.JobReleased = 1
-          AND jo.OpCode IN ({placeholders})
-          AND jo.OpComplete = 0
-          AND jo.LaborEntryMethod != 'B'
-        GROUP BY jo.OpCode
-    """
+    if ROLLUP_TABLES:
+        # Per-OpCode counts kept by sp_refresh_tq_op_counts (sql/migrations/011)
+        query = """
+            SELECT OpCode, SUM(JobCount) AS JobCount
+            FROM dbo.tq_OpQueueCounts
+            WHERE OpCode IN :ops
+            GROUP BY OpCode
+        """
+    else:
+        query = """
+            SELECT jo.OpCode, COUNT(*) AS JobCount
+            FROM Erp.JobHead jh
+            INNER JOIN Erp.JobOper jo ON jh.Company = jo.Company AND jh.JobNum = jo.JobNum
+            WHERE jh.JobComplete = 0
+              AND jh.JobReleased = 1
+              AND jo.OpCode IN :ops
+              AND jo.OpComplete = 0
+              AND jo.LaborEntryMethod != 'B'
+            GROUP BY jo.OpCode
+        """
     
-    rows = sql_query(query, params)
+    rows = sql_query(_expanding(query, 'ops'), params)
+    return {row['OpCode']: row['JobCount'] for row in rows}
+
+
+@cached(_summary_cache, key=partial(hashkey, 'counts'), lock=_summary_lock)
+def get_all_workcell_counts():
+    """
+    Get job counts for all workcells from the per-OpCode counts.
+    Returns dict mapping workcell_id to job count.
+    """
+    if not _ALL_OPS:
+        return {}
     
     # Build counts by workcell
-    counts = {wc_id: 0 for wc_id in WORKCELLS.keys()}
+    counts = dict.fromkeys(WORKCELLS, 0)
     
-    for row in rows:
-        op_code = row['OpCode']
-        count = row['JobCount']
+    for op_code, count in get_op_queue_counts().items():
         # Add this count to each workcell that uses this op code
-        for wc_id in op_to_workcell.get(op_code, []):
+        for wc_id in _OP_TO_WORKCELL.get(op_code, ()):
             counts[wc_id] += count
     
     return counts
 
 
+def get_total_queue_count():
+    """
+    Get the number of queued operations across all workcells.
+    Each operation counts once, even when its op code is shared by
+    several workcells.
+    """
+    return sum(get_op_queue_counts().values())
+
+
+@cached(_live_count_cache, key=partial(hashkey, 'workers'), lock=_live_count_lock)
 def get_active_worker_count():
     """
     Get count of workers currently working on jobs.
     Returns int count of distinct employees with active LaborDtl records.
+    Keep "ActiveTrans = 1" literal so IX_LaborDtl_Active (sql/migrations/009) applies.
     """
     query = """
         SELECT COUNT(DISTINCT lh.EmployeeNum) AS ActiveCount
@@ -1637,10 +1912,12 @@ def get_active_worker_count():
     return result[0]['ActiveCount'] if result else 0
 
 
+@cached(_live_count_cache, key=partial(hashkey, 'jobs'), lock=_live_count_lock)
 def get_active_job_count():
     """
     Get count of jobs currently being worked on.
     Returns int count of distinct jobs with active LaborDtl records.
+    Keep "ActiveTrans = 1" literal so IX_LaborDtl_Active (sql/migrations/009) applies.
     """
     query = """
         SELECT COUNT(DISTINCT JobNum) AS ActiveCount
@@ -1663,14 +1940,18 @@ def get_operation_last_entries(job_num):
         SELECT 
             jo.AssemblySeq,
             jo.OprSeq,
-            CONVERT(VARCHAR(10), 
-                (SELECT MAX(ld.ClockInDate) 
-                 FROM Erp.LaborDtl ld 
-                 WHERE ld.JobNum = jo.JobNum 
-                   AND ld.AssemblySeq = jo.AssemblySeq
-                   AND ld.OprSeq = jo.OprSeq 
-                   AND ld.LaborQty > 0), 23) AS LastEntryDate
+            CONVERT(VARCHAR(10), agg.LastEntry, 23) AS LastEntryDate
         FROM Erp.JobOper jo
+        -- Last labor date per op, aggregated once for the job; JobNum and the
+        -- literal LaborQty > 0 filter sit below the GROUP BY so the aggregate
+        -- seeks IX_LaborDtl_Job_Op_Pos (sql/migrations/010)
+        LEFT JOIN (
+            SELECT AssemblySeq, OprSeq, MAX(ClockInDate) AS LastEntry
+            FROM Erp.LaborDtl
+            WHERE JobNum = :job_num
+              AND LaborQty > 0
+            GROUP BY AssemblySeq, OprSeq
+        ) agg ON agg.AssemblySeq = jo.AssemblySeq AND agg.OprSeq = jo.OprSeq
         WHERE jo.JobNum = :job_num
           AND jo.LaborEntryMethod != 'B'
     """
@@ -1701,20 +1982,31 @@ def get_all_employees():
     return sql_query(query)
 
 
-def get_activity_report(emp_id, start_date, end_date, op_codes=None):
+# Activity report limits: the view rejects ranges longer than
+# ACTIVITY_REPORT_MAX_DAYS, and rows come back ACTIVITY_REPORT_PAGE_SIZE at a
+# time, newest first, with a keyset cursor for the next page.
+ACTIVITY_REPORT_MAX_DAYS = 90
+ACTIVITY_REPORT_PAGE_SIZE = 1000
+
+
+def iter_activity_report(emp_id, start_date, end_date, op_codes=None, cursor=None):
     """
-    Get production activity report for an employee or all employees.
+    Stream one page of the production activity report for an employee or all
+    employees, row by row as SQL Server returns them.
 
-    Returns all labor entries (including indirect) with job/part details.
+    Yields all labor entries (including indirect) with job/part details.
 
     Args:
         emp_id: Employee ID (string) or 'all' for all employees
         start_date: Start date (string 'YYYY-MM-DD')
         end_date: End date (string 'YYYY-MM-DD')
         op_codes: Optional list of operation codes to filter
+        cursor: Optional (ClockInDate, ClockInTime, LaborDtlSeq) from the previous
+            page's next_cursor; returns the rows after it
 
-    Returns:
-        List of dicts with labor entry details
+    Yields:
+        (row, sort_key) - row is a dict with labor entry details, sort_key is
+        the row's (ClockInDate, ClockInTime, LaborDtlSeq) paging key
     """
     params = {
         'start_date': start_date,
@@ -1730,12 +2022,21 @@ def get_activity_report(emp_id, start_date, end_date, op_codes=None):
     # Build operation filter clause
     op_filter = ""
     if op_codes and len(op_codes) > 0:
-        placeholders = ', '.join([f':op{i}' for i in range(len(op_codes))])
-        params.update({f'op{i}': op for i, op in enumerate(op_codes)})
-        op_filter = f"AND jo.OpCode IN ({placeholders})"
+        params['ops'] = list(op_codes)
+        op_filter = "AND jo.OpCode IN :ops"
+
+    # Keyset paging on the sort order (NULL ClockInTime sorts as -1, last)
+    cursor_filter = ""
+    if cursor:
+        params['cursor_date'], params['cursor_time'], params['cursor_seq'] = cursor
+        cursor_filter = """AND (ld.ClockInDate < :cursor_date
+               OR (ld.ClockInDate = :cursor_date
+                   AND (ISNULL(ld.ClockInTime, -1) < :cursor_time
+                        OR (ISNULL(ld.ClockInTime, -1) = :cursor_time
+                            AND ld.LaborDtlSeq < :cursor_seq))))"""
 
     query = f"""
-        SELECT TOP 1000
+        SELECT TOP ({ACTIVITY_REPORT_PAGE_SIZE})
             CONVERT(VARCHAR(10), ld.ClockInDate, 23) AS ClockInDate,
             CASE
                 WHEN ld.ClockInTime IS NOT NULL
@@ -1753,7 +2054,9 @@ def get_activity_report(emp_id, start_date, end_date, op_codes=None):
             CASE WHEN ld.AssemblySeq > 0 THEN pa.PartDescription ELSE p.PartDescription END AS PartDescription,
             ISNULL(ld.LaborQty, 0) AS LaborQty,
             ISNULL(ld.ScrapQty, 0) AS ScrapQty,
-            ISNULL(ld.LaborHrs, 0) AS LaborHrs
+            ISNULL(ld.LaborHrs, 0) AS LaborHrs,
+            ISNULL(ld.ClockInTime, -1) AS SortTime,
+            ld.LaborDtlSeq
         FROM Erp.LaborDtl ld
         INNER JOIN Erp.EmpBasic e
             ON ld.Company = e.Company AND ld.EmployeeNum = e.EmpID
@@ -1772,19 +2075,21 @@ def get_activity_report(emp_id, start_date, end_date, op_codes=None):
             ON jh.Company = p.Company AND jh.PartNum = p.PartNum
         LEFT JOIN Erp.Part pa
             ON ja.Company = pa.Company AND ja.PartNum = pa.PartNum
+        -- Half-open range: keeps the whole end day if ClockInDate carries a time,
+        -- and stays a plain seek on IX_LaborDtl_ClockIn_Emp (sql/migrations/008)
         WHERE ld.ClockInDate >= :start_date
-          AND ld.ClockInDate <= :end_date
+          AND ld.ClockInDate < DATEADD(day, 1, CAST(:end_date AS DATE))
           {emp_filter}
           {op_filter}
-        ORDER BY ld.ClockInDate DESC, ld.ClockInTime DESC
+          {cursor_filter}
+        ORDER BY ld.ClockInDate DESC, ld.ClockInTime DESC, ld.LaborDtlSeq DESC
     """
 
-    import sys
-    print(f"[get_activity_report] Query params: {params}", file=sys.stderr, flush=True)
-    print(f"[get_activity_report] Employee filter: {emp_filter}", file=sys.stderr, flush=True)
-    print(f"[get_activity_report] Op filter: {op_filter}", file=sys.stderr, flush=True)
+    logger.debug("[iter_activity_report] params=%s emp_filter=%r op_filter=%r",
+                 params, emp_filter, op_filter)
 
-    result = sql_query(query, params)
-    print(f"[get_activity_report] Returned {len(result)} rows", file=sys.stderr, flush=True)
+    stmt = _expanding(query, 'ops') if op_filter else query
 
-    return result
+    # Paging keys stay out of the report rows and travel alongside them
+    for row in sql_query_iter(stmt, params):
+        yield row, (row['ClockInDate'], row.pop('SortTime'), row.pop('LaborDtlSeq'))
@@ -1,132 +1,286 @@
 # app/routes/views.py
+# Version 5.3 — 2026-10-15
+# - Labor/quantity writes invalidate the cached filter dropdown lists
+# - [TIMING] output only when TIMING_ENABLED=1
+# - Labor/quantity writes also invalidate the cached dashboard summaries; burn and
+#   inserts views copy the cached rows before adding shortage fields
+# - /api/queue/<workcell_id>?detail=0 returns the core queue columns only
+# - Home page groups and activity report workcell list built once at import
+# - /api/reports/activity caps the range at ACTIVITY_REPORT_MAX_DAYS and pages with ?cursor=
+# - /api/job/<job>/<asm>/<opr> runs its three lookups concurrently (get_job_detail)
+# - Per-request traces on labor/active and the activity report use logger.debug
+# - /api/reports/activity streams its rows (iter_activity_report) instead of one jsonify
+# - /api/test_epicor goes through the shared Epicor session (api_get)
+# - Labor, filter and kanban route imports hoisted to module level
+# - /api/pdf answers with X-Accel-Redirect when PDF_ACCEL_REDIRECT is set
+# - Labor start/end drop the employee's cached active labor
+# - Standard queue pages and /api/queue payloads cached for QUEUE_CACHE_TTL; writes clear them
+# - Inserts/burn dashboards cached the same way, so shortage math runs once per refresh
+# - Inserts/burn shortage fields come from the summary queries; no per-row Python pass
+# - Buffered JSON GET responses carry a weak ETag and answer If-None-Match with 304
+# - Home page HTML cached in the queue page cache
+# - /api/pdf sends Cache-Control max-age (PDF_MAX_AGE) and honors Range/conditional requests
+# - Unknown work cell ids rejected once in a before_request hook (_check_workcell)
+# - Writes also clear the cached job detail panels
+# - Concurrent identical queue/materials/billet/home-stats lookups share one query (_single_flight)
+# - /api/queue/<workcell_id>?format=ndjson streams one JSON row per line
+# - /api/labor/active rows built as slots-based ActiveLaborRow dataclasses
+# - Module-load banners dropped; labor start, kanban and error prints go through logger
+# - time/date and home-stats count imports hoisted to module level
+# - /api/home_stats runs its count lookups concurrently on the queries EXECUTOR
+# - Writes also clear the cached queue filter facts
+# - Removed /api/labor/report: its report_quantity_only() never existed and no page calls it
+# - POST /api/queue/enrichment returns the detail columns left out by ?detail=0
+# - JSON ETags set here; If-None-Match evaluated app-wide after compression
+# - Dropped unused get_job_materials/get_job_operations/get_job_header imports
 # Version 5.2 — 2026-01-16
 #
 # Routes for The Queue web interface
 # Added /api/job/<job_num>/last_entries for on-demand LastEntryDate loading
 
-print("========== VIEWS.PY LOADED ==========")
-
+import logging
 import os
-from flask import Blueprint, render_template, jsonify, request, send_file, abort
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from datetime import date
+from functools import partial, wraps
+from itertools import chain
+from urllib.parse import quote
+from flask import (
+    Blueprint, Response, current_app, render_template, jsonify, request, send_file,
+    abort, stream_with_context
+)
+from cachetools import TTLCache, cached
+from cachetools.keys import hashkey
 from app.logic.queries import (
-    get_workcells, get_jobs_for_workcell, get_jobs_with_details, get_job_materials,
-    get_job_operations, get_job_header, get_workcell_config,
+    get_workcells, get_jobs_for_workcell, get_jobs_with_details,
+    get_job_detail, get_workcell_config,
     get_last_checkin, get_materials_for_workcell, get_billet_summary, WORKCELLS,
-    get_operation_last_entries, get_activity_report, get_all_employees
+    get_operation_last_entries, iter_activity_report, get_all_employees,
+    invalidate_dropdown_cache, invalidate_summary_cache, invalidate_job_detail_cache,
+    invalidate_filter_facts_cache,
+    TIMING_ENABLED,
+    ACTIVITY_REPORT_MAX_DAYS, ACTIVITY_REPORT_PAGE_SIZE, get_insert_summary, get_casting_summary,
+    get_jobs_using_material, get_colors_for_workcell, get_jobs_using_color,
+    get_resources_for_workcell, get_jobs_using_resource,
+    get_capabilities_for_workcell, get_jobs_using_capability,
+    get_employee, get_active_labor_details, get_last_kanban_receipt, search_parts,
+    get_all_workcell_counts, get_active_worker_count, get_total_queue_count, EXECUTOR,
+    get_queue_enrichment
+)
+from app.logic.epicor_api import (
+    api_get, start_activity, end_activity, get_active_labor, invalidate_active_labor,
+    update_job_quantity, kanban_receipt
+)
+from app.config import (
+    translate_pdf_path, EPICOR_API_URL, EPICOR_API_KEY, EPICOR_USERNAME, EPICOR_PASSWORD,
+    PDF_LOCAL_PREFIX, PDF_ACCEL_REDIRECT, PDF_MAX_AGE
 )
-from app.config import translate_pdf_path
+
+logger = logging.getLogger(__name__)
 
 views = Blueprint('views', __name__)
 
 
-@views.route('/')
-def index():
-    """Home page - show work cell buttons grouped by area."""
+# Home page groups and the activity report's workcell/op list only depend on
+# config/workcells.json, so they are built once at import.
+_WORKCELL_GROUPS = [
+    ('Laser / Press', ['LASER', 'PRESS']),
+    ('Saw / Weld / Burn', ['SAW', 'WELD', 'BURN']),
+    ('Machining', ['MILL-LATHE', 'DIES', 'FBS', 'INSERTS']),
+    ('Powder', ['POWDER', 'BLACKENING']),
+    ('Shipping', ['SHIPPING']),
+    ('Assembly', ['ASM-M50', 'ASM-MAD', 'CRATING', 'WIRE']),
+    ('Office', ['OFFICE']),
+]
+
+
+def _build_grouped_workcells():
+    """Group the home page work cell buttons by area."""
     all_workcells = {wc['id']: wc for wc in get_workcells()}
-    
-    # Define groups and their workcell IDs
-    groups = [
-        ('Laser / Press', ['LASER', 'PRESS']),
-        ('Saw / Weld / Burn', ['SAW', 'WELD', 'BURN']),
-        ('Machining', ['MILL-LATHE', 'DIES', 'FBS', 'INSERTS']),
-        ('Powder', ['POWDER', 'BLACKENING']),
-        ('Shipping', ['SHIPPING']),
-        ('Assembly', ['ASM-M50', 'ASM-MAD', 'CRATING', 'WIRE']),
-        ('Office', ['OFFICE']),
-    ]
-    
-    # Build grouped workcells list
     grouped_workcells = []
-    for group_name, wc_ids in groups:
+    for group_name, wc_ids in _WORKCELL_GROUPS:
         workcells_in_group = [all_workcells[wc_id] for wc_id in wc_ids if wc_id in all_workcells]
         if workcells_in_group:
             grouped_workcells.append({
                 'name': group_name,
                 'workcells': workcells_in_group
             })
-    
-    return render_template('index.html', groups=grouped_workcells)
+    return grouped_workcells
+
+
+_GROUPED_WORKCELLS = _build_grouped_workcells()
+
+# Full workcell configs with ops for the activity report's operation filter
+_WORKCELL_OP_CONFIGS = [
+    {'id': wc['id'], 'name': wc['name'], 'ops': WORKCELLS.get(wc['id'], {}).get('ops', [])}
+    for wc in get_workcells()
+]
+
+# Rendered queue pages and /api/queue payloads are the same for every viewer;
+# hold them for QUEUE_CACHE_TTL seconds. Labor, quantity and kanban writes
+# clear them along with the query caches (_invalidate_data_caches()).
+QUEUE_CACHE_TTL = int(os.getenv('QUEUE_CACHE_TTL', '15'))
+_queue_cache = TTLCache(maxsize=128, ttl=QUEUE_CACHE_TTL)
+_queue_lock = threading.Lock()
+
+
+def _invalidate_data_caches():
+    """Drop cached queue pages/payloads, dropdown lists, filter facts, summaries and job details after a write."""
+    invalidate_dropdown_cache()
+    invalidate_filter_facts_cache()
+    invalidate_summary_cache()
+    invalidate_job_detail_cache()
+    with _queue_lock:
+        _queue_cache.clear()
+
+
+# Auto-refresh makes every open browser ask for the same data at about the same
+# moment. A cache miss runs the lookup once; callers arriving while it is still
+# running wait on its Future instead of each starting the same query.
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def _single_flight(name):
+    """Coalesce concurrent calls with the same arguments into one call of the wrapped function."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args):
+            key = hashkey(name, *args)
+            with _inflight_lock:
+                future = _inflight.get(key)
+                leader = future is None
+                if leader:
+                    future = _inflight[key] = Future()
+            if not leader:
+                return future.result()
+            try:
+                result = fn(*args)
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+            else:
+                future.set_result(result)
+                return result
+            finally:
+                with _inflight_lock:
+                    del _inflight[key]
+        return wrapper
+    return decorator
+
+
+@views.before_request
+def _check_workcell():
+    """Reject unknown <workcell_id> URLs once, before any workcell route runs."""
+    workcell_id = (request.view_args or {}).get('workcell_id')
+    if workcell_id is None or workcell_id in WORKCELLS:
+        return None
+    if request.endpoint == 'views.queue':
+        return render_template('error.html', message=f"Work cell '{workcell_id}' not found"), 404
+    return jsonify({'error': 'Work cell not found'}), 404
+
+
+@views.after_request
+def _conditional_json(response):
+    """
+    Weak ETag on buffered JSON GET responses, so polling clients that send
+    If-None-Match get a 304 with no body when nothing changed. The 304 itself
+    is decided by the app-level _conditional_get hook (app/__init__.py), after
+    Flask-Compress has added its encoding suffix to the ETag.
+    """
+    if (request.method == 'GET' and response.status_code == 200
+            and response.mimetype == 'application/json' and not response.is_streamed):
+        response.add_etag(weak=True)
+        response.headers.setdefault('Cache-Control', 'no-cache')
+    return response
+
+
+@views.route('/')
+def index():
+    """Home page - show work cell buttons grouped by area."""
+    return _render_index()
+
+
+@cached(_queue_cache, key=partial(hashkey, 'home'), lock=_queue_lock)
+def _render_index():
+    """Render the home page; it has no per-request data, so it is cached too."""
+    return render_template('index.html', groups=_GROUPED_WORKCELLS)
 
 
 @views.route('/queue/<workcell_id>')
 def queue(workcell_id):
     """Queue page - show jobs ready for a work cell."""
-    import time
-    t_start = time.time()
-    
-    # Get work cell info
-    if workcell_id not in WORKCELLS:
-        return render_template('error.html', message=f"Work cell '{workcell_id}' not found"), 404
+    if TIMING_ENABLED:
+        t_start = time.time()
     
+    # Get work cell info (unknown work cells were rejected by _check_workcell)
     workcell_config = get_workcell_config(workcell_id)
-    workcell_name = workcell_config['name']
     
     # Check for dashboard type - serve different template
     dashboard_type = workcell_config.get('dashboard_type')
     
     if dashboard_type == 'inserts':
         # Inserts dashboard - show Gen 3 insert demand summary
-        from app.logic.queries import get_insert_summary
-        inserts = get_insert_summary()
-        workcells = get_workcells()  # For the dropdown
-        
-        # Calculate shortage fields for each insert
-        for i in inserts:
-            on_hand = i.get('OnHand', 0) or 0
-            in_prod = i.get('InProd', 0) or 0
-            total_need = i.get('TotalNeed', 0) or 0
-            
-            # In-prod shortage
-            i['ShortProd'] = max(0, in_prod - on_hand)
-            i['SetsProd'] = int((i['ShortProd'] + 3) // 4) if i['ShortProd'] > 0 else 0
-            
-            # Total shortage
-            i['ShortTotal'] = max(0, total_need - on_hand)
-            i['SetsTotal'] = int((i['ShortTotal'] + 3) // 4) if i['ShortTotal'] > 0 else 0
-        
-        return render_template(
-            'inserts.html',
-            workcell_id=workcell_id,
-            workcell_name=workcell_name,
-            workcell_config=workcell_config,
-            inserts=inserts,
-            workcells=workcells
-        )
+        return _render_inserts_page(workcell_id, workcell_config)
     
     if dashboard_type == 'burn':
         # Burn dashboard - show billet summary
-        billets = get_billet_summary()
-        workcells = get_workcells()  # For the dropdown
-        
-        # Calculate shortage fields for each billet
-        for b in billets:
-            on_hand = b.get('OnHand', 0) or 0
-            late_need = b.get('LateNeed', 0) or 0
-            future_need = b.get('FutureNeed', 0) or 0
-            
-            # Total demand from die jobs
-            b['TotalDemand'] = late_need + future_need
-            
-            # On-hand first covers late, remainder covers future
-            remaining_after_late = max(0, on_hand - late_need)
-            b['ShortLate'] = max(0, late_need - on_hand)
-            b['ShortFuture'] = max(0, future_need - remaining_after_late)
-            b['Shortage'] = b['ShortLate'] + b['ShortFuture']
-        
-        return render_template(
-            'burn.html',
-            workcell_id=workcell_id,
-            workcell_name=workcell_name,
-            workcell_config=workcell_config,
-            billets=billets,
-            workcells=workcells
-        )
+        return _render_burn_page(workcell_id, workcell_config)
     
     # Standard queue view
-    t1 = time.time()
+    response = _render_queue_page(workcell_id, workcell_config)
+    if TIMING_ENABLED:
+        logger.info("[TIMING] %s: TOTAL server time %.2fs", workcell_id, time.time() - t_start)
+    return response
+
+
+@cached(_queue_cache, key=lambda workcell_id, workcell_config: hashkey('page', workcell_id),
+        lock=_queue_lock)
+def _render_inserts_page(workcell_id, workcell_config):
+    """Render the inserts dashboard (cached per workcell; shortages come from SQL)."""
+    inserts = get_insert_summary()
+    workcells = get_workcells()  # For the dropdown
+    
+    return render_template(
+        'inserts.html',
+        workcell_id=workcell_id,
+        workcell_name=workcell_config['name'],
+        workcell_config=workcell_config,
+        inserts=inserts,
+        workcells=workcells
+    )
+
+
+@cached(_queue_cache, key=lambda workcell_id, workcell_config: hashkey('page', workcell_id),
+        lock=_queue_lock)
+def _render_burn_page(workcell_id, workcell_config):
+    """Render the burn dashboard (cached per workcell; shortages come from SQL)."""
+    billets = get_billet_summary()
+    workcells = get_workcells()  # For the dropdown
+    
+    return render_template(
+        'burn.html',
+        workcell_id=workcell_id,
+        workcell_name=workcell_config['name'],
+        workcell_config=workcell_config,
+        billets=billets,
+        workcells=workcells
+    )
+
+
+@cached(_queue_cache, key=lambda workcell_id, workcell_config: hashkey('page', workcell_id),
+        lock=_queue_lock)
+def _render_queue_page(workcell_id, workcell_config):
+    """Render the standard queue page (cached per workcell)."""
+    if TIMING_ENABLED:
+        t1 = time.time()
     jobs = get_jobs_with_details(workcell_id)
-    t2 = time.time()
-    print(f"[TIMING] {workcell_id}: get_jobs_with_details took {t2-t1:.2f}s for {len(jobs)} jobs")
+    if TIMING_ENABLED:
+        t2 = time.time()
+        logger.info("[TIMING] %s: get_jobs_with_details took %.2fs for %d jobs", workcell_id, t2 - t1, len(jobs))
     
     workcells = get_workcells()  # For the dropdown
     
@@ -136,39 +290,38 @@ def queue(workcell_id):
     # if workcell_config.get('group_by_material'):
     #     material_list = get_materials_for_workcell(workcell_id)
     
-    t3 = time.time()
+    if TIMING_ENABLED:
+        t3 = time.time()
     response = render_template(
         'queue.html',
         workcell_id=workcell_id,
-        workcell_name=workcell_name,
+        workcell_name=workcell_config['name'],
         workcell_config=workcell_config,
         jobs=jobs,
         workcells=workcells,
         material_list=material_list
     )
-    t4 = time.time()
-    print(f"[TIMING] {workcell_id}: render_template took {t4-t3:.2f}s")
-    print(f"[TIMING] {workcell_id}: TOTAL server time {t4-t_start:.2f}s")
+    if TIMING_ENABLED:
+        t4 = time.time()
+        logger.info("[TIMING] %s: render_template took %.2fs", workcell_id, t4 - t3)
     return response
 
 
 @views.route('/api/materials/<workcell_id>')
 def api_materials(workcell_id):
     """API endpoint for material list - loaded async for performance."""
-    if workcell_id not in WORKCELLS:
-        return jsonify({'error': 'Work cell not found'}), 404
-    
-    materials = get_materials_for_workcell(workcell_id)
+    materials = _materials(workcell_id)
     return jsonify(materials)
 
 
+@_single_flight('materials')
+def _materials(workcell_id):
+    return get_materials_for_workcell(workcell_id)
+
+
 @views.route('/api/jobs_by_material/<workcell_id>/<material_partnum>')
 def api_jobs_by_material(workcell_id, material_partnum):
     """API endpoint to get job keys that use a specific material."""
-    if workcell_id not in WORKCELLS:
-        return jsonify({'error': 'Work cell not found'}), 404
-    
-    from app.logic.queries import get_jobs_using_material
     job_keys = get_jobs_using_material(workcell_id, material_partnum)
     return jsonify(job_keys)
 
@@ -176,10 +329,6 @@ def api_jobs_by_material(workcell_id, material_partnum):
 @views.route('/api/colors/<workcell_id>')
 def api_colors(workcell_id):
     """API endpoint for color list - loaded async for performance."""
-    if workcell_id not in WORKCELLS:
-        return jsonify({'error': 'Work cell not found'}), 404
-    
-    from app.logic.queries import get_colors_for_workcell
     colors = get_colors_for_workcell(workcell_id)
     return jsonify(colors)
 
@@ -187,10 +336,6 @@ def api_colors(workcell_id):
 @views.route('/api/jobs_by_color/<workcell_id>/<color>')
 def api_jobs_by_color(workcell_id, color):
     """API endpoint to get job keys that have a specific finish color."""
-    if workcell_id not in WORKCELLS:
-        return jsonify({'error': 'Work cell not found'}), 404
-    
-    from app.logic.queries import get_jobs_using_color
     job_keys = get_jobs_using_color(workcell_id, color)
     return jsonify(job_keys)
 
@@ -198,10 +343,6 @@ def api_jobs_by_color(workcell_id, color):
 @views.route('/api/resources/<workcell_id>')
 def api_resources(workcell_id):
     """API endpoint for resource list - loaded async for Mill-Lathe."""
-    if workcell_id not in WORKCELLS:
-        return jsonify({'error': 'Work cell not found'}), 404
-    
-    from app.logic.queries import get_resources_for_workcell
     resources = get_resources_for_workcell(workcell_id)
     return jsonify(resources)
 
@@ -209,10 +350,6 @@ def api_resources(workcell_id):
 @views.route('/api/jobs_by_resource/<workcell_id>/<resource_id>')
 def api_jobs_by_resource(workcell_id, resource_id):
     """API endpoint to get job keys that use a specific resource."""
-    if workcell_id not in WORKCELLS:
-        return jsonify({'error': 'Work cell not found'}), 404
-    
-    from app.logic.queries import get_jobs_using_resource
     job_keys = get_jobs_using_resource(workcell_id, resource_id)
     return jsonify(job_keys)
 
@@ -220,10 +357,6 @@ def api_jobs_by_resource(workcell_id, resource_id):
 @views.route('/api/capabilities/<workcell_id>')
 def api_capabilities(workcell_id):
     """API endpoint for capability list - loaded async for Mill-Lathe."""
-    if workcell_id not in WORKCELLS:
-        return jsonify({'error': 'Work cell not found'}), 404
-    
-    from app.logic.queries import get_capabilities_for_workcell
     capabilities = get_capabilities_for_workcell(workcell_id)
     return jsonify(capabilities)
 
@@ -231,35 +364,71 @@ def api_capabilities(workcell_id):
 @views.route('/api/jobs_by_capability/<workcell_id>/<capability_id>')
 def api_jobs_by_capability(workcell_id, capability_id):
     """API endpoint to get job keys that use a specific capability."""
-    if workcell_id not in WORKCELLS:
-        return jsonify({'error': 'Work cell not found'}), 404
-    
-    from app.logic.queries import get_jobs_using_capability
     job_keys = get_jobs_using_capability(workcell_id, capability_id)
     return jsonify(job_keys)
 
 
 @views.route('/api/queue/<workcell_id>')
 def api_queue(workcell_id):
-    """API endpoint for auto-refresh."""
-    if workcell_id not in WORKCELLS:
-        return jsonify({'error': 'Work cell not found'}), 404
+    """
+    API endpoint for auto-refresh.
+    ?detail=0 returns the core columns only; POST the row keys to
+    /api/queue/enrichment for the rest.
+    ?format=ndjson streams one row per line as the query returns them
+    (uncached, no ETag) so a client can fill the table progressively.
+    """
+    detail = request.args.get('detail', '1') != '0'
+    if request.args.get('format') == 'ndjson':
+        rows = get_jobs_for_workcell(workcell_id, detail=detail, stream=True)
+        return Response(stream_with_context(_stream_ndjson(rows)),
+                        mimetype='application/x-ndjson')
+    return Response(_queue_payload(workcell_id, detail), mimetype='application/json')
+
+
+@cached(_queue_cache, key=partial(hashkey, 'api'), lock=_queue_lock)
+@_single_flight('api')
+def _queue_payload(workcell_id, detail):
+    """Serialized /api/queue body (cached per workcell and detail flag)."""
+    return current_app.json.dumps(get_jobs_for_workcell(workcell_id, detail=detail))
+
+
+def _stream_ndjson(rows):
+    """Yield each row as one line of JSON."""
+    dumps = current_app.json.dumps
+    for row in rows:
+        yield dumps(row) + '\n'
+
+
+@views.route('/api/queue/enrichment', methods=['POST'])
+def api_queue_enrichment():
+    """
+    Detail columns (JobOper_UD fields, PdfPath, ResourceID, CapabilityID,
+    PartOnHand) for rows loaded with /api/queue/<workcell_id>?detail=0.
     
-    jobs = get_jobs_for_workcell(workcell_id)
-    return jsonify(jobs)
+    POST body: {"keys": ["JobNum-AssemblySeq-OprSeq", ...]}
+    Returns dict mapping each key found to its detail fields.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Body must be a JSON object'}), 400
+    raw_keys = data.get('keys') or []
+    if not isinstance(raw_keys, list):
+        return jsonify({'error': 'keys must be a list'}), 400
+    keys = []
+    for job_key in raw_keys:
+        try:
+            # JobNum may itself contain '-'; AssemblySeq and OprSeq never do
+            job_num, asm_seq, opr_seq = str(job_key).rsplit('-', 2)
+            keys.append((job_num, int(asm_seq), int(opr_seq)))
+        except ValueError:
+            return jsonify({'error': f'Invalid job key: {job_key}'}), 400
+    return jsonify(get_queue_enrichment(keys))
 
 
 @views.route('/api/job/<job_num>/<int:assembly_seq>/<int:opr_seq>')
 def api_job_detail(job_num, assembly_seq, opr_seq):
     """API endpoint for job header, operations and materials - all in one call."""
-    header = get_job_header(job_num)
-    operations = get_job_operations(job_num)
-    materials = get_job_materials(job_num, assembly_seq, opr_seq)
-    return jsonify({
-        'header': header,
-        'operations': operations,
-        'materials': materials
-    })
+    return jsonify(get_job_detail(job_num, assembly_seq, opr_seq))
 
 
 @views.route('/api/job/<job_num>/last_entries')
@@ -276,7 +445,6 @@ def api_job_last_entries(job_num):
 @views.route('/api/employee/<emp_id>')
 def api_employee(emp_id):
     """Validate employee ID and return name."""
-    from app.logic.queries import get_employee
     employee = get_employee(emp_id)
     if employee:
         return jsonify(employee)
@@ -286,9 +454,6 @@ def api_employee(emp_id):
 @views.route('/api/test_epicor')
 def api_test_epicor():
     """Test Epicor REST API connection."""
-    import requests
-    from requests.auth import HTTPBasicAuth
-    from app.config import EPICOR_API_URL, EPICOR_API_KEY, EPICOR_USERNAME, EPICOR_PASSWORD
     
     # Debug: show what's loaded (masked)
     debug_info = {
@@ -306,16 +471,8 @@ def api_test_epicor():
     
     try:
         # v1 format: /api/v1/Erp.BO.EmpBasicSvc/EmpBasics
-        url = f"{EPICOR_API_URL}/Erp.BO.EmpBasicSvc/EmpBasics"
-        headers = {
-            'Accept': 'application/json',
-            'x-api-key': EPICOR_API_KEY
-        }
-        
-        # Basic Auth (Epicor user) + API Key
-        auth = HTTPBasicAuth(EPICOR_USERNAME, EPICOR_PASSWORD)
-        
-        response = requests.get(url, headers=headers, auth=auth, timeout=10, verify=False)
+        # Basic Auth (Epicor user) + API Key via the shared Epicor session
+        response = api_get('Erp.BO.EmpBasicSvc/EmpBasics', timeout=10)
         
         if response.ok:
             return jsonify({
@@ -362,7 +519,18 @@ def api_pdf():
     if not local_path.lower().endswith('.pdf'):
         abort(400, 'Only PDF files allowed')
     
-    return send_file(local_path, mimetype='application/pdf')
+    # Behind nginx: let it ship the bytes from its internal location
+    if PDF_ACCEL_REDIRECT and local_path.startswith(PDF_LOCAL_PREFIX):
+        rel_path = local_path[len(PDF_LOCAL_PREFIX):].replace('\\', '/').lstrip('/')
+        return Response(headers={
+            'X-Accel-Redirect': PDF_ACCEL_REDIRECT.rstrip('/') + '/' + quote(rel_path),
+            'Content-Type': 'application/pdf',
+            'Cache-Control': f'public, max-age={PDF_MAX_AGE}'
+        })
+    
+    # conditional: ETag/Last-Modified revalidation and Range requests
+    return send_file(local_path, mimetype='application/pdf', conditional=True,
+                     max_age=PDF_MAX_AGE)
 
 
 # ============================================================================
@@ -381,13 +549,11 @@ def api_labor_start():
         "oprSeq": 10
     }
     """
-    from app.logic.epicor_api import start_activity
     
     data = request.get_json()
-    print(f"[START] Received data: {data}")
+    logger.debug("[START] Received data: %s", data)
     
     if not data:
-        print("[START] No data provided")
         return jsonify({'success': False, 'error': 'No data provided'}), 400
     
     emp_id = data.get('empId')
@@ -400,15 +566,13 @@ def api_labor_start():
     jc_dept = data.get('jcDept', '')
     capability_id = data.get('capabilityId', '')
     
-    print(f"[START] Parsed: emp={emp_id}, job={job_num}, asm={asm_seq}, opr={opr_seq}, resGrp={resource_grp_id}, resId={resource_id}, op={op_code}, dept={jc_dept}, cap={capability_id}")
-    
     if not all([emp_id, job_num, opr_seq is not None]):
-        print(f"[START] Missing required fields: emp_id={emp_id}, job_num={job_num}, opr_seq={opr_seq}")
         return jsonify({'success': False, 'error': 'Missing required fields'}), 400
     
-    print(f"[START] Calling start_activity...")
     result = start_activity(emp_id, job_num, asm_seq, opr_seq, resource_grp_id, resource_id, op_code, jc_dept, capability_id)
-    print(f"[START] Result: {result}")
+    logger.debug("[START] emp=%s job=%s/%s/%s op=%s result=%s",
+                 emp_id, job_num, asm_seq, opr_seq, op_code, result)
+    invalidate_active_labor(emp_id)
     
     if result['success']:
         return jsonify(result)
@@ -430,7 +594,6 @@ def api_labor_end():
         "complete": false  // Optional - if true, marks operation complete
     }
     """
-    from app.logic.epicor_api import end_activity
     
     data = request.get_json()
     if not data:
@@ -448,25 +611,44 @@ def api_labor_end():
         return jsonify({'success': False, 'error': 'Missing required fields'}), 400
 
     result = end_activity(emp_id, labor_hed_seq, labor_dtl_seq, labor_qty, scrap_qty, scrap_reason, complete)
+    invalidate_active_labor(emp_id)
     
     if result['success']:
+        _invalidate_data_caches()
         return jsonify(result)
     else:
         return jsonify(result), 500
 
 
+@dataclass(slots=True)
+class ActiveLaborRow:
+    """Active labor record merged with its job details (serialized by jsonify)."""
+    LaborHedSeq: int
+    LaborDtlSeq: int
+    JobNum: str
+    AssemblySeq: int
+    OprSeq: int
+    OpCode: str
+    PartNum: str = ''
+    PartDescription: str = ''
+    ProdQty: float = 0
+    QtyCompleted: float = 0
+    QtyLeft: float = 0
+    QtyAvailable: float | None = None  # None for first op
+    IsFirstOp: bool = False
+    MtlStatus: str = 'none'
+    MaxMtlQty: float | None = None  # None if no material constraint
+
+
 @views.route('/api/labor/active/<emp_id>')
 def api_labor_active(emp_id):
     """
     Get active labor records for an employee with enriched job details.
     """
-    import sys
-    print(f"[ACTIVE] Getting active labor for employee: {emp_id}", file=sys.stderr, flush=True)
-    from app.logic.epicor_api import get_active_labor
-    from app.logic.queries import get_active_labor_details
+    logger.debug("[ACTIVE] Getting active labor for employee: %s", emp_id)
     
     active = get_active_labor(emp_id)
-    print(f"[ACTIVE] Got {len(active)} records", file=sys.stderr, flush=True)
+    logger.debug("[ACTIVE] Got %d records", len(active))
     
     if not active:
         return jsonify([])
@@ -484,68 +666,29 @@ def api_labor_active(emp_id):
     # Merge details into active records
     enriched = []
     for rec in active:
-        key = f"{rec.get('JobNum')}-{rec.get('AssemblySeq', 0)}-{rec.get('OprSeq')}"
+        key = (rec.get('JobNum'), rec.get('AssemblySeq', 0), rec.get('OprSeq'))
         details = details_map.get(key, {})
-        enriched.append({
-            'LaborHedSeq': rec.get('LaborHedSeq'),
-            'LaborDtlSeq': rec.get('LaborDtlSeq'),
-            'JobNum': rec.get('JobNum'),
-            'AssemblySeq': rec.get('AssemblySeq', 0),
-            'OprSeq': rec.get('OprSeq'),
-            'OpCode': details.get('OpCode', rec.get('OpCode', '')),
-            'PartNum': details.get('PartNum', ''),
-            'PartDescription': details.get('PartDescription', ''),
-            'ProdQty': details.get('ProdQty', 0),
-            'QtyCompleted': details.get('QtyCompleted', 0),
-            'QtyLeft': details.get('QtyLeft', 0),
-            'QtyAvailable': details.get('QtyAvailable'),  # None for first op
-            'IsFirstOp': details.get('IsFirstOp', False),
-            'MtlStatus': details.get('MtlStatus', 'none'),
-            'MaxMtlQty': details.get('MaxMtlQty')  # None if no material constraint
-        })
+        enriched.append(ActiveLaborRow(
+            LaborHedSeq=rec.get('LaborHedSeq'),
+            LaborDtlSeq=rec.get('LaborDtlSeq'),
+            JobNum=rec.get('JobNum'),
+            AssemblySeq=rec.get('AssemblySeq', 0),
+            OprSeq=rec.get('OprSeq'),
+            OpCode=details.get('OpCode', rec.get('OpCode', '')),
+            PartNum=details.get('PartNum', ''),
+            PartDescription=details.get('PartDescription', ''),
+            ProdQty=details.get('ProdQty', 0),
+            QtyCompleted=details.get('QtyCompleted', 0),
+            QtyLeft=details.get('QtyLeft', 0),
+            QtyAvailable=details.get('QtyAvailable'),
+            IsFirstOp=details.get('IsFirstOp', False),
+            MtlStatus=details.get('MtlStatus', 'none'),
+            MaxMtlQty=details.get('MaxMtlQty')
+        ))
     
     return jsonify(enriched)
 
 
-@views.route('/api/labor/report', methods=['POST'])
-def api_labor_report():
-    """
-    Report labor quantity without Start/End tracking.
-    Just creates a completed labor record.
-    
-    POST body: {
-        "empId": "123",
-        "jobNum": "JOB001",
-        "asmSeq": 0,
-        "oprSeq": 10,
-        "laborQty": 10,
-        "scrapQty": 0
-    }
-    """
-    from app.logic.epicor_api import report_quantity_only
-    
-    data = request.get_json()
-    if not data:
-        return jsonify({'success': False, 'error': 'No data provided'}), 400
-    
-    emp_id = data.get('empId')
-    job_num = data.get('jobNum')
-    asm_seq = data.get('asmSeq', 0)
-    opr_seq = data.get('oprSeq')
-    labor_qty = data.get('laborQty', 0)
-    scrap_qty = data.get('scrapQty', 0)
-    
-    if not all([emp_id, job_num, opr_seq is not None]):
-        return jsonify({'success': False, 'error': 'Missing required fields'}), 400
-    
-    result = report_quantity_only(emp_id, job_num, asm_seq, opr_seq, labor_qty, scrap_qty)
-    
-    if result['success']:
-        return jsonify(result)
-    else:
-        return jsonify(result), 500
-
-
 @views.route('/api/job/update-quantity', methods=['POST'])
 def api_job_update_quantity():
     """
@@ -557,7 +700,6 @@ def api_job_update_quantity():
         "newQty": 100
     }
     """
-    from app.logic.epicor_api import update_job_quantity
     
     data = request.get_json()
     if not data:
@@ -572,6 +714,7 @@ def api_job_update_quantity():
     result = update_job_quantity(job_num, new_qty)
     
     if result['success']:
+        _invalidate_data_caches()
         return jsonify(result)
     else:
         return jsonify(result), 500
@@ -581,8 +724,6 @@ def api_job_update_quantity():
 # Kanban Receipt Routes
 # ============================================================================
 
-print("========== KANBAN ROUTES LOADED ==========")
-
 @views.route('/api/kanban/submit', methods=['GET', 'POST'])
 def api_kanban_submit():
     """
@@ -596,19 +737,14 @@ def api_kanban_submit():
         "scrapReason": "DEFECT"  (required if scrap > 0)
     }
     """
-    print("[api_kanban_submit] Route called", flush=True)
-    print(f"[api_kanban_submit] Method: {request.method}", flush=True)
-
     # Allow GET for testing
     if request.method == 'GET':
         return jsonify({'status': 'ok', 'message': 'Kanban endpoint is working. Use POST to submit.'})
 
     try:
-        from app.logic.epicor_api import kanban_receipt
-        print("[api_kanban_submit] Import successful", flush=True)
 
         data = request.get_json()
-        print(f"[api_kanban_submit] Data: {data}", flush=True)
+        logger.debug("[api_kanban_submit] Data: %s", data)
 
         if not data:
             return jsonify({'success': False, 'error': 'No data provided'}), 400
@@ -631,26 +767,23 @@ def api_kanban_submit():
         if scrap > 0 and not scrap_reason:
             return jsonify({'success': False, 'error': 'Scrap reason is required when scrap > 0'}), 400
 
-        print(f"[api_kanban_submit] Calling kanban_receipt({emp_id}, {part_num}, {quantity}, scrap={scrap}, scrap_reason={scrap_reason})", flush=True)
         result = kanban_receipt(emp_id, part_num, quantity, scrap=scrap, scrap_reason=scrap_reason)
-        print(f"[api_kanban_submit] Result: {result}", flush=True)
+        logger.debug("[api_kanban_submit] Result: %s", result)
         
         if result.get('success'):
+            _invalidate_data_caches()
             return jsonify(result)
         else:
             return jsonify(result), 400  # Use 400 instead of 500 for business errors
     
     except Exception as e:
-        import traceback
-        print(f"[api_kanban_submit] Exception: {e}", flush=True)
-        traceback.print_exc()
+        logger.exception("[api_kanban_submit] Exception: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
 @views.route('/api/kanban/last/<part_num>')
 def api_kanban_last(part_num):
     """API endpoint for last Kanban receipt on a part number."""
-    from app.logic.queries import get_last_kanban_receipt
     receipt = get_last_kanban_receipt(part_num)
     return jsonify(receipt)
 
@@ -658,7 +791,6 @@ def api_kanban_last(part_num):
 @views.route('/api/parts/search')
 def api_parts_search():
     """Search for parts by part number or description."""
-    from app.logic.queries import search_parts
     query = request.args.get('q', '').strip()
     if len(query) < 2:
         return jsonify([])
@@ -669,14 +801,18 @@ def api_parts_search():
 @views.route('/api/billet_summary')
 def api_billet_summary():
     """API endpoint for billet summary - for async refresh."""
-    billets = get_billet_summary()
+    billets = _billet_summary()
     return jsonify(billets)
 
 
+@_single_flight('billet')
+def _billet_summary():
+    return get_billet_summary()
+
+
 @views.route('/api/casting_summary/<op_code>')
 def api_casting_summary(op_code):
     """API endpoint for casting summary by operation code (CAST or CASTMIL2)."""
-    from app.logic.queries import get_casting_summary
 
     # Validate operation code
     if op_code not in ['CAST', 'CASTMIL2']:
@@ -692,17 +828,24 @@ def api_home_stats():
     Get stats for home page: workcell counts, total jobs, active workers.
     Returns all in one call for efficiency.
     """
-    from app.logic.queries import get_all_workcell_counts, get_active_worker_count, get_total_queue_count
+    return jsonify(_home_stats())
+
+
+@_single_flight('home_stats')
+def _home_stats():
     
+    # Worker count and workcell counts are independent: overlap their
+    # round-trips. The total reuses the per-OpCode counts cached by the
+    # workcell counts, so it waits for them instead of querying again.
+    workers_future = EXECUTOR.submit(get_active_worker_count)
     counts = get_all_workcell_counts()
-    active_workers = get_active_worker_count()
     total_jobs = get_total_queue_count()
     
-    return jsonify({
+    return {
         'workcell_counts': counts,
-        'active_workers': active_workers,
+        'active_workers': workers_future.result(),
         'total_jobs': total_jobs
-    })
+    }
 
 
 # ============================================================================
@@ -712,22 +855,11 @@ def api_home_stats():
 @views.route('/reports/activity')
 def activity_report():
     """Production activity report page."""
-    import sys
-
     employees = get_all_employees()
-    workcells = get_workcells()
-
-    # Get full workcell configs with ops for operation filter
-    workcell_configs = []
-    for wc in workcells:
-        config = WORKCELLS.get(wc['id'], {})
-        workcell_configs.append({
-            'id': wc['id'],
-            'name': wc['name'],
-            'ops': config.get('ops', [])
-        })
+    workcell_configs = _WORKCELL_OP_CONFIGS
 
-    print(f"[activity_report] Loaded {len(employees)} employees, {len(workcell_configs)} workcells", file=sys.stderr, flush=True)
+    logger.debug("[activity_report] Loaded %d employees, %d workcells",
+                 len(employees), len(workcell_configs))
 
     return render_template(
         'activity_report.html',
@@ -736,6 +868,24 @@ def activity_report():
     )
 
 
+def _stream_activity_report(first, rows):
+    """Yield the activity report JSON ({data, next_cursor, success}) piece by piece."""
+    dumps = current_app.json.dumps
+    count = 0
+    sort_key = None
+    yield '{"data": ['
+    if first is not None:
+        for row, sort_key in chain((first,), rows):
+            yield (',' if count else '') + dumps(row)
+            count += 1
+    logger.debug("[api_activity_report] Returned %d records", count)
+
+    next_cursor = None
+    if count == ACTIVITY_REPORT_PAGE_SIZE:
+        next_cursor = '|'.join(str(v) for v in sort_key)
+    yield '], "next_cursor": ' + dumps(next_cursor) + ', "success": true}\n'
+
+
 @views.route('/api/reports/activity')
 def api_activity_report():
     """
@@ -746,9 +896,8 @@ def api_activity_report():
         start_date: YYYY-MM-DD (required)
         end_date: YYYY-MM-DD (required)
         op_codes: Comma-separated operation codes (optional)
+        cursor: next_cursor from the previous page (optional)
     """
-    import sys
-
     emp_id = request.args.get('emp_id', 'all')
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
@@ -758,19 +907,39 @@ def api_activity_report():
     if not all([start_date, end_date]):
         return jsonify({'error': 'Missing required parameters: start_date, end_date'}), 400
 
+    try:
+        span = (date.fromisoformat(end_date) - date.fromisoformat(start_date)).days
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Dates must be YYYY-MM-DD'}), 400
+    if span < 0 or span >= ACTIVITY_REPORT_MAX_DAYS:
+        return jsonify({'success': False,
+                        'error': f'Date range must be 1 to {ACTIVITY_REPORT_MAX_DAYS} days'}), 400
+
+    # Cursor is "ClockInDate|ClockInTime|LaborDtlSeq" as returned in next_cursor
+    cursor = None
+    cursor_str = request.args.get('cursor')
+    if cursor_str:
+        try:
+            c_date, c_time, c_seq = cursor_str.split('|')
+            cursor = (date.fromisoformat(c_date).isoformat(), float(c_time), int(c_seq))
+        except ValueError:
+            return jsonify({'success': False, 'error': 'Invalid cursor'}), 400
+
     # Parse operation codes
     op_codes = None
     if op_codes_str and op_codes_str != 'all':
         op_codes = [code.strip() for code in op_codes_str.split(',') if code.strip()]
 
-    print(f"[api_activity_report] emp={emp_id}, dates={start_date} to {end_date}, ops={op_codes}", file=sys.stderr, flush=True)
+    logger.debug("[api_activity_report] emp=%s, dates=%s to %s, ops=%s",
+                 emp_id, start_date, end_date, op_codes)
 
     try:
-        data = get_activity_report(emp_id, start_date, end_date, op_codes)
-        print(f"[api_activity_report] Returned {len(data)} records", file=sys.stderr, flush=True)
-        return jsonify({'success': True, 'data': data})
+        # Run the query now so failures still get a 500, then stream the rows
+        # into the response instead of building the whole list and JSON string
+        rows = iter_activity_report(emp_id, start_date, end_date, op_codes, cursor)
+        first = next(rows, None)
+        return Response(stream_with_context(_stream_activity_report(first, rows)),
+                        mimetype='application/json')
     except Exception as e:
-        print(f"[ERROR] Activity report failed: {e}", file=sys.stderr, flush=True)
-        import traceback
-        traceback.print_exc()
+        logger.exception("[ERROR] Activity report failed: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -8,7 +8,7 @@ echo Installing The Queue Dependencies
 echo ==========================================
 echo.
 
-pip install flask waitress pyodbc sqlalchemy python-dotenv
+pip install -r requirements.txt
 
 echo.
 echo ==========================================
@@ -1,7 +1,10 @@
 # run.py
+# Version 1.1 — 2026-10-15
+# - Waitress thread count from WAITRESS_THREADS (default 16, was 4)
 # Version 1.0 — Production server for The Queue
 # Uses Waitress, binds to 0.0.0.0
 
+import os
 import sys
 from dotenv import load_dotenv
 
@@ -20,5 +23,11 @@ if __name__ == '__main__':
     from waitress import serve
     HOST = '0.0.0.0'
     PORT = 5002
-    print(f"[The Queue] Starting on http://{HOST}:{PORT}")
-    serve(app, host=HOST, port=PORT, threads=4)
+    # Requests spend most of their time waiting on SQL Server or the Epicor
+    # REST API, so run more threads than cores. Each query checks out its own
+    # pooled connection and fan-out work (job detail, home stats) holds extra
+    # ones on the queries EXECUTOR (8 workers), so keep THREADS + 8 at or below
+    # DB_POOL_SIZE + DB_MAX_OVERFLOW or requests queue for connections.
+    THREADS = int(os.getenv('WAITRESS_THREADS', '16'))
+    print(f"[The Queue] Starting on http://{HOST}:{PORT} ({THREADS} threads)")
+    serve(app, host=HOST, port=PORT, threads=THREADS)
@@ -0,0 +1,32 @@
+-- sql/migrations/001_partqty_partnum_index.sql
+-- Version 1.0 — 2026-10-15
+--
+-- Supporting index for the inline Erp.PartQty aggregate in app/logic/queries.py
+-- (_partqty(), used when PARTQTY_VIEW is off) and the PartNum-only PartQty
+-- lookups. With PARTQTY_VIEW=1 the queries read dbo.vw_PartQtyAgg instead.
+--
+-- Erp.PartQty is keyed (Company, PartNum, WarehouseCode). A narrow
+-- PartNum-leading index covering OnHandQty/DemandQty lets the per-part totals
+-- seek by PartNum and aggregate without touching the wide clustered rows.
+--
+-- Check existing indexes first with:
+--     EXEC sp_helpindex 'Erp.PartQty';
+-- The index is only created when no PartNum-leading index exists.
+
+IF NOT EXISTS (
+    SELECT 1
+    FROM sys.indexes i
+    INNER JOIN sys.index_columns ic
+        ON i.object_id = ic.object_id AND i.index_id = ic.index_id
+    INNER JOIN sys.columns c
+        ON ic.object_id = c.object_id AND ic.column_id = c.column_id
+    WHERE i.object_id = OBJECT_ID('Erp.PartQty')
+      AND ic.key_ordinal = 1
+      AND c.name = 'PartNum'
+)
+BEGIN
+    CREATE NONCLUSTERED INDEX IX_PartQty_PartNum
+        ON Erp.PartQty (PartNum)
+        INCLUDE (OnHandQty, DemandQty);
+END
+GO
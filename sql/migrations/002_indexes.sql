@@ -0,0 +1,53 @@
+-- sql/migrations/002_indexes.sql
+-- Version 1.0 — 2026-10-15
+--
+-- Covering filtered indexes for the JobMtl / JobOper predicates used on every
+-- queue, filter and detail-panel query in app/logic/queries.py.
+--
+-- IX_JobMtl_Job_RelOp
+--   Material lookups all filter JobNum (IN list or equality) plus
+--   RequiredQty > 0 and join on (Company, JobNum, AssemblySeq, RelatedOperation).
+--   The INCLUDE list carries every JobMtl column those queries read
+--   (MtlSeq, PartNum, RequiredQty, IUM), so they no longer need a key lookup
+--   per material row.
+--
+-- IX_JobOper_Open
+--   Workcell queries only ever look at open operations (OpComplete = 0) and
+--   read OpCode / LaborEntryMethod / QtyCompleted. Completed operations are
+--   the bulk of JobOper, so the filtered index stays small.
+--
+-- Filtered indexes are only used when the query predicate matches the filter
+-- literally. Keep "RequiredQty > 0" and "OpComplete = 0" as literals in the
+-- queries (not parameters).
+--
+-- Check existing indexes first with:
+--     EXEC sp_helpindex 'Erp.JobMtl';
+--     EXEC sp_helpindex 'Erp.JobOper';
+
+SET ANSI_NULLS ON;
+SET QUOTED_IDENTIFIER ON;
+GO
+
+IF NOT EXISTS (
+    SELECT 1 FROM sys.indexes
+    WHERE object_id = OBJECT_ID('Erp.JobMtl') AND name = 'IX_JobMtl_Job_RelOp'
+)
+BEGIN
+    CREATE NONCLUSTERED INDEX IX_JobMtl_Job_RelOp
+        ON Erp.JobMtl (Company, JobNum, AssemblySeq, RelatedOperation)
+        INCLUDE (MtlSeq, PartNum, RequiredQty, IUM)
+        WHERE RequiredQty > 0;
+END
+GO
+
+IF NOT EXISTS (
+    SELECT 1 FROM sys.indexes
+    WHERE object_id = OBJECT_ID('Erp.JobOper') AND name = 'IX_JobOper_Open'
+)
+BEGIN
+    CREATE NONCLUSTERED INDEX IX_JobOper_Open
+        ON Erp.JobOper (Company, JobNum, AssemblySeq, OprSeq)
+        INCLUDE (OpCode, OpComplete, LaborEntryMethod, QtyCompleted)
+        WHERE OpComplete = 0;
+END
+GO
@@ -0,0 +1,60 @@
+-- sql/migrations/003_partqty_agg_view.sql
+-- Version 1.0 — 2026-10-15
+--
+-- Indexed view dbo.vw_PartQtyAgg: Erp.PartQty totalled per Company/PartNum
+-- across warehouses. SQL Server maintains it on every PartQty write, so the
+-- queue, summary and search queries in app/logic/queries.py read one row per
+-- part instead of re-aggregating PartQty on every request.
+--
+-- Indexed view rules that shape the definition:
+--   - WITH SCHEMABINDING and two-part table names
+--   - COUNT_BIG(*) is required alongside GROUP BY
+--   - SUM() over a nullable column is not allowed, hence ISNULL(..., 0)
+--
+-- The clustered index leads on PartNum so both the Company/PartNum joins and
+-- the PartNum-only lookups seek. Queries reference the view WITH (NOEXPAND)
+-- so Standard Edition uses the index instead of expanding the view.
+--
+-- The app reads the view only when PARTQTY_VIEW=1; with the flag off (the
+-- default) queries.py aggregates Erp.PartQty inline and this script is optional.
+-- The 006 rollup refresh reads the view, so ROLLUP_TABLES=1 needs it too.
+--
+-- Upgrade caveat: schema binding blocks ALTERs to the bound PartQty columns, so
+-- an Epicor upgrade that touches Erp.PartQty fails while the view exists.
+-- Before upgrading, set PARTQTY_VIEW=0 (and ROLLUP_TABLES=0), restart the app
+-- and DROP VIEW dbo.vw_PartQtyAgg. Afterwards re-run this script and turn the
+-- flags back on.
+
+SET ANSI_NULLS ON;
+SET ANSI_PADDING ON;
+SET ANSI_WARNINGS ON;
+SET ARITHABORT ON;
+SET CONCAT_NULL_YIELDS_NULL ON;
+SET QUOTED_IDENTIFIER ON;
+SET NUMERIC_ROUNDABORT OFF;
+GO
+
+IF OBJECT_ID('dbo.vw_PartQtyAgg', 'V') IS NULL
+    EXEC('
+        CREATE VIEW dbo.vw_PartQtyAgg
+        WITH SCHEMABINDING
+        AS
+        SELECT Company,
+               PartNum,
+               SUM(ISNULL(OnHandQty, 0)) AS OnHandQty,
+               SUM(ISNULL(DemandQty, 0)) AS DemandQty,
+               COUNT_BIG(*) AS WarehouseCount
+        FROM Erp.PartQty
+        GROUP BY Company, PartNum
+    ');
+GO
+
+IF NOT EXISTS (
+    SELECT 1 FROM sys.indexes
+    WHERE object_id = OBJECT_ID('dbo.vw_PartQtyAgg') AND name = 'CIX_vw_PartQtyAgg'
+)
+BEGIN
+    CREATE UNIQUE CLUSTERED INDEX CIX_vw_PartQtyAgg
+        ON dbo.vw_PartQtyAgg (PartNum, Company);
+END
+GO
@@ -0,0 +1,32 @@
+-- sql/migrations/004_joboper_active_index.sql
+-- Version 1.0 — 2026-10-15
+--
+-- IX_JobOper_Active: covering filtered index for the outer JobOper scan in
+-- get_jobs_for_workcell() (app/logic/queries.py). The queue only shows open,
+-- non-backflush operations, and the INCLUDE list carries every JobOper column
+-- that SELECT reads.
+--
+-- get_jobs_for_workcell() can force this index with
+-- WITH (INDEX(IX_JobOper_Active)) by setting JOBOPER_INDEX_HINT=1 in the
+-- environment. The hint is a hard error if the index is missing, so only
+-- turn it on after this script has run on that database.
+--
+-- As with 002, the filter only matches when the query keeps
+-- "OpComplete = 0" and "LaborEntryMethod != 'B'" as literals.
+
+SET ANSI_NULLS ON;
+SET QUOTED_IDENTIFIER ON;
+GO
+
+IF NOT EXISTS (
+    SELECT 1 FROM sys.indexes
+    WHERE object_id = OBJECT_ID('Erp.JobOper') AND name = 'IX_JobOper_Active'
+)
+BEGIN
+    CREATE NONCLUSTERED INDEX IX_JobOper_Active
+        ON Erp.JobOper (Company, JobNum, AssemblySeq, OprSeq)
+        INCLUDE (OpCode, OpDesc, QtyCompleted, EstProdHours, ProdStandard,
+                 CommentText, SysRowID, SchedRelation)
+        WHERE OpComplete = 0 AND LaborEntryMethod <> 'B';
+END
+GO
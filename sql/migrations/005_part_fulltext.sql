@@ -0,0 +1,62 @@
+-- sql/migrations/005_part_fulltext.sql
+-- Version 1.0 — 2026-10-15
+--
+-- Full-text index on Erp.Part (PartNum, PartDescription) for the Kanban part
+-- search (search_parts() in app/logic/queries.py). A "%term%" LIKE can't seek
+-- and scans all of Erp.Part. With PART_SEARCH_FTS=1 set in the environment,
+-- the search uses CONTAINS() word-prefix terms plus a PartNum prefix LIKE.
+--
+-- Note that full-text matches word prefixes, not arbitrary substrings.
+-- "1234" finds "1234-A" and "Bracket 1234", but not "AB1234". Leave the flag
+-- off if users rely on mid-part-number searches.
+--
+-- Requirements:
+--   - Full-Text Search installed on the instance (checked below)
+--   - A unique, single-column, non-nullable index on Erp.Part for KEY INDEX.
+--     Erp.Part's primary key is (Company, PartNum), so the script looks for
+--     one (Epicor normally has one on SysRowID) and stops if none is found.
+
+IF FULLTEXTSERVICEPROPERTY('IsFullTextInstalled') = 0
+BEGIN
+    RAISERROR('Full-Text Search is not installed on this instance.', 16, 1);
+    SET NOEXEC ON;
+END
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.fulltext_catalogs WHERE name = 'TheQueueFTS')
+    CREATE FULLTEXT CATALOG TheQueueFTS;
+GO
+
+IF NOT EXISTS (
+    SELECT 1 FROM sys.fulltext_indexes WHERE object_id = OBJECT_ID('Erp.Part')
+)
+BEGIN
+    DECLARE @key_index sysname = (
+        SELECT TOP 1 i.name
+        FROM sys.indexes i
+        INNER JOIN sys.index_columns ic
+            ON i.object_id = ic.object_id AND i.index_id = ic.index_id
+        INNER JOIN sys.columns c
+            ON ic.object_id = c.object_id AND ic.column_id = c.column_id
+        WHERE i.object_id = OBJECT_ID('Erp.Part')
+          AND i.is_unique = 1
+          AND i.has_filter = 0
+          AND c.is_nullable = 0
+          AND ic.is_included_column = 0
+          AND (SELECT COUNT(*) FROM sys.index_columns k
+               WHERE k.object_id = i.object_id AND k.index_id = i.index_id
+                 AND k.is_included_column = 0) = 1
+        ORDER BY i.index_id
+    );
+
+    IF @key_index IS NULL
+        RAISERROR('No unique single-column index on Erp.Part to use as KEY INDEX.', 16, 1);
+    ELSE
+        EXEC('CREATE FULLTEXT INDEX ON Erp.Part (PartNum LANGUAGE 1033, PartDescription LANGUAGE 1033)
+              KEY INDEX ' + @key_index + ' ON TheQueueFTS
+              WITH CHANGE_TRACKING AUTO');
+END
+GO
+
+SET NOEXEC OFF;
+GO
@@ -0,0 +1,138 @@
+-- sql/migrations/006_rollup_tables.sql
+-- Version 1.0 — 2026-10-15
+--
+-- Persisted roll-ups of the SubAsmComplete and MaterialAgg CTEs from
+-- get_jobs_for_workcell() (app/logic/queries.py), covering every open,
+-- released job:
+--
+--   dbo.tq_SubAsmComplete  one row per job: 1 if every sub-assembly's last
+--                          non-backflush op has QtyCompleted > 0
+--   dbo.tq_MaterialAgg     material counts by stock status per owning
+--                          (non-backflush) operation, PAINT excluded
+--
+-- dbo.sp_refresh_tq_rollups rebuilds both tables in one transaction. Schedule
+-- it as a SQL Agent job step (e.g. every 2 minutes):
+--     EXEC dbo.sp_refresh_tq_rollups;
+--
+-- The app reads the tables instead of the CTEs only when ROLLUP_TABLES=1 is
+-- set in its environment. Queue readiness and material icons are then as
+-- stale as the last refresh. Leave the flag off until the Agent job is
+-- running. Keep the procedure in step with the CTEs in queries.py.
+--
+-- Requires sql/migrations/003 (dbo.vw_PartQtyAgg).
+
+SET ANSI_NULLS ON;
+SET QUOTED_IDENTIFIER ON;
+GO
+
+IF OBJECT_ID('dbo.tq_SubAsmComplete', 'U') IS NULL
+BEGIN
+    CREATE TABLE dbo.tq_SubAsmComplete (
+        Company         nvarchar(8)  NOT NULL,
+        JobNum          nvarchar(14) NOT NULL,
+        AllSubAsmsReady int          NOT NULL,
+        CONSTRAINT PK_tq_SubAsmComplete PRIMARY KEY CLUSTERED (Company, JobNum)
+    );
+END
+GO
+
+IF OBJECT_ID('dbo.tq_MaterialAgg', 'U') IS NULL
+BEGIN
+    CREATE TABLE dbo.tq_MaterialAgg (
+        Company          nvarchar(8)  NOT NULL,
+        JobNum           nvarchar(14) NOT NULL,
+        AssemblySeq      int          NOT NULL,
+        RelatedOperation int          NOT NULL,
+        TotalMtls        int          NOT NULL,
+        StarMtls         int          NOT NULL,
+        CheckMtls        int          NOT NULL,
+        PartialMtls      int          NOT NULL,
+        NoneMtls         int          NOT NULL,
+        CONSTRAINT PK_tq_MaterialAgg PRIMARY KEY CLUSTERED
+            (Company, JobNum, AssemblySeq, RelatedOperation)
+    );
+END
+GO
+
+CREATE OR ALTER PROCEDURE dbo.sp_refresh_tq_rollups
+AS
+BEGIN
+    SET NOCOUNT ON;
+    SET XACT_ABORT ON;
+
+    BEGIN TRANSACTION;
+
+    DELETE FROM dbo.tq_SubAsmComplete;
+
+    WITH OpenJobs AS (
+        SELECT Company, JobNum
+        FROM Erp.JobHead
+        WHERE JobComplete = 0 AND JobReleased = 1
+    ),
+    LastNonBF AS (
+        SELECT jo.Company, jo.JobNum, jo.AssemblySeq, jo.QtyCompleted,
+               ROW_NUMBER() OVER (
+                   PARTITION BY jo.Company, jo.JobNum, jo.AssemblySeq
+                   ORDER BY jo.OprSeq DESC
+               ) AS rn
+        FROM Erp.JobOper jo
+        INNER JOIN OpenJobs oj ON jo.Company = oj.Company AND jo.JobNum = oj.JobNum
+        WHERE jo.LaborEntryMethod != 'B'
+    )
+    INSERT INTO dbo.tq_SubAsmComplete (Company, JobNum, AllSubAsmsReady)
+    SELECT Company, JobNum,
+           MIN(CASE WHEN AssemblySeq > 0 AND QtyCompleted = 0 THEN 0 ELSE 1 END)
+    FROM LastNonBF
+    WHERE rn = 1
+    GROUP BY Company, JobNum;
+
+    DELETE FROM dbo.tq_MaterialAgg;
+
+    WITH OpenJobs AS (
+        SELECT Company, JobNum
+        FROM Erp.JobHead
+        WHERE JobComplete = 0 AND JobReleased = 1
+    ),
+    OpOwnership AS (
+        SELECT jo.Company, jo.JobNum, jo.AssemblySeq, jo.OprSeq, jo.OpCode,
+               CASE
+                   WHEN jo.LaborEntryMethod != 'B' THEN jo.OprSeq
+                   ELSE MIN(CASE WHEN jo.LaborEntryMethod != 'B' THEN jo.OprSeq END) OVER (
+                       PARTITION BY jo.Company, jo.JobNum, jo.AssemblySeq
+                       ORDER BY jo.OprSeq
+                       ROWS BETWEEN 1 FOLLOWING AND UNBOUNDED FOLLOWING
+                   )
+               END AS OwnerOprSeq
+        FROM Erp.JobOper jo
+        INNER JOIN OpenJobs oj ON jo.Company = oj.Company AND jo.JobNum = oj.JobNum
+    )
+    INSERT INTO dbo.tq_MaterialAgg (Company, JobNum, AssemblySeq, RelatedOperation,
+                                    TotalMtls, StarMtls, CheckMtls, PartialMtls, NoneMtls)
+    SELECT
+        jm.Company,
+        jm.JobNum,
+        jm.AssemblySeq,
+        oo.OwnerOprSeq,
+        COUNT(*),
+        SUM(CASE WHEN ISNULL(pq.OnHandQty, 0) >= ISNULL(pq.DemandQty, jm.RequiredQty) THEN 1 ELSE 0 END),
+        SUM(CASE WHEN ISNULL(pq.OnHandQty, 0) >= jm.RequiredQty
+                  AND ISNULL(pq.OnHandQty, 0) < ISNULL(pq.DemandQty, jm.RequiredQty + 1) THEN 1 ELSE 0 END),
+        SUM(CASE WHEN ISNULL(pq.OnHandQty, 0) > 0
+                  AND ISNULL(pq.OnHandQty, 0) < jm.RequiredQty THEN 1 ELSE 0 END),
+        SUM(CASE WHEN ISNULL(pq.OnHandQty, 0) = 0 THEN 1 ELSE 0 END)
+    FROM Erp.JobMtl jm
+    INNER JOIN OpOwnership oo
+        ON jm.Company = oo.Company
+        AND jm.JobNum = oo.JobNum
+        AND jm.AssemblySeq = oo.AssemblySeq
+        AND jm.RelatedOperation = oo.OprSeq
+    LEFT JOIN dbo.vw_PartQtyAgg pq WITH (NOEXPAND)
+        ON jm.Company = pq.Company AND jm.PartNum = pq.PartNum
+    WHERE jm.RequiredQty > 0
+      AND oo.OpCode != 'PAINT'
+      AND oo.OwnerOprSeq IS NOT NULL
+    GROUP BY jm.Company, jm.JobNum, jm.AssemblySeq, oo.OwnerOprSeq;
+
+    COMMIT TRANSACTION;
+END
+GO
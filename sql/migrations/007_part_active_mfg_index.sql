@@ -0,0 +1,33 @@
+-- sql/migrations/007_part_active_mfg_index.sql
+-- Version 1.0 — 2026-10-15
+--
+-- IX_Part_ActiveMfg: filtered index for the Kanban part search
+-- (search_parts() in app/logic/queries.py). The search only returns active,
+-- manufactured parts (InActive = 0 AND TypeCode = 'M'), a small slice of
+-- Erp.Part.
+--   - Keyed on PartNum: the PartNum prefix LIKE seeks, and the
+--     ORDER BY PartNum reads in index order.
+--   - PartDescription is included, so the "%term%" description match scans
+--     this narrow index instead of the whole table.
+--
+-- As with 002, the filter only matches when the query keeps
+-- "p.InActive = 0 AND p.TypeCode = 'M'" as literals.
+--
+-- Check existing indexes first with:
+--     EXEC sp_helpindex 'Erp.Part';
+
+SET ANSI_NULLS ON;
+SET QUOTED_IDENTIFIER ON;
+GO
+
+IF NOT EXISTS (
+    SELECT 1 FROM sys.indexes
+    WHERE object_id = OBJECT_ID('Erp.Part') AND name = 'IX_Part_ActiveMfg'
+)
+BEGIN
+    CREATE NONCLUSTERED INDEX IX_Part_ActiveMfg
+        ON Erp.Part (PartNum)
+        INCLUDE (Company, PartDescription)
+        WHERE InActive = 0 AND TypeCode = 'M';
+END
+GO
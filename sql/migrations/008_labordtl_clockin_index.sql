@@ -0,0 +1,30 @@
+-- sql/migrations/008_labordtl_clockin_index.sql
+-- Version 1.0 — 2026-10-15
+--
+-- IX_LaborDtl_ClockIn_Emp: supports the production activity report
+-- (get_activity_report() in app/logic/queries.py). The report seeks a
+-- ClockInDate range, optionally narrowed to one EmployeeNum, and reads the
+-- newest rows first. The INCLUDE list covers every LaborDtl column the
+-- report and its joins read, so no key lookups are needed.
+--
+-- No extra JobOper index is needed for the report's join: Erp.JobOper is
+-- already clustered on (Company, JobNum, AssemblySeq, OprSeq).
+--
+-- Check existing indexes first with:
+--     EXEC sp_helpindex 'Erp.LaborDtl';
+
+SET ANSI_NULLS ON;
+SET QUOTED_IDENTIFIER ON;
+GO
+
+IF NOT EXISTS (
+    SELECT 1 FROM sys.indexes
+    WHERE object_id = OBJECT_ID('Erp.LaborDtl') AND name = 'IX_LaborDtl_ClockIn_Emp'
+)
+BEGIN
+    CREATE NONCLUSTERED INDEX IX_LaborDtl_ClockIn_Emp
+        ON Erp.LaborDtl (ClockInDate, EmployeeNum)
+        INCLUDE (Company, JobNum, AssemblySeq, OprSeq, LaborQty, ScrapQty,
+                 LaborHrs, ClockInTime);
+END
+GO
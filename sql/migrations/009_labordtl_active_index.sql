@@ -0,0 +1,33 @@
+-- sql/migrations/009_labordtl_active_index.sql
+-- Version 1.0 — 2026-10-15
+--
+-- IX_LaborDtl_Active: filtered index over the open labor transactions, for
+-- the dashboard counts get_active_worker_count() and get_active_job_count()
+-- (app/logic/queries.py). Both count DISTINCT values over ActiveTrans = 1.
+-- Without this index they scan the whole LaborDtl history. With it they read
+-- only the few rows that are clocked in right now.
+--
+-- The worker count joins the active rows to Erp.LaborHed for EmployeeNum.
+-- LaborHed is already clustered on (Company, LaborHedSeq), so that join is a
+-- seek per active row and no extra LaborHed index is needed.
+--
+-- As with 002, the filter only matches while the queries keep
+-- "ActiveTrans = 1" as a literal.
+--
+-- Check existing indexes first with:
+--     EXEC sp_helpindex 'Erp.LaborDtl';
+
+SET ANSI_NULLS ON;
+SET QUOTED_IDENTIFIER ON;
+GO
+
+IF NOT EXISTS (
+    SELECT 1 FROM sys.indexes
+    WHERE object_id = OBJECT_ID('Erp.LaborDtl') AND name = 'IX_LaborDtl_Active'
+)
+BEGIN
+    CREATE NONCLUSTERED INDEX IX_LaborDtl_Active
+        ON Erp.LaborDtl (Company, LaborHedSeq, JobNum)
+        WHERE ActiveTrans = 1;
+END
+GO
@@ -0,0 +1,30 @@
+-- sql/migrations/010_labordtl_job_op_index.sql
+-- Version 1.0 — 2026-10-15
+--
+-- IX_LaborDtl_Job_Op_Pos: filtered index for the last-entry lookup in
+-- get_operation_last_entries() (app/logic/queries.py). That query groups one
+-- job's LaborDtl rows with LaborQty > 0 by (AssemblySeq, OprSeq) and takes
+-- MAX(ClockInDate). With this index the aggregate is a range seek on JobNum
+-- that reads only production entries, already in group order.
+--
+-- As with 002, the filter only matches while the query keeps
+-- "LaborQty > 0" as a literal.
+--
+-- Check existing indexes first with:
+--     EXEC sp_helpindex 'Erp.LaborDtl';
+
+SET ANSI_NULLS ON;
+SET QUOTED_IDENTIFIER ON;
+GO
+
+IF NOT EXISTS (
+    SELECT 1 FROM sys.indexes
+    WHERE object_id = OBJECT_ID('Erp.LaborDtl') AND name = 'IX_LaborDtl_Job_Op_Pos'
+)
+BEGIN
+    CREATE NONCLUSTERED INDEX IX_LaborDtl_Job_Op_Pos
+        ON Erp.LaborDtl (JobNum, AssemblySeq, OprSeq)
+        INCLUDE (ClockInDate)
+        WHERE LaborQty > 0;
+END
+GO
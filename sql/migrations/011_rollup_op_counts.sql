@@ -0,0 +1,59 @@
+-- sql/migrations/011_rollup_op_counts.sql
+-- Version 1.0 — 2026-10-15
+--
+-- Persisted open-operation counts per OpCode for the home page workcell
+-- counts (get_all_workcell_counts() in app/logic/queries.py):
+--
+--   dbo.tq_OpQueueCounts  open, non-backflush operations on open, released
+--                         jobs, counted per Company/OpCode
+--
+-- The app maps OpCodes to workcells itself (config/workcells.json), so the
+-- table is kept per OpCode, not per workcell.
+--
+-- dbo.sp_refresh_tq_op_counts rebuilds the table. Add it as a second step of
+-- the sp_refresh_tq_rollups Agent job from 006:
+--     EXEC dbo.sp_refresh_tq_op_counts;
+--
+-- Like the 006 tables, it is read only when ROLLUP_TABLES=1 is set, and the
+-- counts are as stale as the last refresh. Triggers on Erp.JobOper were ruled
+-- out: Epicor owns those tables, and every JobOper write would pay for the
+-- bookkeeping. The active worker/job counts stay live queries (009 index).
+
+SET ANSI_NULLS ON;
+SET QUOTED_IDENTIFIER ON;
+GO
+
+IF OBJECT_ID('dbo.tq_OpQueueCounts', 'U') IS NULL
+BEGIN
+    CREATE TABLE dbo.tq_OpQueueCounts (
+        Company  nvarchar(8)  NOT NULL,
+        OpCode   nvarchar(8)  NOT NULL,
+        JobCount int          NOT NULL,
+        CONSTRAINT PK_tq_OpQueueCounts PRIMARY KEY CLUSTERED (OpCode, Company)
+    );
+END
+GO
+
+CREATE OR ALTER PROCEDURE dbo.sp_refresh_tq_op_counts
+AS
+BEGIN
+    SET NOCOUNT ON;
+    SET XACT_ABORT ON;
+
+    BEGIN TRANSACTION;
+
+    DELETE FROM dbo.tq_OpQueueCounts;
+
+    INSERT INTO dbo.tq_OpQueueCounts (Company, OpCode, JobCount)
+    SELECT jo.Company, jo.OpCode, COUNT(*)
+    FROM Erp.JobHead jh
+    INNER JOIN Erp.JobOper jo ON jh.Company = jo.Company AND jh.JobNum = jo.JobNum
+    WHERE jh.JobComplete = 0
+      AND jh.JobReleased = 1
+      AND jo.OpComplete = 0
+      AND jo.LaborEntryMethod != 'B'
+    GROUP BY jo.Company, jo.OpCode;
+
+    COMMIT TRANSACTION;
+END
+GO
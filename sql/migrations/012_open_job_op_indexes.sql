@@ -0,0 +1,50 @@
+-- sql/migrations/012_open_job_op_indexes.sql
+-- Version 1.0 — 2026-10-15
+--
+-- Filtered indexes for the open-job / open-op-by-OpCode lookups:
+--
+-- IX_JobHead_Open
+--   Open, released jobs only. get_all_workcell_counts() and the RelevantJobs
+--   CTE in get_jobs_for_workcell() (app/logic/queries.py) join JobOper to
+--   JobHead on "JobComplete = 0 AND JobReleased = 1". The filter columns are
+--   constant inside the index, so the key is just the join columns.
+--
+-- IX_JobOper_Op_Open
+--   Open, non-backflush operations keyed by OpCode, so "OpCode IN :ops" is one
+--   seek per op code instead of a scan of every open operation.
+--
+-- With both in place the workcell count is an index-only join. The
+-- sp_refresh_tq_op_counts rollup (011) and get_all_workcell_counts() under
+-- ROLLUP_TABLES=1 read the same rows.
+--
+-- As with 002, keep these predicates as literals in the queries.
+--
+-- Check existing indexes first with:
+--     EXEC sp_helpindex 'Erp.JobHead';
+--     EXEC sp_helpindex 'Erp.JobOper';
+
+SET ANSI_NULLS ON;
+SET QUOTED_IDENTIFIER ON;
+GO
+
+IF NOT EXISTS (
+    SELECT 1 FROM sys.indexes
+    WHERE object_id = OBJECT_ID('Erp.JobHead') AND name = 'IX_JobHead_Open'
+)
+BEGIN
+    CREATE NONCLUSTERED INDEX IX_JobHead_Open
+        ON Erp.JobHead (Company, JobNum)
+        WHERE JobComplete = 0 AND JobReleased = 1;
+END
+GO
+
+IF NOT EXISTS (
+    SELECT 1 FROM sys.indexes
+    WHERE object_id = OBJECT_ID('Erp.JobOper') AND name = 'IX_JobOper_Op_Open'
+)
+BEGIN
+    CREATE NONCLUSTERED INDEX IX_JobOper_Op_Open
+        ON Erp.JobOper (OpCode, Company, JobNum)
+        WHERE OpComplete = 0 AND LaborEntryMethod <> 'B';
+END
+GO